@@ -0,0 +1,240 @@
+#!/usr/bin/env python
+"""
+Batch planning: run many weekend plans from a JSONL or CSV file.
+
+Each input record holds the run_weekend() fields (missing ones fall back to
+the CLI defaults) and optionally an "id". Plans run on a thread or process
+pool; every result is appended to the output JSONL as soon as it finishes,
+so an interrupted batch can be resumed and only the missing records rerun.
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import time
+from collections import deque
+from functools import partial
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from main import DEFAULT_INPUTS, default_date, plan_weekend
+from pipeline import MODES
+
+INPUT_FIELDS = ("location", "interests", "budget", "companions", "date", "home", "departure_time", "return_time")
+
+
+def plan(inputs: dict, mode: str = "hierarchical", use_cache: bool = True, on_task: Optional[Callable[[str, str, float], None]] = None) -> str:
+    """Run one crew and return the raw plan (module-level so process pools can pickle it)."""
+    return plan_weekend(inputs, mode=mode, use_cache=use_cache, on_task=on_task)
+
+
+def _timed(planner: Callable[[dict, str], str], started: dict, rid: str, inputs: dict, mode: str) -> str:
+    """Run planner, noting in started when the record actually began (thread pools only)."""
+    started[rid] = time.perf_counter()
+    return planner(inputs, mode)
+
+
+def record_id(inputs: dict) -> str:
+    """Stable id for a record without an explicit one: a hash of its inputs."""
+    payload = json.dumps(inputs, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def record_inputs(row: dict) -> dict:
+    """run_weekend() inputs of one record; empty fields fall back to DEFAULT_INPUTS and today."""
+    inputs = {**DEFAULT_INPUTS, "date": default_date()}
+    inputs.update({field: str(row[field]).strip() for field in INPUT_FIELDS if row.get(field)})
+    return inputs
+
+
+def read_records(path: Path) -> Iterator[Tuple[str, dict]]:
+    """
+    Yield (id, inputs) for every record in a .jsonl or .csv file.
+
+    Empty fields are filled from DEFAULT_INPUTS; the date defaults to today.
+    """
+    path = Path(path)
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.suffix.lower() == ".csv":
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+
+    for row in rows:
+        inputs = record_inputs(row)
+        yield str(row.get("id") or record_id(inputs)), inputs
+
+
+def completed_ids(output_path: Path) -> set:
+    """Ids of the records that already have a successful result in output_path."""
+    done = set()
+    if not Path(output_path).exists():
+        return done
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a line cut short by an interrupted run
+            if result.get("status") == "ok":
+                done.add(result["id"])
+    return done
+
+
+def percentile(samples: List[float], p: float) -> float:
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(round(p * (len(samples) - 1))))]
+
+
+def run_batch(
+    input_path: Path,
+    output_path: Path,
+    workers: int = 4,
+    processes: bool = False,
+    timeout: Optional[float] = None,
+    mode: str = "hierarchical",
+    resume: bool = True,
+    planner: Callable[[dict, str], str] = plan,
+) -> Dict[str, float]:
+    """
+    Plan every record of input_path and append the results to output_path.
+
+    Args:
+        input_path: JSONL or CSV file with one plan request per record
+        output_path: JSONL file; one line per finished record
+        workers: Number of plans running at the same time
+        processes: Use a process pool instead of a thread pool
+        timeout: Seconds after which a record is reported as "timeout"; counted
+            from when its worker starts it (from submission with processes=True).
+            The worker itself cannot be interrupted: it keeps its slot until
+            the crew returns, so later records never queue behind a hung one.
+        mode: Crew mode passed to WeekendPlanner
+        resume: Skip records already recorded as "ok" in output_path
+        planner: Function running one plan (must be picklable with processes=True)
+
+    Returns:
+        Summary with counts, throughput (plans per minute) and p50/p95 latency
+    """
+    done = completed_ids(output_path) if resume else set()
+    pending = deque()
+    seen = set()
+    skipped = 0
+    for rid, inputs in read_records(input_path):
+        if rid in done or rid in seen:
+            skipped += 1
+            continue
+        seen.add(rid)
+        pending.append((rid, inputs))
+
+    counts = {"ok": 0, "error": 0, "timeout": 0}
+    latencies: List[float] = []
+    start = time.perf_counter()
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    pool_class = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    executor = pool_class(max_workers=workers)
+    in_flight = {}
+    # Timed-out records whose worker is still busy; each one still holds a slot
+    hung = set()
+    started: Dict[str, float] = {}
+
+    with open(output_path, "a", encoding="utf-8") as out:
+
+        def write(rid: str, inputs: dict, status: str, latency: float, **fields) -> None:
+            counts[status] += 1
+            if status == "ok":
+                latencies.append(latency)
+            line = {"id": rid, "status": status, "latency": round(latency, 3), "inputs": inputs, **fields}
+            out.write(json.dumps(line, ensure_ascii=False) + "\n")
+            out.flush()
+
+        def began(rid: str, submitted: float) -> float:
+            return started.get(rid, submitted)
+
+        try:
+            while pending or in_flight:
+                hung = {future for future in hung if not future.done()}
+                while pending and len(in_flight) + len(hung) < workers:
+                    rid, inputs = pending.popleft()
+                    if processes:
+                        future = executor.submit(planner, inputs, mode)
+                    else:
+                        future = executor.submit(_timed, planner, started, rid, inputs, mode)
+                    in_flight[future] = (rid, inputs, time.perf_counter())
+
+                wait_for = None
+                if timeout is not None and in_flight:
+                    next_deadline = min(began(rid, submitted) for rid, _, submitted in in_flight.values()) + timeout
+                    wait_for = max(0.0, next_deadline - time.perf_counter())
+                finished, _ = wait(set(in_flight) | hung, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+                now = time.perf_counter()
+                for future in finished:
+                    if future not in in_flight:
+                        continue  # a timed-out record's worker is free again
+                    rid, inputs, submitted = in_flight.pop(future)
+                    latency = now - began(rid, submitted)
+                    try:
+                        write(rid, inputs, "ok", latency, raw=future.result())
+                    except Exception as e:
+                        write(rid, inputs, "error", latency, error=str(e))
+
+                if timeout is not None:
+                    for future, (rid, inputs, submitted) in list(in_flight.items()):
+                        if now - began(rid, submitted) >= timeout:
+                            del in_flight[future]
+                            hung.add(future)
+                            write(rid, inputs, "timeout", now - began(rid, submitted), error=f"timed out after {timeout:.0f}s")
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    elapsed = time.perf_counter() - start
+    return {
+        "planned": counts["ok"],
+        "errors": counts["error"],
+        "timeouts": counts["timeout"],
+        "skipped": skipped,
+        "elapsed": elapsed,
+        "plans_per_minute": counts["ok"] / elapsed * 60 if elapsed > 0 else 0.0,
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+    }
+
+
+def format_report(report: Dict[str, float]) -> str:
+    return (
+        f"完了 {report['planned']}件 / エラー {report['errors']}件 / タイムアウト {report['timeouts']}件 "
+        f"/ スキップ {report['skipped']}件\n"
+        f"スループット: {report['plans_per_minute']:.2f} プラン/分 "
+        f"（p50 {report['p50']:.1f}s, p95 {report['p95']:.1f}s, 合計 {report['elapsed']:.1f}s）"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run many weekend plans from a JSONL/CSV file")
+
+    parser.add_argument("input", type=Path, help="入力ファイル (.jsonl または .csv)")
+    parser.add_argument("-o", "--output", type=Path, default=Path("output/batch_results.jsonl"), help="結果を追記する JSONL ファイル")
+    parser.add_argument("--workers", type=int, default=4, help="同時に実行するプラン数")
+    parser.add_argument("--processes", action="store_true", help="スレッドではなくプロセスプールで実行")
+    parser.add_argument("--timeout", type=float, help="1件あたりのタイムアウト(秒)")
+    parser.add_argument("--mode", choices=MODES, default="hierarchical", help="実行モード")
+    parser.add_argument("--no-resume", action="store_true", help="完了済みの記録も含めてすべて再実行")
+    parser.add_argument("--no-cache", action="store_true", help="プランキャッシュとタスクのチェックポイントを使わずに必ずクルーを実行")
+
+    args = parser.parse_args()
+
+    report = run_batch(
+        args.input,
+        args.output,
+        workers=args.workers,
+        processes=args.processes,
+        timeout=args.timeout,
+        mode=args.mode,
+        resume=not args.no_resume,
+        planner=partial(plan, use_cache=not args.no_cache),
+    )
+    print(format_report(report))
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+"""
+Offline job: precompute travel times for popular origin/destination pairs.
+
+Every origin × destination pair of config/travel_index.yaml (or the YAML
+file given with --places) is fetched from the Distance Matrix API for each travel mode and
+time-of-day bucket, and written as a memory-mapped index (see
+tools/travel_index.py) that the Google Maps tools read before calling the
+API. The index answers departures on the same kind of day as --date
+(weekend by default). Run it again to refresh the index; running tools
+pick up the new one.
+"""
+
+import argparse
+import logging
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import yaml
+
+from tools.travel_index import BUCKET_HOURS, FIELDS, bucket_count, day_kind, index_dir, save_index
+
+DEFAULT_PLACES = Path(__file__).parent / "config" / "travel_index.yaml"
+DEFAULT_MODES = ["driving", "transit", "walking"]
+# Hours of the day covered by default; departures outside them go to the API
+DEFAULT_HOURS = (6, 21)
+
+logger = logging.getLogger(__name__)
+
+Fetch = Callable[[List[str], List[str], str, datetime], Dict[Tuple[int, int], dict]]
+
+
+def next_saturday(today: Optional[date] = None) -> date:
+    """The coming Saturday (the Maps API rejects departure times in the past)."""
+    today = today or date.today()
+    return today + timedelta(days=(5 - today.weekday()) % 7 or 7)
+
+
+def bucket_departures(day: date, hours: Tuple[int, int], bucket_hours: int) -> List[Tuple[int, datetime]]:
+    """(bucket, representative departure) of the buckets starting within hours; the middle of each bucket."""
+    start, end = hours
+    return [
+        (bucket, datetime.combine(day, time(bucket * bucket_hours)) + timedelta(hours=bucket_hours / 2))
+        for bucket in range(bucket_count(bucket_hours))
+        if start <= bucket * bucket_hours < end
+    ]
+
+
+def build_index(
+    origins: List[str],
+    destinations: List[str],
+    modes: List[str],
+    day: date,
+    hours: Tuple[int, int] = DEFAULT_HOURS,
+    bucket_hours: int = BUCKET_HOURS,
+    fetch: Optional[Fetch] = None,
+) -> np.ndarray:
+    """
+    Fetch every pair for every mode and bucket; returns the index array.
+
+    Pairs without a route and buckets outside hours stay NaN, so lookups
+    for them miss and fall back to the API. The traffic-aware duration is
+    kept next to the plain one, as the API returns it for driving.
+    """
+    if fetch is None:
+        from tools.google_maps_tool import fetch_matrix_elements as fetch
+
+    departures = bucket_departures(day, hours, bucket_hours)
+    data = np.full((len(modes), bucket_count(bucket_hours), len(origins), len(destinations), FIELDS), np.nan, dtype=np.float32)
+    for m, mode in enumerate(modes):
+        for bucket, departure in departures:
+            logger.info("%s at %s: %d pairs", mode, departure.strftime("%H:%M"), len(origins) * len(destinations))
+            for (i, j), element in fetch(origins, destinations, mode, departure).items():
+                if element.get("status") != "OK":
+                    continue
+                traffic = element.get("duration_in_traffic")
+                data[m, bucket, i, j] = (
+                    element["duration"]["value"],
+                    element["distance"]["value"],
+                    traffic["value"] if traffic else np.nan,
+                )
+    return data
+
+
+def load_places(path: Path) -> Tuple[List[str], List[str]]:
+    """Origins and destinations listed in a YAML file."""
+    with open(path, encoding="utf-8") as f:
+        places = yaml.safe_load(f) or {}
+    return list(places.get("origins") or []), list(places.get("destinations") or [])
+
+
+def parse_hours(value: str) -> Tuple[int, int]:
+    start, _, end = value.partition("-")
+    return int(start), int(end or 24)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute travel times for popular origin/destination pairs")
+
+    parser.add_argument("--places", type=Path, default=DEFAULT_PLACES, help="出発地と目的地を列挙した YAML ファイル")
+    parser.add_argument("--modes", nargs="+", choices=DEFAULT_MODES, default=DEFAULT_MODES, help="移動手段")
+    parser.add_argument("--date", type=date.fromisoformat, default=None, help="計算に使う日付（YYYY-MM-DD、デフォルト: 次の土曜日）")
+    parser.add_argument("--hours", type=parse_hours, default=DEFAULT_HOURS, help="計算する時間帯（例: 6-21）")
+    parser.add_argument("--bucket-hours", type=int, default=BUCKET_HOURS, help="時間帯の幅（時間）")
+    parser.add_argument("-o", "--output", type=Path, default=None, help="索引の出力先ディレクトリ")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    origins, destinations = load_places(args.places)
+    day = args.date or next_saturday()
+    buckets = len(bucket_departures(day, args.hours, args.bucket_hours))
+    print(
+        f"出発地 {len(origins)}件 × 目的地 {len(destinations)}件 × 移動手段 {len(args.modes)}種 × 時間帯 {buckets}件"
+        f"（{day.isoformat()}・{'週末' if day_kind(day) == 'weekend' else '平日'}、計 {len(origins) * len(destinations) * len(args.modes) * buckets}要素）"
+    )
+    data = build_index(origins, destinations, args.modes, day, args.hours, args.bucket_hours)
+    directory = save_index(
+        args.output or index_dir(), data, args.modes, origins, destinations, args.bucket_hours, day.isoformat(),
+    )
+    found = int(np.count_nonzero(~np.isnan(data[..., 0])))
+    print(f"索引を保存しました: {directory}（経路あり {found}要素）")
@@ -0,0 +1,273 @@
+"""
+Per-task output checkpoints for incremental re-planning and resumed runs.
+Every finished task's output is stored under a key made of the inputs its
+prompt actually references (e.g. only {location} and {date} for the
+weather), the outputs of the tasks it depends on, the crew mode and the
+configuration hash. When a user tweaks one input and plans again, every
+task whose key is unchanged is answered from its checkpoint and only the
+affected tail of the pipeline runs.
+
+Each run of main.py also writes a JSON file under its run id with the
+inputs and every completed task, after each task. A run that fails (an LLM
+timeout in the last task, say) continues from there with --resume <run_id>.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from pipeline import TASK_DEPENDENCIES, TASK_TITLES
+from plan_cache import config_hash
+from tools.cache import SQLiteLRUCache, cache_dir, env_seconds, normalize_key
+
+logger = logging.getLogger(__name__)
+
+TASK_CHECKPOINTS_ENABLED = os.getenv("TASK_CHECKPOINTS", "1") != "0"
+TASK_CHECKPOINT_SIZE = int(os.getenv("TASK_CHECKPOINT_SIZE", "2000"))
+# Weather and event listings go stale, like cached plans
+TASK_CHECKPOINT_TTL = env_seconds("TASK_CHECKPOINT_TTL", 6 * 3600)
+
+# Same placeholder syntax as CrewAI's input interpolation
+PLACEHOLDER = re.compile(r"\{([A-Za-z_][A-Za-z0-9_\-]*)\}")
+
+RUN_ID = re.compile(r"^[A-Za-z0-9_\-]+$")
+
+_store: Optional[SQLiteLRUCache] = None
+_store_lock = threading.Lock()
+
+
+def get_checkpoint_store() -> Optional[SQLiteLRUCache]:
+    """
+    Return the process-wide checkpoint store, creating it on first use.
+
+    Returns None when checkpoints are disabled or the cache directory is not writable.
+    """
+    global _store
+    if not TASK_CHECKPOINTS_ENABLED:
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                try:
+                    _store = SQLiteLRUCache(
+                        cache_dir() / "task_checkpoints.sqlite3",
+                        max_entries=TASK_CHECKPOINT_SIZE,
+                        ttl=TASK_CHECKPOINT_TTL,
+                    )
+                except (OSError, sqlite3.Error) as e:
+                    logger.warning("Task checkpoints disabled: %s", e)
+                    return None
+    return _store
+
+
+def referenced_inputs(templates: Iterable[Optional[str]]) -> List[str]:
+    """Names of the {placeholders} used in the given prompt templates, sorted."""
+    names = set()
+    for template in templates:
+        if template:
+            names.update(PLACEHOLDER.findall(template))
+    return sorted(names)
+
+
+def checkpoint_key(name: str, mode: str, inputs: Dict[str, str], upstream: Dict[str, str]) -> str:
+    """
+    Content address of one task run.
+
+    inputs holds only the placeholders the task references and upstream the
+    raw outputs of the tasks it depends on; inputs are normalized like the
+    plan cache keys.
+    """
+    payload = {
+        "task": name,
+        "mode": mode,
+        "inputs": {key: normalize_key(str(value)) for key, value in sorted(inputs.items())},
+        "upstream": upstream,
+        "config": config_hash(),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def runs_dir() -> Path:
+    """
+    Return the directory holding the run files.
+
+    Configurable with WEEKEND_PLANNER_RUNS_DIR (default: runs/ under the
+    cache directory).
+    """
+    return Path(os.getenv("WEEKEND_PLANNER_RUNS_DIR", cache_dir() / "runs")).expanduser()
+
+
+class RunCheckpoint:
+    """
+    Durable record of one crew run: its inputs, mode, status and the output
+    of every task completed so far, rewritten after each task.
+    """
+
+    def __init__(self, run_id: str, inputs: dict, mode: str, tasks: Optional[Dict[str, str]] = None,
+                 status: str = "running", raw: Optional[str] = None, error: Optional[str] = None):
+        self.run_id = run_id
+        self.inputs = inputs
+        self.mode = mode
+        self.tasks: Dict[str, str] = dict(tasks or {})
+        self.status = status
+        self.raw = raw
+        self.error = error
+        self._lock = threading.Lock()
+
+    @property
+    def path(self) -> Path:
+        return runs_dir() / f"{self.run_id}.json"
+
+    @classmethod
+    def create(cls, inputs: dict, mode: str) -> "RunCheckpoint":
+        run_id = f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}"
+        run = cls(run_id, dict(inputs), mode)
+        run.save()
+        return run
+
+    @classmethod
+    def load(cls, run_id: str) -> "RunCheckpoint":
+        """Read a run file; raises ValueError for an unknown or unreadable run id."""
+        path = runs_dir() / f"{run_id}.json"
+        if not RUN_ID.match(run_id) or not path.exists():
+            raise ValueError(f"実行ID {run_id} の記録が見つかりません（{runs_dir()}）")
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as e:
+            raise ValueError(f"実行ID {run_id} の記録を読み込めません: {e}") from e
+        return cls(run_id, data["inputs"], data["mode"], data.get("tasks"), data.get("status", "running"),
+                   data.get("raw"), data.get("error"))
+
+    def save(self) -> None:
+        """Write the run file atomically and flush it to disk."""
+        with self._lock:
+            payload = {
+                "run_id": self.run_id,
+                "inputs": self.inputs,
+                "mode": self.mode,
+                "status": self.status,
+                "tasks": self.tasks,
+                "raw": self.raw,
+                "error": self.error,
+                "updated_at": time.time(),
+            }
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".json.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+
+    def record(self, name: str, raw: str) -> None:
+        """Checkpoint a completed task (called from the task's thread)."""
+        with self._lock:
+            self.tasks[name] = raw
+        self.save()
+
+    def finish(self, raw: str) -> None:
+        self.status, self.raw, self.error = "completed", raw, None
+        self.save()
+
+    def fail(self, error: Exception) -> None:
+        self.status, self.error = "failed", str(error)
+        self.save()
+
+
+class TaskCheckpoints:
+    """
+    Checkpoint state of one planner's crew.
+
+    The planner passes the inputs of each kickoff to start(); its tasks call
+    lookup() before running and save() after. reused lists the tasks of the
+    last kickoff that were answered from a checkpoint. With a run set, every
+    completed task is written to the run file, and the tasks that file
+    already holds (a resumed run) are not run again.
+    """
+
+    def __init__(self, mode: str):
+        self.mode = mode
+        # Switched on per kickoff by plan_weekend(); a bare crew.kickoff() always runs every task
+        self.enabled = False
+        self.inputs: Dict[str, str] = {}
+        self.tasks: Dict[str, object] = {}
+        self.reused: List[str] = []
+        # Set per kickoff by plan_weekend(run=...)
+        self.run: Optional[RunCheckpoint] = None
+
+    def start(self, inputs: dict) -> None:
+        self.inputs = dict(inputs or {})
+        self.reused = []
+        # A reused crew still holds the outputs of its previous kickoff
+        for task in self.tasks.values():
+            task.output = None
+
+    def upstream_tasks(self, name: str) -> List[str]:
+        """Names of the tasks whose outputs reach a task as context."""
+        if self.mode == "hierarchical":
+            # CrewAI passes every earlier task's output, the manager's
+            # coordinate_planning included, to each task of a hierarchical crew
+            names = list(self.tasks)
+            return names[:names.index(name)] if name in names else names
+        return TASK_DEPENDENCIES.get(name, [])
+
+    def key(self, task) -> Optional[str]:
+        """Checkpoint key of a task about to run, or None when it cannot be reused."""
+        agent = getattr(task, "agent", None)
+        templates = [
+            task._original_description or task.description,
+            task._original_expected_output or task.expected_output,
+            task._original_output_file or task.output_file,
+        ]
+        if agent is not None:
+            templates += [
+                agent._original_role or agent.role,
+                agent._original_goal or agent.goal,
+                agent._original_backstory or agent.backstory,
+            ]
+        names = referenced_inputs(templates)
+        if any(name not in self.inputs for name in names):
+            return None
+
+        upstream = {}
+        for dependency in self.upstream_tasks(task.name):
+            output = getattr(self.tasks.get(dependency), "output", None)
+            if output is None:
+                return None
+            upstream[dependency] = output.raw
+        return checkpoint_key(task.name, self.mode, {name: self.inputs[name] for name in names}, upstream)
+
+    def lookup(self, task) -> tuple:
+        """(key, stored raw output or None) of a task about to run."""
+        if self.run is not None and task.name in self.run.tasks:
+            self.reused.append(task.name)
+            return None, self.run.tasks[task.name]
+        store = get_checkpoint_store() if self.enabled else None
+        key = self.key(task) if store is not None else None
+        if key is None:
+            return None, None
+        raw = store.get(key)
+        if raw is not None:
+            self.reused.append(task.name)
+        return key, raw
+
+    def save(self, task, key: Optional[str], raw: str) -> None:
+        store = get_checkpoint_store()
+        if key is not None and store is not None:
+            store.set(key, raw)
+        if self.run is not None:
+            self.run.record(task.name, raw)
+
+    def summary(self) -> str:
+        """One line naming the tasks answered from checkpoints in the last kickoff."""
+        titles = "、".join(TASK_TITLES.get(name, name) for name in self.reused)
+        return f"チェックポイントから再利用したタスク: {titles}"
@@ -1,9 +1,106 @@
+import copy
+import datetime
+import os
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+import yaml
 from crewai import Agent, Crew, Process, Task
-from crewai.project import CrewBase, agent, crew, task
-from crewai_tools import SerperDevTool
-from tools.google_maps_tool import GoogleMapsDirectionsTool, GoogleMapsDistanceMatrixTool
-from tools.openweather_tool import OpenMeteoTool
+from crewai.agents.cache import CacheHandler
+from crewai.project import CrewBase, after_kickoff, agent, before_kickoff, crew, task
+from crewai.tasks.task_output import TaskOutput
+from crewai.utilities.events import TaskCompletedEvent, TaskStartedEvent, crewai_event_bus
+from pydantic import Field
+
+from checkpoints import TaskCheckpoints
+from instrumentation import RunInstrumentation
+from pipeline import MODES, TASK_DEPENDENCIES, dependency_layers
+from timeline import TaskTimeline
+from tools.tool_cache import (
+    TOOL_CACHE_ENABLED,
+    TOOL_CACHE_SCOPE,
+    ToolCallCache,
+    cached_tools,
+    get_process_tool_cache,
+)
+
+# Reuse one planner (and its built crew) per thread and mode across kickoffs; CREW_REUSE=0 builds a new one per plan
+CREW_REUSE = os.getenv("CREW_REUSE", "1") != "0"
+
+_shared = threading.local()
+
+
+@lru_cache(maxsize=32)
+def _parse_yaml(path: str, mtime_ns: int) -> dict:
+    with open(path, "r", encoding="utf-8") as file:
+        return yaml.safe_load(file)
+
+
+def load_config(config_path: Path) -> dict:
+    """
+    Parsed YAML config, memoized per file version.
+
+    CrewBase parses agents.yaml and tasks.yaml in every WeekendPlanner() and
+    then fills in agents and LLMs in place, so each caller gets its own copy
+    of the memoized data. Editing a file (new mtime) reparses it.
+    """
+    config_path = Path(config_path)
+    return copy.deepcopy(_parse_yaml(str(config_path), config_path.stat().st_mtime_ns))
+
+
+class CheckpointedTask(Task):
+    """
+    A task that reuses its checkpointed output when its inputs are unchanged,
+    or the output a resumed run already completed.
 
+    A reused output goes through the same steps as a fresh one (task output,
+    output file, events), so streaming, timelines and instrumentation see
+    the task finish as usual, only without any LLM or tool call.
+    """
+
+    checkpoints: Optional[TaskCheckpoints] = Field(default=None, exclude=True)
+
+    def _execute_core(self, agent, context, tools) -> TaskOutput:
+        if self.checkpoints is None:
+            return super()._execute_core(agent, context, tools)
+        key, raw = self.checkpoints.lookup(self)
+        if raw is not None:
+            output = self._reuse(agent or self.agent, context, raw)
+        else:
+            output = super()._execute_core(agent, context, tools)
+        self.checkpoints.save(self, key, output.raw)
+        return output
+
+    def _reuse(self, agent, context: Optional[str], raw: str) -> TaskOutput:
+        """The tail of Task._execute_core for an output that needs no agent."""
+        self.agent = agent
+        self.start_time = datetime.datetime.now()
+        self.prompt_context = context
+        crewai_event_bus.emit(self, TaskStartedEvent(context=context, task=self))
+        pydantic_output, json_output = self._export_output(raw)
+        task_output = TaskOutput(
+            name=self.name,
+            description=self.description,
+            expected_output=self.expected_output,
+            raw=raw,
+            pydantic=pydantic_output,
+            json_dict=json_output,
+            agent=agent.role,
+            output_format=self._get_output_format(),
+        )
+        self.output = task_output
+        self.end_time = datetime.datetime.now()
+        if self.callback:
+            self.callback(task_output)
+        crew = agent.crew
+        if crew and crew.task_callback and crew.task_callback != self.callback:
+            crew.task_callback(task_output)
+        if self.output_file:
+            self._save_file(json_output or (pydantic_output.model_dump_json() if pydantic_output else raw))
+        crewai_event_bus.emit(self, TaskCompletedEvent(output=task_output, task=self))
+        return task_output
 
 
 @CrewBase
@@ -13,6 +110,28 @@ class WeekendPlanner:
     agents_config = 'config/agents.yaml'
     tasks_config = 'config/tasks.yaml'
 
+    def __init__(self, mode: str = "hierarchical"):
+        """
+        Args:
+            mode: "hierarchical" (the planning manager delegates to the specialists),
+                "sequential" (fast path: the specialist tasks run as a fixed pipeline
+                without the manager) or "parallel" (like sequential, but independent
+                tasks run concurrently). The non-hierarchical modes record a
+                per-task timeline.
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode '{mode}'. Expected one of: {', '.join(MODES)}")
+        self.mode = mode
+        self.timeline = None
+        # Per-task, per-agent and per-tool metrics of the last kickoff
+        self.instrumentation = RunInstrumentation()
+        # Tool results shared by all agents of this planner (or of the whole process)
+        self.tool_cache = None
+        if TOOL_CACHE_ENABLED:
+            self.tool_cache = get_process_tool_cache() if TOOL_CACHE_SCOPE == "process" else ToolCallCache()
+        # Outputs of earlier kickoffs, reused by the tasks whose inputs did not change
+        self.checkpoints = TaskCheckpoints(mode)
+
     @agent
     def planning_manager(self) -> Agent:
         return Agent(
@@ -22,33 +141,38 @@ class WeekendPlanner:
 
     @task
     def coordinate_planning(self) -> Task:
-        return Task(config=self.tasks_config['coordinate_planning'])
+        return CheckpointedTask(config=self.tasks_config['coordinate_planning'], checkpoints=self.checkpoints)
 
     @agent
     def weather_specialist(self) -> Agent:
+        from tools.openweather_tool import OpenMeteoTool
+        from tools.serper import SerperDevTool
+
         return Agent(
             config=self.agents_config['weather_specialist'],
             verbose=True,
-            tools=[OpenMeteoTool(), SerperDevTool()],
+            tools=cached_tools([OpenMeteoTool(), SerperDevTool()], self.tool_cache),
             max_retry_limit=3,
         )
 
     @task
     def fetch_weather(self) -> Task:
-        return Task(config=self.tasks_config['fetch_weather'])
+        return CheckpointedTask(config=self.tasks_config['fetch_weather'], checkpoints=self.checkpoints)
 
     @agent
     def local_scout(self) -> Agent:
+        from tools.serper import SerperDevTool
+
         return Agent(
             config=self.agents_config['local_scout'],
             verbose=True,
-            tools=[SerperDevTool()],
+            tools=cached_tools([SerperDevTool()], self.tool_cache),
             max_retry_limit=3,
         )
 
     @task
     def explore_local_options(self) -> Task:
-        return Task(config=self.tasks_config['explore_local_options'])
+        return CheckpointedTask(config=self.tasks_config['explore_local_options'], checkpoints=self.checkpoints)
 
     @agent
     def recommendation_curator(self) -> Agent:
@@ -59,25 +183,30 @@ class WeekendPlanner:
 
     @task
     def craft_recommendations(self) -> Task:
-        return Task(config=self.tasks_config['craft_recommendations'])
+        return CheckpointedTask(config=self.tasks_config['craft_recommendations'], checkpoints=self.checkpoints)
 
     @agent
     def transport_planner(self) -> Agent:
+        from tools.google_maps_tool import GoogleMapsDirectionsTool, GoogleMapsDistanceMatrixTool
+        from tools.route_optimizer import RouteOptimizerTool
+        from tools.serper import SerperDevTool
+
         return Agent(
             config=self.agents_config['transport_planner'],
             verbose=True,
-            tools=[
+            tools=cached_tools([
                 SerperDevTool(),
                 GoogleMapsDirectionsTool(),
                 GoogleMapsDistanceMatrixTool(),
-            ],
+                RouteOptimizerTool(),
+            ], self.tool_cache),
             max_retry_limit=3,
         )
 
 
     @task
     def plan_transport(self) -> Task:
-        return Task(config=self.tasks_config['plan_transport'])
+        return CheckpointedTask(config=self.tasks_config['plan_transport'], checkpoints=self.checkpoints)
 
     @agent
     def itinerary_designer(self) -> Agent:
@@ -88,29 +217,167 @@ class WeekendPlanner:
 
     @task
     def build_itinerary(self) -> Task:
-        return Task(config=self.tasks_config['build_itinerary'])
+        return CheckpointedTask(config=self.tasks_config['build_itinerary'], checkpoints=self.checkpoints)
 
     @crew
     def crew(self) -> Crew:
         """Creates the Weekend planning crew"""
 
+        if self.mode != "hierarchical":
+            crew = self._pipeline_crew(concurrent=self.mode == "parallel")
+        else:
+            crew = Crew(
+                agents=[
+                    self.weather_specialist(),
+                    self.local_scout(),
+                    self.recommendation_curator(),
+                    self.transport_planner(),
+                    self.itinerary_designer(),
+                ],
+                tasks=[
+                    self.coordinate_planning(),
+                    self.fetch_weather(),
+                    self.explore_local_options(),
+                    self.craft_recommendations(),
+                    self.plan_transport(),
+                    self.build_itinerary(),
+                ],
+                process=Process.hierarchical,
+                manager_agent=self.planning_manager(),
+                verbose=True,
+            )
+
+        self.instrumentation.track(crew)
+        self._crew = crew
+        self._task_agents = [(task, task.agent) for task in crew.tasks]
+        self.checkpoints.tasks = {task.name: task for task in crew.tasks}
+        return crew
+
+    def _pipeline_crew(self, concurrent: bool) -> Crew:
+        """
+        Run the specialist tasks as a dependency graph without the manager.
+
+        Each task receives the outputs it depends on in TASK_DEPENDENCIES as
+        context. With concurrent=True, tasks in the same layer run at the same
+        time (async_execution) and the next layer waits for all of them.
+        """
+        tasks = {name: getattr(self, name)() for name in TASK_DEPENDENCIES}
+        ordered = []
+        for layer in dependency_layers(TASK_DEPENDENCIES):
+            for name in layer:
+                task = tasks[name]
+                task.context = [tasks[dep] for dep in TASK_DEPENDENCIES[name]]
+                task.async_execution = concurrent and len(layer) > 1
+                ordered.append(task)
+
+        # Tracked from start_timeline, so every kickoff of this crew gets a fresh timeline
+        self._pipeline_tasks = tasks
+        self.timeline = TaskTimeline(TASK_DEPENDENCIES)
+
+        agents = []
+        for task in ordered:
+            if task.agent not in agents:
+                agents.append(task.agent)
+
         return Crew(
-            agents=[
-                self.weather_specialist(),
-                self.local_scout(),
-                self.recommendation_curator(),
-                self.transport_planner(),
-                self.itinerary_designer(),
-            ],
-            tasks=[
-                self.coordinate_planning(),
-                self.fetch_weather(),
-                self.explore_local_options(),
-                self.craft_recommendations(),
-                self.plan_transport(),
-                self.build_itinerary(),
-            ],
-            process=Process.hierarchical,
-            manager_agent=self.planning_manager(),
+            agents=agents,
+            tasks=ordered,
+            process=Process.sequential,
             verbose=True,
         )
+
+    @before_kickoff
+    def reset_tool_cache(self, inputs):
+        # A per-run cache starts empty for every kickoff; the process-wide one keeps its entries
+        if self.tool_cache is not None and TOOL_CACHE_SCOPE != "process":
+            self.tool_cache.clear()
+        return inputs
+
+    @before_kickoff
+    def reset_crew_state(self, inputs):
+        """
+        Make a reused crew run like a newly built one.
+
+        CrewAI keeps per-run state on the tasks and agents: a hierarchical run
+        hands every task to the manager, tool-use counters change the prompts
+        (format reminders), retry counters carry over and its own tool cache
+        would answer this request from the previous one.
+        """
+        for task, assigned in self._task_agents:
+            task.agent = assigned
+            task.used_tools = task.tools_errors = task.delegations = task.retry_count = 0
+            task.processed_by_agents = set()
+        handler = CacheHandler() if self._crew.cache else None
+        for crew_agent in [*self._crew.agents, self._crew.manager_agent]:
+            if crew_agent is None:
+                continue
+            crew_agent.tools_results = []
+            crew_agent._times_executed = 0
+            if handler is not None:
+                crew_agent.set_cache_handler(handler)
+        return inputs
+
+    @before_kickoff
+    def start_checkpoints(self, inputs):
+        self.checkpoints.start(inputs)
+        return inputs
+
+    @before_kickoff
+    def start_timeline(self, inputs):
+        if self.timeline is not None:
+            self.timeline = TaskTimeline(TASK_DEPENDENCIES)
+            self.timeline.track(self._pipeline_tasks)
+        return inputs
+
+    @before_kickoff
+    def start_instrumentation(self, inputs):
+        self.instrumentation.start()
+        return inputs
+
+    @after_kickoff
+    def stop_timeline(self, output):
+        if self.timeline is not None:
+            self.timeline.untrack()
+        return output
+
+    @after_kickoff
+    def finish_instrumentation(self, output):
+        self.instrumentation.finish()
+        return output
+
+    @after_kickoff
+    def report_tool_cache(self, output):
+        if self.tool_cache is not None and self.tool_cache.stats():
+            print(self.tool_cache.summary())
+        return output
+
+    @after_kickoff
+    def report_checkpoints(self, output):
+        if self.checkpoints.reused:
+            print(self.checkpoints.summary())
+        return output
+
+
+# CrewBase parses both YAML files in every WeekendPlanner(); serve them from the memo instead
+WeekendPlanner.load_yaml = staticmethod(load_config)
+
+
+def shared_planner(mode: str = "hierarchical") -> WeekendPlanner:
+    """
+    The calling thread's WeekendPlanner for a mode, created on first use.
+
+    The planner builds its crew (agents, tools, tasks) once; every later
+    kickoff reuses it. A crew runs one kickoff at a time, so each thread
+    (a batch worker, a server request thread) gets its own planner.
+    """
+    planners = getattr(_shared, "planners", None)
+    if planners is None:
+        planners = _shared.planners = {}
+    if mode not in planners:
+        planners[mode] = WeekendPlanner(mode=mode)
+    return planners[mode]
+
+
+def get_planner(mode: str = "hierarchical") -> WeekendPlanner:
+    """The planner for one plan: the thread's shared one, or a new one with CREW_REUSE=0."""
+    return shared_planner(mode) if CREW_REUSE else WeekendPlanner(mode=mode)
@@ -0,0 +1,547 @@
+"""
+Run instrumentation for the weekend planning crew.
+Collects the wall time, LLM calls and tokens, tool time, network time,
+retries and cache hits of every task, agent and tool of a crew run from
+CrewAI's event bus and the tool telemetry counters, and exports them as
+JSON or as OpenTelemetry spans.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from crewai import Crew
+from crewai.utilities.events import (
+    LLMCallCompletedEvent,
+    LLMCallFailedEvent,
+    LLMCallStartedEvent,
+    TaskCompletedEvent,
+    TaskFailedEvent,
+    TaskStartedEvent,
+    ToolUsageErrorEvent,
+    ToolUsageFinishedEvent,
+    ToolUsageStartedEvent,
+    crewai_event_bus,
+)
+
+from tools import telemetry
+
+logger = logging.getLogger(__name__)
+
+# Counters kept for every task, agent and tool
+METRICS = (
+    "wall_time",
+    "llm_calls",
+    "llm_time",
+    "prompt_tokens",
+    "completion_tokens",
+    "tool_calls",
+    "tool_time",
+    "network_time",
+    "retries",
+    "cache_hits",
+    "errors",
+)
+TIME_METRICS = ("wall_time", "llm_time", "tool_time", "network_time")
+
+# Task id -> (instrumentation, task name) and agent id -> instrumentation for every tracked run
+_tracked_tasks: Dict[str, Tuple["RunInstrumentation", str]] = {}
+_tracked_agents: Dict[str, "RunInstrumentation"] = {}
+_tracked_lock = threading.Lock()
+_handlers_registered = False
+
+
+def _metrics() -> dict:
+    return {name: 0.0 if name in TIME_METRICS else 0 for name in METRICS}
+
+
+def _rounded(metrics: dict) -> dict:
+    return {name: round(value, 3) if name in TIME_METRICS else value for name, value in metrics.items()}
+
+
+def _role(agent) -> str:
+    return (getattr(agent, "role", None) or "").strip()
+
+
+def _token_usage(agent) -> Tuple[int, int]:
+    """(prompt, completion) tokens the agent's LLM has reported so far."""
+    process = getattr(agent, "_token_process", None)
+    if process is None:
+        return 0, 0
+    summary = process.get_summary()
+    return summary.prompt_tokens, summary.completion_tokens
+
+
+def _lookup(task_id=None, agent_id=None) -> Optional["RunInstrumentation"]:
+    with _tracked_lock:
+        if task_id is not None and str(task_id) in _tracked_tasks:
+            return _tracked_tasks[str(task_id)][0]
+        if agent_id is not None:
+            return _tracked_agents.get(str(agent_id))
+    return None
+
+
+def _register_handlers() -> None:
+    """Register the event bus handlers once per process."""
+    global _handlers_registered
+    with _tracked_lock:
+        if _handlers_registered:
+            return
+        _handlers_registered = True
+
+    def task_entry(source, event):
+        task = event.task or source
+        with _tracked_lock:
+            return _tracked_tasks.get(str(getattr(task, "id", None))), task
+
+    @crewai_event_bus.on(TaskStartedEvent)
+    def on_task_started(source, event):
+        entry, task = task_entry(source, event)
+        if entry:
+            entry[0].record_task_start(entry[1], task.agent)
+
+    @crewai_event_bus.on(TaskCompletedEvent)
+    def on_task_completed(source, event):
+        entry, task = task_entry(source, event)
+        if entry:
+            entry[0].record_task_end(entry[1], task.agent)
+
+    @crewai_event_bus.on(TaskFailedEvent)
+    def on_task_failed(source, event):
+        entry, task = task_entry(source, event)
+        if entry:
+            entry[0].record_task_end(entry[1], task.agent, status="failed")
+
+    @crewai_event_bus.on(LLMCallStartedEvent)
+    def on_llm_started(source, event):
+        run = _lookup(event.task_id, event.agent_id)
+        if run:
+            run.record_llm_start(event.task_id, event.agent_id)
+
+    @crewai_event_bus.on(LLMCallCompletedEvent)
+    def on_llm_completed(source, event):
+        run = _lookup(event.task_id, event.agent_id)
+        if run:
+            run.record_llm_end(event.agent_id, event.model)
+
+    @crewai_event_bus.on(LLMCallFailedEvent)
+    def on_llm_failed(source, event):
+        run = _lookup(event.task_id, event.agent_id)
+        if run:
+            run.record_llm_end(event.agent_id, None, failed=True)
+
+    def tool_call(source, event):
+        # Only the started event carries the agent; the ToolUsage source has both agent and task
+        agent = event.agent or getattr(source, "agent", None)
+        task = getattr(source, "task", None)
+        agent_id = getattr(agent, "id", None)
+        task_id = getattr(task, "id", None)
+        return _lookup(task_id, agent_id), task_id, agent_id
+
+    @crewai_event_bus.on(ToolUsageStartedEvent)
+    def on_tool_started(source, event):
+        run, task_id, agent_id = tool_call(source, event)
+        if run:
+            run.record_tool_start(task_id, agent_id, event.tool_name)
+
+    @crewai_event_bus.on(ToolUsageFinishedEvent)
+    def on_tool_finished(source, event):
+        run, task_id, agent_id = tool_call(source, event)
+        if run:
+            run.record_tool_end(
+                agent_id,
+                retries=max(0, (event.run_attempts or 1) - 1),
+                from_cache=event.from_cache,
+            )
+
+    @crewai_event_bus.on(ToolUsageErrorEvent)
+    def on_tool_error(source, event):
+        run, task_id, agent_id = tool_call(source, event)
+        if run:
+            run.record_tool_end(agent_id, failed=True)
+
+
+class RunInstrumentation:
+    """
+    Metrics of one crew run, per task, per agent and per tool.
+
+    LLM and tool calls are attributed to the task they were made for; calls
+    made by a coworker on behalf of the manager (hierarchical mode) count
+    towards the task the manager was working on. Token counts are taken
+    from each agent's LLM usage reports, so an LLM that does not report
+    usage shows zero tokens. Times are offsets in seconds from start().
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._origin: Optional[float] = None
+        self._origin_ns: Optional[int] = None
+        self._end: Optional[float] = None
+        self._agents: Dict[str, object] = {}
+        self._task_names: Dict[str, str] = {}
+        self._token_base: Dict[str, Tuple[int, int]] = {}
+        self._task_tokens: Dict[str, Dict[str, Tuple[int, int]]] = {}
+        self._running: Dict[str, bool] = {}
+        self._current: Dict[str, str] = {}
+        self._pending: Dict[tuple, dict] = {}
+        self.tasks: Dict[str, dict] = {}
+        self.agents: Dict[str, dict] = {}
+        self.tools: Dict[str, dict] = {}
+        self.calls: List[dict] = []
+
+    def track(self, crew: Crew) -> None:
+        """Start recording the tasks and agents (including the manager) of the crew."""
+        _register_handlers()
+        agents = list(crew.agents)
+        if crew.manager_agent is not None:
+            agents.append(crew.manager_agent)
+        for task in crew.tasks:
+            self._task_names[str(task.id)] = task.name
+        for agent in agents:
+            self._agents[str(agent.id)] = agent
+        self._register()
+
+    def _register(self) -> None:
+        with _tracked_lock:
+            for task_id, name in self._task_names.items():
+                _tracked_tasks[task_id] = (self, name)
+            for agent_id in self._agents:
+                _tracked_agents[agent_id] = self
+
+    def untrack(self) -> None:
+        """Stop recording; the collected metrics are kept."""
+        with _tracked_lock:
+            for task_id in self._task_names:
+                _tracked_tasks.pop(task_id, None)
+            for agent_id in self._agents:
+                _tracked_agents.pop(agent_id, None)
+
+    def start(self) -> None:
+        """
+        Mark the start of the run and take the agents' token baselines.
+
+        The metrics of a previous run are dropped, so a crew that is reused
+        across kickoffs reports each run on its own.
+        """
+        self._register()
+        with self._lock:
+            self._end = None
+            self._task_tokens = {}
+            self._running = {}
+            self._current = {}
+            self._pending = {}
+            self.tasks = {}
+            self.agents = {}
+            self.tools = {}
+            self.calls = []
+            self._origin = time.perf_counter()
+            self._origin_ns = time.time_ns()
+            self._token_base = {agent_id: _token_usage(agent) for agent_id, agent in self._agents.items()}
+
+    def finish(self) -> None:
+        """Mark the end of the run, stop recording and total each agent's tokens."""
+        self.untrack()
+        with self._lock:
+            self._end = self._now()
+            for agent_id, agent in self._agents.items():
+                prompt, completion = _token_usage(agent)
+                base_prompt, base_completion = self._token_base.get(agent_id, (0, 0))
+                metrics = self._metrics_for(self.agents, _role(agent))
+                metrics["prompt_tokens"] = prompt - base_prompt
+                metrics["completion_tokens"] = completion - base_completion
+
+    def _now(self) -> float:
+        now = time.perf_counter()
+        if self._origin is None:
+            self._origin = now
+            self._origin_ns = time.time_ns()
+        return now - self._origin
+
+    @staticmethod
+    def _metrics_for(table: Dict[str, dict], name: str) -> dict:
+        if name not in table:
+            table[name] = _metrics()
+        return table[name]
+
+    def _task_for(self, task_id=None, agent_id=None) -> Optional[str]:
+        """The tracked task a call belongs to (see the class docstring)."""
+        name = self._task_names.get(str(task_id)) if task_id is not None else None
+        if name is None and agent_id is not None:
+            name = self._current.get(str(agent_id))
+        if name is None and len(self._running) == 1:
+            name = next(iter(self._running))
+        return name
+
+    def _add(self, task: Optional[str], agent: Optional[str], tool: Optional[str], **values) -> None:
+        targets = []
+        if task in self.tasks:
+            targets.append(self.tasks[task]["metrics"])
+        if agent:
+            targets.append(self._metrics_for(self.agents, agent))
+        if tool:
+            targets.append(self._metrics_for(self.tools, tool))
+        for metrics in targets:
+            for name, value in values.items():
+                metrics[name] += value
+
+    def record_task_start(self, name: str, agent) -> None:
+        with self._lock:
+            at = self._now()
+            for other in self._running:
+                self._running[other] = True
+            self._running[name] = bool(self._running)
+            if agent is not None:
+                self._current[str(agent.id)] = name
+            self._task_tokens[name] = {agent_id: _token_usage(a) for agent_id, a in self._agents.items()}
+            self.tasks[name] = {
+                "name": name,
+                "agent": _role(agent),
+                "start": at,
+                "end": None,
+                "status": "running",
+                "metrics": _metrics(),
+            }
+
+    def record_task_end(self, name: str, agent, status: str = "completed") -> None:
+        with self._lock:
+            record = self.tasks.get(name)
+            if record is None:
+                return
+            at = self._now()
+            record["end"] = at
+            record["status"] = status
+            record["metrics"]["wall_time"] = at - record["start"]
+            if record["agent"]:
+                self._metrics_for(self.agents, record["agent"])["wall_time"] += at - record["start"]
+
+            # A task that ran alone owns every token spent meanwhile; one that
+            # overlapped with others only owns its own agent's tokens.
+            overlapped = self._running.pop(name, False)
+            if agent is not None and self._current.get(str(agent.id)) == name:
+                del self._current[str(agent.id)]
+            before = self._task_tokens.pop(name, {})
+            if not overlapped:
+                owners = list(before)
+            else:
+                owners = [str(agent.id)] if agent is not None else []
+            for agent_id in owners:
+                if agent_id not in self._agents:
+                    continue
+                prompt, completion = _token_usage(self._agents[agent_id])
+                base_prompt, base_completion = before.get(agent_id, (0, 0))
+                record["metrics"]["prompt_tokens"] += prompt - base_prompt
+                record["metrics"]["completion_tokens"] += completion - base_completion
+
+    def record_llm_start(self, task_id, agent_id) -> None:
+        with self._lock:
+            self._pending[("llm", str(agent_id), threading.get_ident())] = {
+                "start": self._now(),
+                "task": self._task_for(task_id, agent_id),
+            }
+
+    def record_llm_end(self, agent_id, model: Optional[str], failed: bool = False) -> None:
+        with self._lock:
+            at = self._now()
+            pending = self._pending.pop(("llm", str(agent_id), threading.get_ident()), None)
+            if pending is None:
+                pending = {"start": at, "task": self._task_for(agent_id=agent_id)}
+            agent = _role(self._agents.get(str(agent_id)))
+            self._add(pending["task"], agent, None, llm_calls=1, llm_time=at - pending["start"], errors=int(failed))
+            self.calls.append({
+                "kind": "llm",
+                "name": model or "llm",
+                "task": pending["task"],
+                "agent": agent,
+                "start": pending["start"],
+                "end": at,
+                "status": "failed" if failed else "completed",
+            })
+
+    def record_tool_start(self, task_id, agent_id, tool_name: str) -> None:
+        with self._lock:
+            self._pending[("tool", str(agent_id), threading.get_ident())] = {
+                "start": self._now(),
+                "task": self._task_for(task_id, agent_id),
+                "tool": tool_name,
+                "telemetry": telemetry.snapshot(),
+            }
+
+    def record_tool_end(self, agent_id, retries: int = 0, from_cache: bool = False, failed: bool = False) -> None:
+        network, cache_hits = telemetry.snapshot()
+        with self._lock:
+            at = self._now()
+            pending = self._pending.pop(("tool", str(agent_id), threading.get_ident()), None)
+            if pending is None:
+                return
+            network -= pending["telemetry"][0]
+            cache_hits -= pending["telemetry"][1]
+            if from_cache:
+                # Answered by CrewAI's own tool cache; the tool did not run
+                cache_hits += 1
+            agent = _role(self._agents.get(str(agent_id)))
+            self._add(
+                pending["task"],
+                agent,
+                pending["tool"],
+                tool_calls=int(not failed),
+                tool_time=at - pending["start"],
+                network_time=network,
+                retries=retries,
+                cache_hits=cache_hits,
+                errors=int(failed),
+            )
+            self.calls.append({
+                "kind": "tool",
+                "name": pending["tool"],
+                "task": pending["task"],
+                "agent": agent,
+                "start": pending["start"],
+                "end": at,
+                "status": "failed" if failed else "completed",
+                "network_time": network,
+                "cache_hits": cache_hits,
+            })
+
+    def wall_time(self) -> float:
+        """Seconds from start() to finish() (or to the last task end while running)."""
+        if self._end is not None:
+            return self._end
+        ends = [record["end"] for record in self.tasks.values() if record["end"] is not None]
+        return max(ends) if ends else 0.0
+
+    def totals(self) -> dict:
+        """Metrics summed over all agents, with the run's wall time."""
+        with self._lock:
+            totals = _metrics()
+            for metrics in self.agents.values():
+                for name in METRICS:
+                    totals[name] += metrics[name]
+        totals["wall_time"] = self.wall_time()
+        return totals
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            tasks = sorted(self.tasks.values(), key=lambda record: record["start"])
+            tasks = [
+                {
+                    **{key: value for key, value in record.items() if key != "metrics"},
+                    "start": round(record["start"], 3),
+                    "end": None if record["end"] is None else round(record["end"], 3),
+                    **_rounded(record["metrics"]),
+                }
+                for record in tasks
+            ]
+            agents = {name: _rounded(metrics) for name, metrics in self.agents.items()}
+            tools = {name: _rounded(metrics) for name, metrics in self.tools.items()}
+            calls = [
+                {key: round(value, 3) if isinstance(value, float) else value for key, value in call.items()}
+                for call in self.calls
+            ]
+        return {
+            "totals": _rounded(self.totals()),
+            "tasks": tasks,
+            "agents": agents,
+            "tools": tools,
+            "calls": calls,
+        }
+
+    def write_json(self, path, timeline=None) -> Path:
+        """
+        Write to_dict() as a JSON trace file and return its path.
+
+        A TaskTimeline (see timeline.py) adds the run's task spans and
+        critical path under "timeline".
+        """
+        data = self.to_dict()
+        if timeline is not None:
+            data["timeline"] = timeline.to_dict()
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+        return path
+
+    def summary(self) -> str:
+        """Markdown table with one row per task, followed by the run totals."""
+        lines = [
+            "| タスク | エージェント | 所要 | LLM呼出 | トークン(入/出) | ツール呼出 | ツール時間 | 通信時間 | リトライ | キャッシュヒット |",
+            "|--------|--------------|------|---------|-----------------|------------|------------|----------|----------|------------------|",
+        ]
+        data = self.to_dict()
+        for record in data["tasks"] + [{"name": "合計", "agent": "", **data["totals"]}]:
+            lines.append(
+                f"| {record['name']} | {record['agent']} | {record['wall_time']:.1f}s | {record['llm_calls']} "
+                f"| {record['prompt_tokens']}/{record['completion_tokens']} | {record['tool_calls']} "
+                f"| {record['tool_time']:.1f}s | {record['network_time']:.1f}s | {record['retries']} | {record['cache_hits']} |"
+            )
+        return "\n".join(lines)
+
+    def export_otel(self, endpoint: Optional[str] = None, exporter=None) -> bool:
+        """
+        Send the run as OpenTelemetry spans: one span for the run, one per task
+        and one per LLM or tool call.
+
+        Uses the OTLP/HTTP exporter (endpoint defaults to the standard
+        OTEL_EXPORTER_OTLP_* settings, i.e. a collector on localhost:4318)
+        unless an exporter is given. Returns False when the OpenTelemetry SDK
+        is not installed.
+        """
+        try:
+            from opentelemetry import trace
+            from opentelemetry.sdk.resources import Resource
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+            if exporter is None:
+                from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+                exporter = OTLPSpanExporter(endpoint=endpoint) if endpoint else OTLPSpanExporter()
+        except ImportError as e:
+            logger.warning("OpenTelemetry export skipped: %s", e)
+            return False
+
+        data = self.to_dict()
+        origin_ns = self._origin_ns or time.time_ns()
+        run_end = data["totals"]["wall_time"]
+
+        def ns(offset: Optional[float]) -> int:
+            return origin_ns + int((run_end if offset is None else offset) * 1e9)
+
+        def attributes(record: dict) -> dict:
+            return {f"planner.{name}": record[name] for name in METRICS if name in record}
+
+        provider = TracerProvider(resource=Resource.create({
+            "service.name": os.getenv("OTEL_SERVICE_NAME", "weekend-planner"),
+        }))
+        provider.add_span_processor(SimpleSpanProcessor(exporter))
+        tracer = provider.get_tracer(__name__)
+
+        root = tracer.start_span("weekend_plan", start_time=ns(0.0), attributes=attributes(data["totals"]))
+        task_spans = {}
+        for record in data["tasks"]:
+            span = tracer.start_span(
+                f"task {record['name']}",
+                context=trace.set_span_in_context(root),
+                start_time=ns(record["start"]),
+                attributes={**attributes(record), "planner.agent": record["agent"], "planner.status": record["status"]},
+            )
+            task_spans[record["name"]] = (span, record["end"])
+        for call in data["calls"]:
+            parent = task_spans.get(call["task"], (root,))[0]
+            span = tracer.start_span(
+                f"{call['kind']} {call['name']}",
+                context=trace.set_span_in_context(parent),
+                start_time=ns(call["start"]),
+                attributes={
+                    "planner.agent": call["agent"],
+                    "planner.status": call["status"],
+                    **{f"planner.{key}": call[key] for key in ("network_time", "cache_hits") if key in call},
+                },
+            )
+            span.end(end_time=ns(call["end"]))
+        for span, end in task_spans.values():
+            span.end(end_time=ns(end))
+        root.end(end_time=ns(run_end))
+        provider.shutdown()
+        return True
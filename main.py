@@ -1,15 +1,117 @@
 #!/usr/bin/env python
 import argparse
 import warnings
+from contextlib import nullcontext
 from datetime import datetime
+from typing import TYPE_CHECKING, Callable, Optional
 
-from crew import WeekendPlanner
+import plan_cache
+from pipeline import MODES
+
+if TYPE_CHECKING:
+    from checkpoints import RunCheckpoint
+    from crew import WeekendPlanner
 
 warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
 
+# Inputs used when an argument (or a batch record field) is not given; the date defaults to today
+DEFAULT_INPUTS = {
+    'location': "東京23区",
+    'interests': "カフェ巡りと美術館、夜はライブハウス",
+    'budget': "1人あたり1.5万円以内",
+    'companions': "友人2人",
+    'home': "東京駅",
+    'departure_time': "09:00",
+    'return_time': "18:00",
+}
+
+
+def default_date() -> str:
+    return datetime.now().strftime("%Y年%m月%d日")
+
+
+def plan_weekend(inputs: dict, mode: str = "hierarchical", use_cache: bool = True, planner: Optional["WeekendPlanner"] = None, on_task: Optional[Callable[[str, str, float], None]] = None, run: Optional["RunCheckpoint"] = None) -> str:
+    """
+    Run the crew for one set of inputs and return the raw plan.
+
+    Identical requests are answered from the plan cache (see plan_cache.py)
+    and a request that changes only some inputs reruns only the tasks that
+    depend on them (see checkpoints.py), unless use_cache is False. Pass a
+    planner to read its instrumentation after the run; by default the
+    thread's shared planner for the mode is reused (see crew.get_planner),
+    so its crew is only built once. on_task is called with (task name,
+    output, seconds) as soon as each task finishes (see streaming.py); a
+    cached plan has no task outputs. With a run, every completed task is
+    written to its run file and the tasks it already holds are not rerun.
+    The weather and geocoding requests the crew will make are started in
+    the background before it is built (see tools/prefetch.py).
+    """
+    if use_cache:
+        cached = plan_cache.lookup(inputs, mode)
+        if cached is not None:
+            if run is not None:
+                run.finish(cached)
+            return cached
+    return _run_crew(inputs, mode, use_cache, planner, on_task, run)
+
+
+def _run_crew(inputs: dict, mode: str, use_cache: bool, planner: Optional["WeekendPlanner"], on_task: Optional[Callable[[str, str, float], None]], run: Optional["RunCheckpoint"]) -> str:
+    """plan_weekend() after a plan cache miss: build (or reuse) the crew and kick it off."""
+    # The weather and geocoding the crew will ask for are fetched while it starts up
+    from tools.prefetch import start_prefetch
+
+    prefetch = start_prefetch(inputs)
+    try:
+        # crewai is only imported once a crew actually has to run
+        from crew import get_planner
+
+        planner = planner or get_planner(mode)
+        crew = planner.crew()
+        # Tasks whose inputs are unchanged since an earlier plan reuse their checkpointed output
+        planner.checkpoints.enabled = use_cache
+        planner.checkpoints.run = run
+        if on_task is None:
+            result = crew.kickoff(inputs=inputs)
+        else:
+            from streaming import TaskOutputs
+
+            with TaskOutputs(on_task).tracking(crew):
+                result = crew.kickoff(inputs=inputs)
+    except Exception as e:
+        if run is not None:
+            run.fail(e)
+        raise
+    finally:
+        if planner is not None:
+            planner.checkpoints.run = None
+        if prefetch is not None:
+            prefetch.close()
+    if run is not None:
+        run.finish(result.raw)
+    if use_cache:
+        plan_cache.store(inputs, mode, result.raw, crew.tasks[-1].output_file)
+    return result.raw
 
-def run_weekend(location: str, interests: str, budget: str, companions: str, date: str, home: str, departure_time: str, return_time: str):
-    """Run the weekend planning crew."""
+
+def run_weekend(location: str, interests: str, budget: str, companions: str, date: str, home: str, departure_time: str, return_time: str, mode: str = "hierarchical", use_cache: bool = True, breakdown: bool = False, trace_path: Optional[str] = None, otlp: bool = False, stream: bool = False, resume: Optional[str] = None):
+    """
+    Run the weekend planning crew.
+
+    mode selects the crew variant (see WeekendPlanner): "hierarchical" (default),
+    "sequential" for the fast path without the planning manager, or "parallel".
+    use_cache=False bypasses the plan cache. breakdown prints the per-task
+    metrics of the run and, outside hierarchical mode, the task timeline with
+    its critical path (see timeline.py); trace_path writes them as a JSON
+    trace file and otlp sends the metrics as OpenTelemetry spans (see
+    instrumentation.py). stream prints
+    each task's output as soon as the task finishes instead of only the
+    final plan. Returns the raw text of the final plan.
+
+    Every run gets a run id and a run file holding each completed task (see
+    checkpoints.RunCheckpoint). resume continues the run with that id: its
+    stored inputs and mode replace the arguments and only the tasks it had
+    not completed are run.
+    """
     inputs = {
         'location': location,
         'interests': interests,
@@ -21,11 +123,68 @@ def run_weekend(location: str, interests: str, budget: str, companions: str, dat
         'return_time': return_time,
     }
 
+    from checkpoints import RunCheckpoint
+
+    if resume:
+        run = RunCheckpoint.load(resume)
+        inputs, mode = run.inputs, run.mode
+        if run.status == "completed":
+            print(run.raw)
+            return run.raw
+        print(f"実行ID {run.run_id} を再開します（完了済みのタスク {len(run.tasks)}件）")
+    else:
+        try:
+            run = RunCheckpoint.create(inputs, mode)
+            print(f"実行ID: {run.run_id}")
+        except OSError as e:
+            # Planning does not depend on the run file; only --resume does
+            warnings.warn(f"Run checkpoints disabled: {e}")
+            run = None
+
+    streamed = []
+    on_task = None
+    if stream:
+        from streaming import format_task_output
+
+        def on_task(name: str, output: str, elapsed: float) -> None:
+            streamed.append(name)
+            print(format_task_output(name, output, elapsed), flush=True)
+
     try:
-        result = WeekendPlanner().crew().kickoff(inputs=inputs)
-        print(result.raw)
+        # A cached plan is printed without importing crewai at all
+        cached = plan_cache.lookup(inputs, mode) if use_cache else None
+        if cached is not None:
+            if run is not None:
+                run.finish(cached)
+            print(cached)
+            if breakdown or trace_path or otlp:
+                print("プランキャッシュから返したため、計測結果はありません")
+            return cached
+
+        # The prefetch starts before crewai is imported and the crew is built
+        raw = _run_crew(inputs, mode, use_cache, None, on_task, run)
+        if not streamed:
+            print(raw)
     except Exception as e:
-        raise Exception(f"An error occurred while running the weekend planner: {e}") from e
+        hint = f" (continue with: python main.py --resume {run.run_id})" if run is not None else ""
+        raise Exception(f"An error occurred while running the weekend planner: {e}{hint}") from e
+
+    from crew import get_planner
+
+    # The thread's shared planner that _run_crew just used
+    planner = get_planner(mode)
+    instrumentation = planner.instrumentation
+    # Only the sequential and parallel pipelines record a timeline
+    timeline = planner.timeline
+    if breakdown:
+        print(instrumentation.summary())
+        if timeline is not None:
+            print(timeline.summary())
+    if trace_path:
+        print(f"トレースを保存しました: {instrumentation.write_json(trace_path, timeline)}")
+    if otlp:
+        instrumentation.export_otel()
+    return raw
 
 
 if __name__ == "__main__":
@@ -39,16 +198,44 @@ if __name__ == "__main__":
     parser.add_argument("--home", type=str, help="自宅住所 (e.g., 東京駅)")
     parser.add_argument("--departure-time", type=str, help="出発時間 (e.g., 09:00)")
     parser.add_argument("--return-time", type=str, help="帰宅希望時間 (e.g., 18:00)")
+    parser.add_argument("--mode", choices=MODES, default="hierarchical", help="実行モード (sequential はマネージャーを介さない高速版)")
+    parser.add_argument("--no-cache", action="store_true", help="プランキャッシュとタスクのチェックポイントを使わずに必ずクルーを実行")
+    parser.add_argument("--breakdown", action="store_true", help="タスクごとの所要時間・トークン・ツール呼び出しと、クリティカルパスを表示")
+    parser.add_argument("--trace", type=str, help="計測結果を書き出す JSON トレースファイル")
+    parser.add_argument("--otlp", action="store_true", help="計測結果を OpenTelemetry スパンとしてコレクターへ送信")
+    parser.add_argument("--stream", action="store_true", help="タスクが終わるたびにその結果を表示（天気 → 候補 → 交通 → しおり）")
+    parser.add_argument("--resume", type=str, metavar="RUN_ID", help="失敗した実行を完了済みのタスクの続きから再開（入力とモードは記録から復元）")
+    cassette_group = parser.add_mutually_exclusive_group()
+    cassette_group.add_argument("--record", type=str, metavar="CASSETTE", help="LLM・外部 API の通信を記録する JSON ファイル")
+    cassette_group.add_argument("--replay", type=str, metavar="CASSETTE", help="記録済みの通信を再生し、ネットワークを使わずに実行")
 
     args = parser.parse_args()
 
-    run_weekend(
-        location=args.location or "東京23区",
-        interests=args.interests or "カフェ巡りと美術館、夜はライブハウス",
-        budget=args.budget or "1人あたり1.5万円以内",
-        companions=args.companions or "友人2人",
-        date=args.date or datetime.now().strftime("%Y年%m月%d日"),
-        home=args.home or "東京駅",
-        departure_time=args.departure_time or "09:00",
-        return_time=args.return_time or "18:00",
-    )
+    if args.record or args.replay:
+        from replay import Cassette
+
+    if args.record:
+        cassette = Cassette(args.record, mode="record")
+    elif args.replay:
+        cassette = Cassette(args.replay, mode="replay")
+    else:
+        cassette = nullcontext()
+
+    with cassette:
+        run_weekend(
+            location=args.location or DEFAULT_INPUTS['location'],
+            interests=args.interests or DEFAULT_INPUTS['interests'],
+            budget=args.budget or DEFAULT_INPUTS['budget'],
+            companions=args.companions or DEFAULT_INPUTS['companions'],
+            date=args.date or default_date(),
+            home=args.home or DEFAULT_INPUTS['home'],
+            departure_time=args.departure_time or DEFAULT_INPUTS['departure_time'],
+            return_time=args.return_time or DEFAULT_INPUTS['return_time'],
+            mode=args.mode,
+            use_cache=not args.no_cache,
+            breakdown=args.breakdown,
+            trace_path=args.trace,
+            otlp=args.otlp,
+            stream=args.stream,
+            resume=args.resume,
+        )
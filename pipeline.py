@@ -0,0 +1,48 @@
+"""
+Shape of the planning pipeline: the execution modes and the task graph.
+
+Kept free of crewai imports so the CLI, the batch runner and the plan cache
+can validate arguments before the crew (and its dependencies) is loaded.
+"""
+
+# Execution modes accepted by WeekendPlanner
+MODES = ("hierarchical", "sequential", "parallel")
+
+# Which task outputs each specialist task needs; used by the non-hierarchical modes
+TASK_DEPENDENCIES = {
+    "fetch_weather": [],
+    "explore_local_options": [],
+    "craft_recommendations": ["fetch_weather", "explore_local_options"],
+    "plan_transport": ["craft_recommendations"],
+    "build_itinerary": ["fetch_weather", "craft_recommendations", "plan_transport"],
+}
+
+# Headings of the task outputs when they are streamed (see streaming.py)
+TASK_TITLES = {
+    "coordinate_planning": "全体の調整",
+    "fetch_weather": "天気予報",
+    "explore_local_options": "イベント・スポット候補",
+    "craft_recommendations": "おすすめプラン",
+    "plan_transport": "交通手段",
+    "build_itinerary": "しおり",
+}
+
+
+def dependency_layers(dependencies: dict) -> list:
+    """
+    Group tasks into layers that can run concurrently.
+
+    Each layer only depends on tasks in earlier layers; the order of tasks
+    within a layer follows the dependency mapping.
+    """
+    layers = []
+    done = set()
+    remaining = list(dependencies)
+    while remaining:
+        layer = [name for name in remaining if all(dep in done for dep in dependencies[name])]
+        if not layer:
+            raise ValueError(f"Task dependencies contain a cycle: {remaining}")
+        layers.append(layer)
+        done.update(layer)
+        remaining = [name for name in remaining if name not in done]
+    return layers
@@ -0,0 +1,114 @@
+"""
+Plan-level result cache.
+Stores the final plan (and the itinerary file) of a crew run under a key
+derived from the normalized inputs, the crew mode and a hash of the agent
+and task configuration, so identical requests skip the crew entirely.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional
+
+from tools.cache import SQLiteLRUCache, cache_dir, env_seconds, normalize_key
+
+logger = logging.getLogger(__name__)
+
+PLAN_CACHE_ENABLED = os.getenv("PLAN_CACHE", "1") != "0"
+PLAN_CACHE_SIZE = int(os.getenv("PLAN_CACHE_SIZE", "500"))
+PLAN_CACHE_TTL = env_seconds("PLAN_CACHE_TTL", 6 * 3600)
+
+CONFIG_FILES = ("config/agents.yaml", "config/tasks.yaml")
+BASE_DIR = Path(__file__).parent
+
+_plan_cache: Optional[SQLiteLRUCache] = None
+_plan_cache_lock = threading.Lock()
+
+
+def get_plan_cache() -> Optional[SQLiteLRUCache]:
+    """
+    Return the process-wide plan cache, creating it on first use.
+
+    Returns None when caching is disabled or the cache directory is not writable.
+    """
+    global _plan_cache
+    if not PLAN_CACHE_ENABLED:
+        return None
+    if _plan_cache is None:
+        with _plan_cache_lock:
+            if _plan_cache is None:
+                try:
+                    _plan_cache = SQLiteLRUCache(
+                        cache_dir() / "plans.sqlite3",
+                        max_entries=PLAN_CACHE_SIZE,
+                        ttl=PLAN_CACHE_TTL,
+                    )
+                except (OSError, sqlite3.Error) as e:
+                    logger.warning("Plan cache disabled: %s", e)
+                    return None
+    return _plan_cache
+
+
+def config_hash() -> str:
+    """Hash of the agent and task configuration; editing either invalidates all plans."""
+    digest = hashlib.sha256()
+    for name in CONFIG_FILES:
+        digest.update(name.encode("utf-8"))
+        digest.update((BASE_DIR / name).read_bytes())
+    return digest.hexdigest()
+
+
+def plan_cache_key(inputs: dict, mode: str) -> str:
+    """Content address of a plan request: normalized inputs, mode and config hash."""
+    payload = {
+        "inputs": {name: normalize_key(str(value)) for name, value in sorted(inputs.items())},
+        "mode": mode,
+        "config": config_hash(),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def lookup(inputs: dict, mode: str) -> Optional[str]:
+    """
+    Return the cached raw plan for these inputs, or None on a miss.
+
+    The cached itinerary file is written back to its original path, so a hit
+    leaves the same files behind as a real run.
+    """
+    cache = get_plan_cache()
+    if cache is None:
+        return None
+    entry = cache.get(plan_cache_key(inputs, mode))
+    if entry is None:
+        return None
+
+    if entry.get("itinerary_path") and entry.get("itinerary") is not None:
+        path = Path(entry["itinerary_path"])
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(entry["itinerary"], encoding="utf-8")
+        except OSError as e:
+            logger.warning("Could not restore cached itinerary %s: %s", path, e)
+    return entry["raw"]
+
+
+def store(inputs: dict, mode: str, raw: str, itinerary_path: Optional[str] = None) -> None:
+    """Cache a finished plan together with the contents of its itinerary file."""
+    cache = get_plan_cache()
+    if cache is None:
+        return
+    itinerary = None
+    if itinerary_path:
+        try:
+            itinerary = Path(itinerary_path).read_text(encoding="utf-8")
+        except OSError:
+            itinerary_path = None
+    cache.set(plan_cache_key(inputs, mode), {
+        "raw": raw,
+        "itinerary_path": itinerary_path,
+        "itinerary": itinerary,
+    })
@@ -0,0 +1,257 @@
+"""
+Record/replay of the crew's HTTP traffic.
+
+A Cassette patches the requests and httpx transports, which carry every
+outbound call of a crew run: the LLM provider (litellm/OpenAI over httpx),
+Serper and Google Maps (requests) and Open-Meteo (requests and httpx). In
+"record" mode requests go to the network and the responses are saved to a
+JSON file; in "replay" mode they are answered from that file, so complete
+WeekendPlanner runs can be repeated deterministically without a network.
+"""
+
+import base64
+import hashlib
+import json
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+CASSETTE_MODES = ("record", "replay")
+
+# Query parameters and JSON body fields that change between runs without changing
+# the answer (API keys, departure times derived from the current date)
+VOLATILE_PARAMS = ("key", "departure_time", "arrival_time")
+
+# Hosts that are never recorded: CrewAI telemetry and local collectors/servers
+PASSTHROUGH_HOSTS = ("telemetry.crewai.com", "localhost", "127.0.0.1")
+
+# Response headers that describe the original transfer rather than the body
+DROPPED_HEADERS = ("content-encoding", "content-length", "transfer-encoding", "connection", "set-cookie")
+
+# upstream(method, url, headers, body) -> (status, headers, content)
+Upstream = Callable[[str, str, Dict[str, str], bytes], Tuple[int, Dict[str, str], bytes]]
+
+
+class CassetteMiss(Exception):
+    """A request in replay mode that has no recorded response."""
+
+
+def normalize_url(url: str) -> str:
+    """URL with volatile query parameters removed and the rest sorted."""
+    parts = urlsplit(url)
+    query = sorted((name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+                   if name not in VOLATILE_PARAMS)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ""))
+
+
+def body_digest(body: Optional[bytes]) -> str:
+    """Hash of a request body; JSON bodies are compared field by field."""
+    if not body:
+        return ""
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return hashlib.sha256(body).hexdigest()
+    if isinstance(payload, dict):
+        payload = {name: value for name, value in payload.items() if name not in VOLATILE_PARAMS}
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """
+    Recorded HTTP interactions of one or more crew runs.
+
+    Requests are matched on method, normalized URL and body. When strict is
+    False, a request whose body has no exact match (e.g. an LLM prompt that
+    embeds a tool result containing today's date) gets the next unused
+    response recorded for the same method and URL, in recording order.
+
+    Use as a context manager; the transports are patched for the whole
+    process while it is active and a recording is saved on exit.
+    """
+
+    def __init__(self, path, mode: str = "replay", strict: bool = False, upstream: Optional[Upstream] = None):
+        """
+        Args:
+            path: JSON file holding the interactions
+            mode: "record" (go to the network and save) or "replay" (never touch the network)
+            strict: Disable the same-URL fallback of replay mode
+            upstream: Replaces the real network in record mode (used by tests)
+        """
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Unknown cassette mode '{mode}'. Expected one of: {', '.join(CASSETTE_MODES)}")
+        self.path = Path(path)
+        self.mode = mode
+        self.strict = strict
+        self.upstream = upstream
+        self.interactions: List[dict] = []
+        self.stats = {"recorded": 0, "hits": 0, "fallbacks": 0, "misses": 0}
+        self.missed: List[str] = []
+        self._used: set = set()
+        self._lock = threading.Lock()
+        self._patches: list = []
+        if mode == "replay":
+            self.interactions = json.loads(self.path.read_text(encoding="utf-8"))["interactions"]
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"version": 1, "interactions": self.interactions}
+        self.path.write_text(json.dumps(payload, ensure_ascii=False, indent=1), encoding="utf-8")
+
+    def _find(self, route: str, digest: str) -> Optional[dict]:
+        candidates = [(i, entry) for i, entry in enumerate(self.interactions) if entry["route"] == route]
+        for check_digest in (True, False):
+            if not check_digest and self.strict:
+                break
+            matches = [(i, entry) for i, entry in candidates if not check_digest or entry["body"] == digest]
+            for i, entry in matches:
+                if i not in self._used:
+                    self._used.add(i)
+                    self.stats["hits" if check_digest else "fallbacks"] += 1
+                    return entry
+            if check_digest and matches:
+                # Repeated identical request: answer it like the last one
+                self.stats["hits"] += 1
+                return matches[-1][1]
+        return None
+
+    def passthrough(self, url: str) -> bool:
+        """Requests to these hosts go to the network in both modes and are not recorded."""
+        return urlsplit(url).hostname in PASSTHROUGH_HOSTS
+
+    def replay(self, method: str, url: str, body: Optional[bytes]) -> Tuple[int, Dict[str, str], bytes]:
+        """The recorded (status, headers, content) for a request; raises CassetteMiss."""
+        route = f"{method.upper()} {normalize_url(url)}"
+        with self._lock:
+            entry = self._find(route, body_digest(body))
+            if entry is None:
+                self.stats["misses"] += 1
+                self.missed.append(route)
+                raise CassetteMiss(f"No recorded response for {route}")
+        content = base64.b64decode(entry["content_b64"]) if "content_b64" in entry else entry["content"].encode("utf-8")
+        return entry["status"], dict(entry["headers"]), content
+
+    def record(self, method: str, url: str, body: Optional[bytes], status: int, headers: Dict[str, str], content: bytes) -> None:
+        entry = {
+            "route": f"{method.upper()} {normalize_url(url)}",
+            "body": body_digest(body),
+            "status": status,
+            "headers": _replay_headers(headers),
+        }
+        try:
+            entry["content"] = content.decode("utf-8")
+        except UnicodeDecodeError:
+            entry["content_b64"] = base64.b64encode(content).decode("ascii")
+        with self._lock:
+            self.interactions.append(entry)
+            self.stats["recorded"] += 1
+
+    def __enter__(self) -> "Cassette":
+        self._install()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        for owner, name, original in reversed(self._patches):
+            setattr(owner, name, original)
+        self._patches = []
+        if self.mode == "record":
+            self.save()
+
+    def _install(self) -> None:
+        cassette = self
+        requests_send = HTTPAdapter.send
+        httpx_send = httpx.HTTPTransport.handle_request
+        httpx_async_send = httpx.AsyncHTTPTransport.handle_async_request
+
+        def send_requests(adapter, request, **kwargs):
+            if cassette.passthrough(request.url):
+                return requests_send(adapter, request, **kwargs)
+            body = request.body.encode("utf-8") if isinstance(request.body, str) else request.body
+            if cassette.mode == "replay":
+                try:
+                    status, headers, content = cassette.replay(request.method, request.url, body)
+                except CassetteMiss as e:
+                    raise requests.ConnectionError(str(e), request=request) from e
+            elif cassette.upstream is not None:
+                status, headers, content = cassette.upstream(request.method, request.url, dict(request.headers), body)
+                cassette.record(request.method, request.url, body, status, headers, content)
+            else:
+                real = requests_send(adapter, request, **kwargs)
+                status, headers, content = real.status_code, dict(real.headers), real.content
+                cassette.record(request.method, request.url, body, status, headers, content)
+
+            response = requests.Response()
+            response.status_code = status
+            response.headers = CaseInsensitiveDict(_replay_headers(headers))
+            response._content = content
+            response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+            response.url = request.url
+            response.request = request
+            response.connection = adapter
+            return response
+
+        def respond_httpx(request, send):
+            """Shared part of the sync and async httpx transports; send is None in replay mode."""
+            url = str(request.url)
+            if cassette.mode == "replay":
+                try:
+                    status, headers, content = cassette.replay(request.method, url, request.content)
+                except CassetteMiss as e:
+                    raise httpx.ConnectError(str(e), request=request) from e
+            else:
+                status, headers, content = send
+                cassette.record(request.method, url, request.content, status, headers, content)
+            return httpx.Response(status, headers=_replay_headers(headers), content=content, request=request)
+
+        def upstream_httpx(request):
+            return cassette.upstream(request.method, str(request.url), dict(request.headers), request.content)
+
+        def send_httpx(transport, request):
+            if cassette.passthrough(str(request.url)):
+                return httpx_send(transport, request)
+            request.read()
+            fetched = None
+            if cassette.mode == "record":
+                if cassette.upstream is not None:
+                    fetched = upstream_httpx(request)
+                else:
+                    real = httpx_send(transport, request)
+                    real.read()
+                    fetched = (real.status_code, dict(real.headers), real.content)
+            return respond_httpx(request, fetched)
+
+        async def send_httpx_async(transport, request):
+            if cassette.passthrough(str(request.url)):
+                return await httpx_async_send(transport, request)
+            await request.aread()
+            fetched = None
+            if cassette.mode == "record":
+                if cassette.upstream is not None:
+                    fetched = upstream_httpx(request)
+                else:
+                    real = await httpx_async_send(transport, request)
+                    await real.aread()
+                    fetched = (real.status_code, dict(real.headers), real.content)
+            return respond_httpx(request, fetched)
+
+        for owner, name, replacement in (
+            (HTTPAdapter, "send", send_requests),
+            (httpx.HTTPTransport, "handle_request", send_httpx),
+            (httpx.AsyncHTTPTransport, "handle_async_request", send_httpx_async),
+        ):
+            self._patches.append((owner, name, getattr(owner, name)))
+            setattr(owner, name, replacement)
+
+
+def _replay_headers(headers: Dict[str, str]) -> Dict[str, str]:
+    """Headers for a rebuilt response whose body is already decoded."""
+    return {name: value for name, value in headers.items() if name.lower() not in DROPPED_HEADERS}
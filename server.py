@@ -0,0 +1,381 @@
+#!/usr/bin/env python
+"""
+Planning service: a long-running HTTP server with warm crews.
+
+Each worker thread keeps its WeekendPlanner crews between requests (see
+crew.shared_planner) and the process keeps the tool clients and caches, so
+a plan no longer pays for the imports and the crew construction of a fresh
+`python main.py`. Requests wait in a bounded queue; when it is full the
+server answers 429 instead of accepting more work than it can finish.
+
+    POST /plans              submit a plan (run_weekend fields plus optional "mode");
+                             202 with the job, the finished job with ?wait=1, or
+                             its events with ?stream=1
+    GET  /plans/<id>         job status, the task outputs so far and the plan
+    GET  /plans/<id>/events  server-sent events: one per finished task, then done/error
+    GET  /health             queue and worker counts
+"""
+
+import argparse
+import json
+import logging
+import math
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from batch import plan, record_inputs
+from pipeline import MODES
+from streaming import task_event
+from tools.prefetch import prefetch_stats
+from tools.rate_limit import limiter_stats
+from tools.travel_index import travel_index_stats
+
+logger = logging.getLogger(__name__)
+
+# Finished jobs kept for polling; the oldest are dropped first
+JOB_HISTORY = 1000
+
+# Seconds a ?wait=1 request waits before it is answered with 202 and the job id
+SYNC_TIMEOUT = 900
+
+# Seconds between keep-alive comments on an event stream without news
+KEEPALIVE_SECONDS = 15
+
+
+class QueueFull(Exception):
+    """The request queue is at capacity; the client should retry later."""
+
+
+class Job:
+    """One planning request and its outcome."""
+
+    def __init__(self, inputs: dict, mode: str):
+        self.id = uuid.uuid4().hex
+        self.inputs = inputs
+        self.mode = mode
+        self.status = "queued"
+        self.raw: Optional[str] = None
+        self.error: Optional[str] = None
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.done = threading.Event()
+        # Task outputs as they finish, then the final done/error event
+        self.events: List[dict] = []
+        self._changed = threading.Condition()
+
+    def add_event(self, event: dict) -> None:
+        with self._changed:
+            self.events.append(event)
+            self._changed.notify_all()
+
+    def events_after(self, index: int, timeout: Optional[float] = None) -> List[dict]:
+        """Events from index on, waiting up to timeout seconds for the first one."""
+        with self._changed:
+            self._changed.wait_for(lambda: len(self.events) > index, timeout)
+            return self.events[index:]
+
+    def run(self, planner: Callable[..., str]) -> None:
+        self.started = time.time()
+        self.status = "running"
+        try:
+            self.raw = planner(self.inputs, self.mode, on_task=lambda *output: self.add_event(task_event(*output)))
+            self.status = "done"
+        except Exception as e:
+            logger.exception("Plan %s failed", self.id)
+            self.error = str(e)
+            self.status = "error"
+        finally:
+            self.finished = time.time()
+            final = self.to_dict()
+            del final["tasks"]
+            self.add_event({"event": self.status, **final})
+            self.done.set()
+
+    def to_dict(self) -> dict:
+        payload = {
+            "id": self.id,
+            "status": self.status,
+            "mode": self.mode,
+            "inputs": self.inputs,
+            "queued_seconds": round((self.started or time.time()) - self.created, 3),
+        }
+        if self.started is not None:
+            payload["run_seconds"] = round((self.finished or time.time()) - self.started, 3)
+        payload["tasks"] = [event for event in list(self.events) if event["event"] == "task"]
+        if self.status == "done":
+            payload["raw"] = self.raw
+        if self.status == "error":
+            payload["error"] = self.error
+        return payload
+
+
+class PlanningService:
+    """
+    A fixed pool of worker threads planning from a bounded queue.
+
+    The workers reuse one crew per mode (plan_weekend's shared planner);
+    with warm=True each of them builds the crew for the default mode when
+    it starts, so the first request does not pay for it either.
+    """
+
+    def __init__(
+        self,
+        workers: int = 4,
+        queue_size: int = 32,
+        mode: str = "hierarchical",
+        use_cache: bool = True,
+        warm: bool = True,
+        planner: Optional[Callable[..., str]] = None,
+    ):
+        """
+        Args:
+            workers: Number of plans running at the same time
+            queue_size: Requests waiting for a worker before new ones get QueueFull
+            mode: Crew mode of requests that do not name one
+            use_cache: Answer identical requests from the plan cache
+            warm: Build each worker's crew before the first request
+            planner: Function running one plan, called as planner(inputs, mode, on_task=callback)
+                (see plan_weekend); defaults to batch.plan
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode '{mode}'. Expected one of: {', '.join(MODES)}")
+        self.workers = workers
+        self.mode = mode
+        self.warm = warm and planner is None
+        self.planner = planner or partial(plan, use_cache=use_cache)
+        self._queue: "queue.Queue[Optional[Job]]" = queue.Queue(maxsize=queue_size)
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._running = 0
+        self._durations: list = []
+        self._threads: list = []
+
+    def start(self) -> "PlanningService":
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"planner-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self) -> None:
+        """Let the workers finish the queued jobs, then end them."""
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _warm_up(self) -> None:
+        from crew import shared_planner
+
+        try:
+            shared_planner(self.mode).crew()
+        except Exception:
+            logger.exception("Building the %s crew failed; it is retried with the first request", self.mode)
+
+    def _work(self) -> None:
+        if self.warm:
+            self._warm_up()
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            with self._lock:
+                self._running += 1
+            try:
+                job.run(self.planner)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._durations = (self._durations + [job.finished - job.started])[-50:]
+
+    def submit(self, inputs: dict, mode: Optional[str] = None) -> Job:
+        """Queue a plan; raises QueueFull when no more requests can wait."""
+        job = Job(inputs, mode or self.mode)
+        with self._lock:
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                raise QueueFull(f"{self._queue.maxsize} requests are already waiting") from None
+            self._jobs[job.id] = job
+            finished = [job_id for job_id, old in self._jobs.items() if old.done.is_set()]
+            for job_id in finished[:max(0, len(self._jobs) - JOB_HISTORY)]:
+                del self._jobs[job_id]
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def retry_after(self) -> int:
+        """Seconds until a queue slot is likely to free up (for Retry-After)."""
+        with self._lock:
+            average = sum(self._durations) / len(self._durations) if self._durations else 5.0
+        return max(1, math.ceil(average / self.workers))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "running": self._running,
+                "queued": self._queue.qsize(),
+                "queue_size": self._queue.maxsize,
+            }
+
+
+class PlanningRequestHandler(BaseHTTPRequestHandler):
+    """JSON API of a PlanningService (self.server.service)."""
+
+    def log_message(self, format, *args):
+        logger.info("%s - %s", self.address_string(), format % args)
+
+    def send_json(self, status: int, payload: dict, headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_job(self, job: Job, status: Optional[int] = None) -> None:
+        if status is None:
+            status = {"done": 200, "error": 500}.get(job.status, 202)
+        self.send_json(status, job.to_dict(), {"Location": f"/plans/{job.id}"})
+
+    def send_events(self, job: Job) -> None:
+        """Stream the job's events (past and future) until it finishes."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Location", f"/plans/{job.id}")
+        self.end_headers()
+        index = 0
+        try:
+            while True:
+                events = job.events_after(index, KEEPALIVE_SECONDS)
+                if not events:
+                    self.wfile.write(b": keep-alive\n\n")
+                for event in events:
+                    data = json.dumps({name: value for name, value in event.items() if name != "event"}, ensure_ascii=False)
+                    self.wfile.write(f"event: {event['event']}\ndata: {data}\n\n".encode("utf-8"))
+                self.wfile.flush()
+                index += len(events)
+                if events and events[-1]["event"] in ("done", "error"):
+                    return
+        except (BrokenPipeError, ConnectionResetError):
+            logger.info("Client left the event stream of plan %s", job.id)
+
+    def do_GET(self):
+        service = self.server.service
+        path = urlsplit(self.path).path
+        if path == "/health":
+            self.send_json(200, {
+                "status": "ok",
+                **service.stats(),
+                "rate_limits": limiter_stats(),
+                "travel_index": travel_index_stats(),
+                "prefetch": prefetch_stats(),
+            })
+        elif path.startswith("/plans/"):
+            job_id, _, action = path[len("/plans/"):].partition("/")
+            job = service.get(job_id)
+            if job is None or action not in ("", "events"):
+                self.send_json(404, {"error": "指定されたジョブが見つかりません"})
+            elif action == "events":
+                self.send_events(job)
+            else:
+                self.send_job(job, status=200)
+        else:
+            self.send_json(404, {"error": f"{path} は存在しません"})
+
+    def do_POST(self):
+        service = self.server.service
+        url = urlsplit(self.path)
+        if url.path != "/plans":
+            self.send_json(404, {"error": f"{url.path} は存在しません"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self.send_json(400, {"error": "リクエスト本文が JSON ではありません"})
+            return
+        if not isinstance(body, dict):
+            self.send_json(400, {"error": "リクエスト本文は JSON オブジェクトにしてください"})
+            return
+        mode = body.get("mode") or service.mode
+        if mode not in MODES:
+            self.send_json(400, {"error": f"mode は {', '.join(MODES)} のいずれかにしてください"})
+            return
+
+        query = parse_qs(url.query)
+        wait = query.get("wait", ["0"])[0] not in ("0", "false") or bool(body.get("wait"))
+        try:
+            timeout = float(query.get("timeout", [SYNC_TIMEOUT])[0])
+        except ValueError:
+            self.send_json(400, {"error": "timeout は秒数で指定してください"})
+            return
+
+        try:
+            job = service.submit(record_inputs(body), mode)
+        except QueueFull as e:
+            self.send_json(429, {"error": f"混雑しています（{e}）"}, {"Retry-After": str(service.retry_after())})
+            return
+
+        if query.get("stream", ["0"])[0] not in ("0", "false") or body.get("stream"):
+            self.send_events(job)
+            return
+        if wait:
+            job.done.wait(timeout)
+        self.send_job(job)
+
+
+class PlanningServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, service: PlanningService):
+        super().__init__(address, PlanningRequestHandler)
+        self.service = service
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve weekend plans over HTTP with warm crews")
+
+    parser.add_argument("--host", default="127.0.0.1", help="待ち受けるアドレス")
+    parser.add_argument("--port", type=int, default=8000, help="待ち受けるポート")
+    parser.add_argument("--workers", type=int, default=4, help="同時に実行するプラン数")
+    parser.add_argument("--queue-size", type=int, default=32, help="実行待ちにできるリクエスト数（超えると 429）")
+    parser.add_argument("--mode", choices=MODES, default="hierarchical", help="mode を指定しないリクエストの実行モード")
+    parser.add_argument("--no-cache", action="store_true", help="プランキャッシュを使わずに必ずクルーを実行")
+    parser.add_argument("--no-warm", action="store_true", help="起動時にクルーを構築しない")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    service = PlanningService(
+        workers=args.workers,
+        queue_size=args.queue_size,
+        mode=args.mode,
+        use_cache=not args.no_cache,
+        warm=not args.no_warm,
+    ).start()
+    server = PlanningServer((args.host, args.port), service)
+    print(f"プランニングサービスを起動しました: http://{args.host}:{server.server_port} （ワーカー {args.workers}、待ち行列 {args.queue_size}）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
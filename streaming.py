@@ -0,0 +1,122 @@
+"""
+Task outputs of a crew run, delivered while the crew is still running.
+
+TaskOutputs listens to CrewAI's event bus and hands every task's output to
+a callback as soon as the task finishes (weather, candidates, transport,
+itinerary), instead of waiting for kickoff() to return. stream_weekend()
+wraps plan_weekend() in a generator of those events; the CLI (--stream) and
+the planning server (server-sent events) are built on top of it.
+"""
+
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional, Tuple
+
+from pipeline import TASK_TITLES
+
+if TYPE_CHECKING:
+    from crewai import Crew
+
+# Task id -> (listener, task name) for every task currently being streamed
+_tracked: Dict[str, Tuple["TaskOutputs", str]] = {}
+_tracked_lock = threading.Lock()
+_handlers_registered = False
+
+# callback(task_name, raw_output, seconds_since_kickoff)
+TaskCallback = Callable[[str, str, float], None]
+
+
+def _register_handlers() -> None:
+    """Register the event bus handler once per process."""
+    global _handlers_registered
+    with _tracked_lock:
+        if _handlers_registered:
+            return
+        _handlers_registered = True
+
+    # Imported here so the server and the CLI can format events without loading crewai
+    from crewai.utilities.events import TaskCompletedEvent, crewai_event_bus
+
+    @crewai_event_bus.on(TaskCompletedEvent)
+    def on_task_completed(source, event):
+        task = event.task or source
+        with _tracked_lock:
+            entry = _tracked.get(str(getattr(task, "id", None)))
+        if entry:
+            entry[0].emit(entry[1], event.output.raw)
+
+
+class TaskOutputs:
+    """Calls a callback with the output of each task of a crew as it finishes."""
+
+    def __init__(self, callback: TaskCallback):
+        self.callback = callback
+        self._task_ids: List[str] = []
+        self._origin = time.perf_counter()
+
+    def emit(self, name: str, raw: str) -> None:
+        self.callback(name, raw, time.perf_counter() - self._origin)
+
+    @contextmanager
+    def tracking(self, crew: "Crew") -> Iterator["TaskOutputs"]:
+        """Deliver the outputs of the crew's tasks while the block runs."""
+        _register_handlers()
+        self._origin = time.perf_counter()
+        with _tracked_lock:
+            for task in crew.tasks:
+                _tracked[str(task.id)] = (self, task.name)
+                self._task_ids.append(str(task.id))
+        try:
+            yield self
+        finally:
+            with _tracked_lock:
+                for task_id in self._task_ids:
+                    _tracked.pop(task_id, None)
+            self._task_ids = []
+
+
+def task_event(name: str, raw: str, elapsed: float) -> dict:
+    """The stream event of one finished task."""
+    return {"event": "task", "task": name, "title": TASK_TITLES.get(name, name), "raw": raw, "elapsed": round(elapsed, 3)}
+
+
+def stream_weekend(inputs: dict, mode: str = "hierarchical", use_cache: bool = True) -> Iterator[dict]:
+    """
+    Plan in a background thread and yield events as they happen.
+
+    Yields {"event": "task", ...} for each finished task (see task_event),
+    then {"event": "done", "raw": plan} or {"event": "error", "error": message}.
+    A plan served from the plan cache yields only the "done" event. The crew
+    is the calling thread's shared planner (see crew.get_planner), so
+    consume one stream at a time per thread.
+    """
+    from crew import get_planner
+    from main import plan_weekend
+
+    planner = get_planner(mode)
+    events: "queue.Queue[dict]" = queue.Queue()
+    start = time.perf_counter()
+
+    def run() -> None:
+        try:
+            raw = plan_weekend(inputs, mode=mode, use_cache=use_cache, planner=planner,
+                               on_task=lambda *output: events.put(task_event(*output)))
+            events.put({"event": "done", "raw": raw, "elapsed": round(time.perf_counter() - start, 3)})
+        except Exception as e:
+            events.put({"event": "error", "error": str(e), "elapsed": round(time.perf_counter() - start, 3)})
+
+    threading.Thread(target=run, name="weekend-stream", daemon=True).start()
+    while True:
+        event = events.get()
+        yield event
+        if event["event"] in ("done", "error"):
+            return
+
+
+def format_task_output(name: str, raw: str, elapsed: Optional[float] = None) -> str:
+    """Markdown section printed for a finished task in streaming mode."""
+    title = TASK_TITLES.get(name, name)
+    suffix = f" （{elapsed:.1f}s）" if elapsed is not None else ""
+    return f"## {title}{suffix}\n\n{raw.strip()}\n"
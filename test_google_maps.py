@@ -1,6 +1,12 @@
-"""Test script for Google Maps tools."""
+"""Test script for Google Maps tools.
+
+Calls the live API. Set GOOGLE_MAPS_CASSETTE to a file path to record the
+responses there on the first run and replay them offline afterwards.
+"""
 
 import os
+from contextlib import nullcontext
+from replay import Cassette
 from tools.google_maps_tool import GoogleMapsDirectionsTool, GoogleMapsDistanceMatrixTool
 
 
@@ -55,6 +61,13 @@ def test_directions_driving():
 
 
 if __name__ == "__main__":
+    cassette_path = os.getenv("GOOGLE_MAPS_CASSETTE")
+    replaying = bool(cassette_path) and os.path.exists(cassette_path)
+    if replaying:
+        # The key is only checked by the tools; replayed requests never reach the API
+        os.environ.setdefault("GOOGLE_MAPS_API_KEY", "AIza-replay")
+        print(f"✓ Replaying {cassette_path}")
+
     # Check if API key is set
     api_key = os.getenv("GOOGLE_MAPS_API_KEY")
     if not api_key:
@@ -65,11 +78,17 @@ if __name__ == "__main__":
     print("✓ Google Maps API Key detected")
     print()
     
+    if cassette_path:
+        cassette = Cassette(cassette_path, mode="replay" if replaying else "record")
+    else:
+        cassette = nullcontext()
+
     # Run tests
     try:
-        test_distance_matrix()
-        test_directions_transit()
-        test_directions_driving()
+        with cassette:
+            test_distance_matrix()
+            test_directions_transit()
+            test_directions_driving()
         
         print("=" * 60)
         print("✓ All tests completed successfully!")
@@ -0,0 +1,139 @@
+"""
+A fake of every upstream API the crew talks to, for recording cassettes offline.
+
+fake_upstream() has the replay.Upstream signature. The LLM endpoint answers
+in CrewAI's ReAct format: an agent that has tools calls one of them once
+(the manager delegates once) and then gives a final answer, so a recorded
+run exercises the LLM, Open-Meteo, Serper and Google Maps traffic.
+"""
+
+import json
+import re
+from pathlib import Path
+from urllib.parse import urlsplit
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+# Environment needed for the crew to reach the (faked) APIs
+FAKE_ENV = {
+    "OPENAI_API_KEY": "sk-test",
+    "SERPER_API_KEY": "serper-test",
+    "GOOGLE_MAPS_API_KEY": "AIza-test-key",
+    "CREWAI_DISABLE_TELEMETRY": "true",
+    "OTEL_SDK_DISABLED": "true",
+}
+
+# Tool the fake LLM picks when an agent has several, with the input it sends
+ACTIONS = [
+    ("天気予報取得", {"location": "東京", "date": "2025-11-22"}),
+    ("Google Maps経路検索", {"origin": "東京駅", "destination": "上野駅", "mode": "transit"}),
+    ("Search the internet with Serper", {"search_query": "東京 週末 イベント"}),
+]
+
+ROUTE = {
+    "summary": "",
+    "legs": [{
+        "duration": {"text": "8分", "value": 480},
+        "distance": {"text": "3.6 km", "value": 3600},
+        "steps": [{
+            "travel_mode": "TRANSIT",
+            "duration": {"text": "8分"},
+            "distance": {"text": "3.6 km"},
+            "fare": {"value": 160},
+            "transit_details": {
+                "line": {"name": "JR山手線", "short_name": "山手線", "vehicle": {"name": "電車"}},
+                "departure_stop": {"name": "東京"},
+                "arrival_stop": {"name": "上野"},
+                "num_stops": 4,
+            },
+        }],
+    }],
+}
+
+
+def _json(payload, status=200):
+    return status, {"Content-Type": "application/json"}, json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+
+def _chat_answer(messages):
+    prompt = "\n".join(str(message.get("content", "")) for message in messages)
+    if any(message.get("role") == "assistant" for message in messages):
+        return "Thought: 集めた情報で十分です\nFinal Answer: 東京で過ごす週末のプランです。"
+
+    coworkers = re.search(r"Delegate a specific task to one of the following coworkers: (.+)", prompt)
+    if coworkers:
+        coworker = coworkers.group(1).split(",")[0].strip()
+        action, action_input = "Delegate work to coworker", {
+            "task": "担当部分を調査してください", "context": "週末のお出かけプラン", "coworker": coworker,
+        }
+    else:
+        tools = set(re.findall(r"Tool Name: (.+)", prompt))
+        choice = next(((name, args) for name, args in ACTIONS if name in tools), None)
+        if choice is None:
+            return "Thought: 手元の情報でまとめます\nFinal Answer: 東京で過ごす週末のプランです。"
+        action, action_input = choice
+    return (
+        "Thought: ツールで確認します\n"
+        f"Action: {action}\n"
+        f"Action Input: {json.dumps(action_input, ensure_ascii=False)}"
+    )
+
+
+def fake_upstream(method, url, headers, body):
+    parts = urlsplit(url)
+    host, path = parts.hostname, parts.path
+
+    if host == "api.openai.com" and path.endswith("/chat/completions"):
+        request = json.loads(body)
+        content = _chat_answer(request["messages"])
+        prompt_tokens = sum(len(str(message.get("content", ""))) for message in request["messages"]) // 4
+        return _json({
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": 0,
+            "model": request.get("model", "gpt-4o-mini"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": len(content) // 4,
+                "total_tokens": prompt_tokens + len(content) // 4,
+            },
+        })
+    if host == "google.serper.dev":
+        query = json.loads(body).get("q", "")
+        return _json({
+            "searchParameters": {"q": query},
+            "organic": [
+                {"title": "東京のおすすめイベント", "link": "https://example.com/events", "snippet": f"{query} の検索結果", "position": 1},
+            ],
+        })
+    if host == "geocoding-api.open-meteo.com":
+        return _json(json.loads((FIXTURES / "open_meteo_geocode_tokyo.json").read_text(encoding="utf-8")))
+    if host == "api.open-meteo.com":
+        return _json(json.loads((FIXTURES / "open_meteo_forecast_tokyo.json").read_text(encoding="utf-8")))
+    if host == "maps.googleapis.com" and "directions" in path:
+        return _json({"status": "OK", "routes": [ROUTE]})
+    if host == "maps.googleapis.com" and "distancematrix" in path:
+        return _json({
+            "status": "OK",
+            "rows": [{"elements": [{"status": "OK", "duration": {"text": "8分"}, "distance": {"text": "3.6 km"}}]}],
+        })
+    return _json({"error": f"unexpected request {method} {url}"}, status=404)
+
+
+def reset_tool_caches():
+    """
+    Drop the in-process tool caches, the plan cache, the task checkpoint
+    store and pending prefetches so the next run starts cold; the on-disk
+    tiers are reopened under the current WEEKEND_PLANNER_CACHE_DIR.
+    """
+    import checkpoints
+    import plan_cache
+    from tools import google_maps_tool, openweather_tool, prefetch
+
+    checkpoints._store = None
+    plan_cache._plan_cache = None
+    google_maps_tool._directions_caches.clear()
+    openweather_tool._geocode_cache = None
+    openweather_tool._forecast_cache = None
+    prefetch.reset_prefetch()
@@ -0,0 +1,165 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import asyncio
+import gc
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+# Add project root to sys.path to allow imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tools import async_support, openweather_tool
+from tools.cache import MemoryLRUCache, SQLiteLRUCache, TieredCache
+from tools.google_maps_client import get_client_stats, reset_clients
+from tools.google_maps_tool import GoogleMapsDistanceMatrixTool
+from tools.openweather_tool import OpenMeteoTool
+from tools.rate_limit import get_limiter
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def load_fixture(name):
+    with open(FIXTURES / name, encoding="utf-8") as f:
+        return json.load(f)
+
+
+class MockTransportMixin:
+    """Route the shared async client through an httpx.MockTransport handler."""
+
+    def install_transport(self, handler):
+        def make_client(**kwargs):
+            return real_client(transport=httpx.MockTransport(handler), **kwargs)
+
+        real_client = httpx.AsyncClient
+        patcher = patch.object(async_support.httpx, "AsyncClient", side_effect=make_client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class TestOpenMeteoToolAsync(MockTransportMixin, unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        geocode_cache = SQLiteLRUCache(Path(self.tmp.name) / "geocode.sqlite3")
+        self.addCleanup(geocode_cache.close)
+        for name, value in (
+            ("_geocode_cache", geocode_cache),
+            ("_forecast_cache", TieredCache(MemoryLRUCache(ttl=3600))),
+        ):
+            patcher = patch.object(openweather_tool, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.forecast_requests = []
+        self.status_code = 200
+
+        def handler(request):
+            if self.status_code != 200:
+                return httpx.Response(self.status_code)
+            if "geocoding" in request.url.host:
+                return httpx.Response(200, json=load_fixture("open_meteo_geocode_tokyo.json"))
+            self.forecast_requests.append(request.url.params)
+            payload = load_fixture("open_meteo_forecast_tokyo.json")
+            cells = request.url.params["latitude"].split(",")
+            return httpx.Response(200, json=payload if len(cells) == 1 else [payload] * len(cells))
+
+        self.install_transport(handler)
+
+    def test_arun_matches_sync_report(self):
+        tool = OpenMeteoTool()
+        async_result = asyncio.run(tool._arun("東京", "2025-11-22"))
+
+        with patch("tools.openweather_tool.requests.get") as mock_get:
+            sync_result = tool._run("東京", "2025-11-22")  # served from the caches
+            mock_get.assert_not_called()
+
+        self.assertEqual(async_result, sync_result)
+        self.assertEqual(len(self.forecast_requests), 1)
+
+    def test_arun_batch_uses_one_forecast_request(self):
+        tool = OpenMeteoTool()
+        result = asyncio.run(tool._arun(locations=["東京", "新宿"], date="2025-11-22"))
+
+        self.assertEqual(len(self.forecast_requests), 1)
+        self.assertIn("| 東京 | 11-22 |", result)
+        self.assertIn("| 新宿 | 11-22 |", result)
+
+    def test_http_error_is_reported(self):
+        self.status_code = 503
+        # The 503 is retried before it is reported; skip the backoff
+        with patch.object(get_limiter("open_meteo"), "backoff_base", 0):
+            result = asyncio.run(OpenMeteoTool()._arun("東京", "2025-11-22"))
+        self.assertTrue(result.startswith("エラー: 天気情報の取得に失敗しました。"))
+
+
+@patch.dict(os.environ, {"GOOGLE_MAPS_API_KEY": "AIza-test-key"})
+class TestGoogleMapsToolAsync(MockTransportMixin, unittest.TestCase):
+
+    def test_matrix_requests_overlap(self):
+        """The per-mode requests of _arun are in flight at the same time."""
+        delay = 0.1
+
+        async def handler(request):
+            await asyncio.sleep(delay)
+            origins = request.url.params["origins"].split("|")
+            destinations = request.url.params["destinations"].split("|")
+            return httpx.Response(200, json={
+                "status": "OK",
+                "rows": [
+                    {"elements": [
+                        {"status": "OK", "duration": {"text": "10分"}, "distance": {"text": "1 km"}}
+                        for _ in destinations
+                    ]}
+                    for _ in origins
+                ],
+            })
+
+        self.install_transport(handler)
+        tool = GoogleMapsDistanceMatrixTool()
+
+        async def run():
+            structured = tool.to_structured_tool()
+            return await structured.ainvoke({"origin": "東京駅", "destinations": ["横浜駅", "渋谷駅"]})
+
+        # A full collection of the suite's heap would otherwise land inside the timed window
+        gc.collect()
+        start = time.perf_counter()
+        result = asyncio.run(run())
+        elapsed = time.perf_counter() - start
+
+        self.assertIn("| 東京駅 | 渋谷駅 | 10分 / 1 km |", result)
+        self.assertLess(elapsed, delay * 2)
+
+    def test_latency_excludes_the_rate_limit_backoff(self):
+        """Only the HTTP attempts are timed, as in the sync call_api."""
+        backoff = 0.3
+        throttled = []
+
+        async def handler(request):
+            if not throttled:
+                throttled.append(request)
+                return httpx.Response(429, headers={"Retry-After": str(backoff)})
+            return httpx.Response(200, json={
+                "status": "OK",
+                "rows": [{"elements": [{"status": "OK", "duration": {"text": "25分"}, "distance": {"text": "9 km"}}]}],
+            })
+
+        self.install_transport(handler)
+        reset_clients()
+        self.addCleanup(reset_clients)
+        result = asyncio.run(GoogleMapsDistanceMatrixTool()._arun(origin="品川駅", destination="中野駅"))
+
+        self.assertIn("25分 / 9 km", result)
+        stats = get_client_stats()["endpoints"]["distance_matrix"]
+        self.assertEqual(stats["errors"], 1)
+        self.assertLess(stats["max_ms"], backoff * 1000)
+
+if __name__ == '__main__':
+    unittest.main()
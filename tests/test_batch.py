@@ -0,0 +1,118 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add project root to sys.path to allow imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from batch import read_records, run_batch
+
+
+def read_results(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dir = Path(self.tmp.name)
+        self.input = self.dir / "requests.jsonl"
+        self.output = self.dir / "results.jsonl"
+        records = [{"id": f"user-{i}", "location": f"エリア{i}", "date": "2025年11月22日"} for i in range(6)]
+        self.input.write_text("\n".join(json.dumps(r, ensure_ascii=False) for r in records), encoding="utf-8")
+
+    def test_results_are_streamed_and_reported(self):
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def planner(inputs, mode):
+            with lock:
+                active.append(1)
+                peak.append(len(active))
+            time.sleep(0.05)
+            with lock:
+                active.pop()
+            return f"{inputs['location']}のプラン"
+
+        report = run_batch(self.input, self.output, workers=3, planner=planner)
+
+        results = read_results(self.output)
+        self.assertEqual(report["planned"], 6)
+        self.assertEqual(len(results), 6)
+        self.assertEqual(max(peak), 3)
+        self.assertEqual({r["raw"] for r in results}, {f"エリア{i}のプラン" for i in range(6)})
+        self.assertEqual(results[0]["inputs"]["home"], "東京駅")  # filled from the defaults
+        self.assertGreater(report["plans_per_minute"], 0)
+        self.assertGreaterEqual(report["p95"], report["p50"])
+
+    def test_resume_skips_completed_records(self):
+        def flaky(inputs, mode):
+            if inputs["location"] == "エリア2":
+                raise RuntimeError("LLM error")
+            return "ok"
+
+        first = run_batch(self.input, self.output, workers=2, planner=flaky)
+        self.assertEqual((first["planned"], first["errors"]), (5, 1))
+
+        calls = []
+
+        def planner(inputs, mode):
+            calls.append(inputs["location"])
+            return "ok"
+
+        second = run_batch(self.input, self.output, workers=2, planner=planner)
+        self.assertEqual(calls, ["エリア2"])
+        self.assertEqual(second["skipped"], 5)
+
+    def test_slow_record_times_out(self):
+        def planner(inputs, mode):
+            time.sleep(0.5 if inputs["location"] == "エリア0" else 0.01)
+            return "ok"
+
+        report = run_batch(self.input, self.output, workers=2, timeout=0.2, planner=planner)
+
+        statuses = {r["id"]: r["status"] for r in read_results(self.output)}
+        self.assertEqual(statuses["user-0"], "timeout")
+        self.assertEqual(report["timeouts"], 1)
+        self.assertEqual(report["planned"], 5)
+
+    def test_hung_workers_keep_their_slots(self):
+        """Records queued behind hung crews are timed from their own start."""
+        started = []
+
+        def planner(inputs, mode):
+            started.append(inputs["location"])
+            time.sleep(0.6 if inputs["location"] in ("エリア0", "エリア1") else 0.01)
+            return "ok"
+
+        report = run_batch(self.input, self.output, workers=2, timeout=0.2, planner=planner)
+
+        statuses = {r["id"]: r["status"] for r in read_results(self.output)}
+        self.assertEqual([rid for rid, status in statuses.items() if status == "timeout"], ["user-0", "user-1"])
+        self.assertEqual(report["planned"], 4)
+        # No record was handed to the pool while both workers were still busy
+        self.assertEqual(started[:2], ["エリア0", "エリア1"])
+        self.assertTrue(all(r["latency"] < 0.2 for r in read_results(self.output) if r["status"] == "ok"))
+
+    def test_csv_records_get_stable_ids(self):
+        path = self.dir / "requests.csv"
+        path.write_text("location,budget\n横浜,1万円\n鎌倉,\n", encoding="utf-8")
+
+        first = list(read_records(path))
+        second = list(read_records(path))
+        self.assertEqual([rid for rid, _ in first], [rid for rid, _ in second])
+        self.assertEqual(first[0][1]["budget"], "1万円")
+        self.assertEqual(first[1][1]["budget"], "1人あたり1.5万円以内")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,197 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import json
+import re
+import tempfile
+
+# Add project root to sys.path to allow imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from checkpoints import RunCheckpoint, checkpoint_key, referenced_inputs, runs_dir
+from crew import get_planner
+from main import plan_weekend, run_weekend
+from pipeline import TASK_DEPENDENCIES
+from replay import Cassette
+from tests.fake_upstream import FAKE_ENV, fake_upstream, reset_tool_caches
+
+INPUTS = {
+    'location': "鎌倉",
+    'interests': "寺社巡りと海辺の散歩",
+    'budget': "1人8000円",
+    'companions': "友人1人",
+    'date': "2025年11月29日",
+    'home': "東京駅",
+    'departure_time': "09:00",
+    'return_time': "18:00",
+}
+
+
+class TestCheckpointKeys(unittest.TestCase):
+
+    def test_referenced_inputs(self):
+        self.assertEqual(referenced_inputs(["{location}の{date}の天気", None, "output/{date}.md"]), ["date", "location"])
+
+    def test_key_depends_on_inputs_and_upstream_outputs(self):
+        key = checkpoint_key("craft_recommendations", "sequential", {"date": "11月29日"}, {"fetch_weather": "晴れ"})
+        self.assertEqual(key, checkpoint_key("craft_recommendations", "sequential", {"date": " 11月29日"}, {"fetch_weather": "晴れ"}))
+        self.assertNotEqual(key, checkpoint_key("craft_recommendations", "sequential", {"date": "11月30日"}, {"fetch_weather": "晴れ"}))
+        self.assertNotEqual(key, checkpoint_key("craft_recommendations", "sequential", {"date": "11月29日"}, {"fetch_weather": "雨"}))
+        self.assertNotEqual(key, checkpoint_key("craft_recommendations", "parallel", {"date": "11月29日"}, {"fetch_weather": "晴れ"}))
+
+
+class TestIncrementalReplanning(unittest.TestCase):
+    """A re-plan with a changed input reruns only the tasks that reference it."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        # build_itinerary writes its output file relative to the working directory
+        cwd = os.getcwd()
+        os.chdir(tmp.name)
+        self.addCleanup(os.chdir, cwd)
+        env = patch.dict(os.environ, {**FAKE_ENV, "WEEKEND_PLANNER_CACHE_DIR": os.path.join(tmp.name, "cache")})
+        env.start()
+        self.addCleanup(env.stop)
+        reset_tool_caches()
+        self.addCleanup(reset_tool_caches)
+        self.cassette_path = os.path.join(tmp.name, "checkpoints.json")
+        self.llm_calls = 0
+        self.manager_answer = None
+
+    def upstream(self, method, url, headers, body):
+        status, response_headers, content = fake_upstream(method, url, headers, body)
+        if url.endswith("/chat/completions"):
+            self.llm_calls += 1
+            # The manager's own coordinate_planning task concludes with a different plan
+            if self.manager_answer and "週末お出かけプランの全体調整を行う" in body.decode("utf-8"):
+                content = content.replace("東京で過ごす週末のプランです。".encode("utf-8"), self.manager_answer.encode("utf-8"))
+        return status, response_headers, content
+
+    def plan(self, mode, use_cache=True, **changes):
+        """Plan and return (tasks reused from checkpoints, LLM calls, tasks finished)."""
+        planner = get_planner(mode)
+        finished = []
+        self.llm_calls = 0
+        with Cassette(self.cassette_path, mode="record", upstream=self.upstream):
+            plan_weekend({**INPUTS, **changes}, mode=mode, use_cache=use_cache, planner=planner,
+                         on_task=lambda name, *_: finished.append(name))
+        return planner.checkpoints.reused, self.llm_calls, finished
+
+    def test_changed_return_time_reruns_only_the_transport_tail(self):
+        reused, first_calls, finished = self.plan("sequential")
+        self.assertEqual(reused, [])
+        self.assertEqual(finished, list(TASK_DEPENDENCIES))
+
+        reused, calls, finished = self.plan("sequential", return_time="20:00")
+        self.assertEqual(reused, ["fetch_weather", "explore_local_options", "craft_recommendations"])
+        # Reused tasks still reach the stream, in order
+        self.assertEqual(finished, list(TASK_DEPENDENCIES))
+        self.assertLess(calls, first_calls)
+        self.assertTrue(os.path.exists(f"output/weekend_itinerary_{INPUTS['date']}.md"))
+
+        # The weather only references the location and the date
+        reused, _, _ = self.plan("sequential", return_time="20:00", budget="1人2万円")
+        self.assertIn("fetch_weather", reused)
+        self.assertNotIn("explore_local_options", reused)
+
+        reused, _, _ = self.plan("sequential", location="逗子")
+        self.assertNotIn("fetch_weather", reused)
+
+    def test_hierarchical_manager_reruns_but_specialist_tasks_are_reused(self):
+        self.plan("hierarchical")
+        reused, _, finished = self.plan("hierarchical", return_time="20:00")
+
+        self.assertEqual(reused, ["fetch_weather", "explore_local_options", "craft_recommendations"])
+        self.assertEqual(finished[0], "coordinate_planning")
+        self.assertEqual(len(finished), 6)
+
+    def test_hierarchical_tasks_rerun_when_the_manager_output_changes(self):
+        self.plan("hierarchical")
+        # Same specialist inputs; only coordinate_planning, which every later task gets as context, differs
+        self.manager_answer = "雨天に備えて屋内中心のプランに切り替えます。"
+        reused, _, finished = self.plan("hierarchical", return_time="20:00")
+
+        self.assertEqual(reused, [])
+        self.assertEqual(len(finished), 6)
+
+    def test_no_cache_runs_every_task(self):
+        self.plan("parallel")
+        reused, calls, _ = self.plan("parallel", use_cache=False, return_time="20:00")
+        self.assertEqual(reused, [])
+        self.assertGreater(calls, 0)
+
+
+class TestResumeRun(unittest.TestCase):
+    """A run that fails in its last task continues from the completed ones."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        cwd = os.getcwd()
+        os.chdir(tmp.name)
+        self.addCleanup(os.chdir, cwd)
+        env = patch.dict(os.environ, {**FAKE_ENV, "WEEKEND_PLANNER_CACHE_DIR": os.path.join(tmp.name, "cache")})
+        env.start()
+        self.addCleanup(env.stop)
+        reset_tool_caches()
+        self.addCleanup(reset_tool_caches)
+        self.cassette_path = os.path.join(tmp.name, "resume.json")
+        quiet = patch("builtins.print")
+        quiet.start()
+        self.addCleanup(quiet.stop)
+        self.llm_prompts = []
+        self.itinerary_fails = False
+
+    def upstream(self, method, url, headers, body):
+        if url.endswith("/chat/completions"):
+            self.llm_prompts.append(body.decode("utf-8"))
+            # The itinerary designer's LLM call is rejected, e.g. by a gateway timeout
+            if self.itinerary_fails and "おでかけしおりデザイナー" in body.decode("utf-8"):
+                return 400, {"Content-Type": "application/json"}, b'{"error": {"message": "upstream timeout"}}'
+        return fake_upstream(method, url, headers, body)
+
+    def run_weekend(self, **kwargs):
+        self.llm_prompts = []
+        with Cassette(self.cassette_path, mode="record", upstream=self.upstream):
+            return run_weekend(**INPUTS, mode="sequential", use_cache=False, **kwargs)
+
+    def test_failed_run_resumes_from_the_last_completed_task(self):
+        self.itinerary_fails = True
+        with self.assertRaises(Exception) as failure:
+            self.run_weekend()
+        run_id = re.search(r"--resume (\S+)\)", str(failure.exception)).group(1)
+
+        record = json.loads((runs_dir() / f"{run_id}.json").read_text(encoding="utf-8"))
+        self.assertEqual(record["status"], "failed")
+        self.assertEqual(record["mode"], "sequential")
+        self.assertEqual(list(record["tasks"]), [name for name in TASK_DEPENDENCIES if name != "build_itinerary"])
+
+        # Resuming restores the inputs and mode and only runs the itinerary
+        self.itinerary_fails = False
+        with Cassette(self.cassette_path, mode="record", upstream=self.upstream):
+            self.llm_prompts = []
+            raw = run_weekend(**{**INPUTS, "location": "無視される"}, resume=run_id)
+        self.assertTrue(self.llm_prompts)
+        self.assertTrue(all("おでかけしおりデザイナー" in prompt for prompt in self.llm_prompts))
+        self.assertEqual(get_planner("sequential").checkpoints.reused, list(record["tasks"]))
+
+        run = RunCheckpoint.load(run_id)
+        self.assertEqual((run.status, run.raw), ("completed", raw))
+        self.assertEqual(list(run.tasks), list(TASK_DEPENDENCIES))
+        self.assertTrue(os.path.exists(f"output/weekend_itinerary_{INPUTS['date']}.md"))
+
+        # A completed run is answered from its record
+        self.llm_prompts = []
+        self.assertEqual(run_weekend(**INPUTS, resume=run_id), raw)
+        self.assertEqual(self.llm_prompts, [])
+
+    def test_unknown_run_id(self):
+        for run_id in ("20251122-000000-abcdef", "../plans"):
+            with self.assertRaises(ValueError):
+                run_weekend(**INPUTS, resume=run_id)
+
+
+if __name__ == '__main__':
+    unittest.main()
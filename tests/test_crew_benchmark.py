@@ -0,0 +1,180 @@
+"""
+End-to-end benchmark of complete crew runs on replayed traffic.
+
+Every run replays a cassette, so the numbers measure the crew, the tools and
+their caches without network or LLM latency, and the suite runs on an
+offline CI machine. The cassette is recorded against tests/fake_upstream.py
+unless BENCHMARK_CASSETTE points to a recording of real traffic
+(uv run main.py --record FILE --no-cache).
+
+Budgets (regressions fail the suite) can be tuned with environment variables:
+
+    BENCHMARK_MAX_LATENCY        median seconds per plan (default 10)
+    BENCHMARK_MIN_THROUGHPUT     plans per minute on 4 workers (default 30)
+    BENCHMARK_MAX_TOOL_OVERHEAD  seconds per tool call outside the network (default 0.5)
+    BENCHMARK_MAX_PEAK_MB        peak traced memory of one plan (default 300)
+    BENCHMARK_REPORT             write the measurements to this JSON file
+"""
+
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import json
+import statistics
+import tempfile
+import time
+import tracemalloc
+from functools import partial
+from pathlib import Path
+
+# Add project root to sys.path to allow imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from batch import plan, run_batch
+from crew import MODES, WeekendPlanner
+from main import plan_weekend
+from replay import Cassette
+from tests.fake_upstream import FAKE_ENV, fake_upstream, reset_tool_caches
+
+# Representative requests: a city plan with transit, and a food trip with a wider budget
+BENCHMARK_INPUTS = [
+    {
+        'location': "東京23区",
+        'interests': "カフェ巡りと美術館、夜はライブハウス",
+        'budget': "1人あたり1.5万円以内",
+        'companions': "友人2人",
+        'date': "2025年11月22日",
+        'home': "東京駅",
+        'departure_time': "09:00",
+        'return_time': "18:00",
+    },
+    {
+        'location': "横浜",
+        'interests': "中華街で食べ歩きと夜景",
+        'budget': "1人1万円",
+        'companions': "家族4人",
+        'date': "2025年11月23日",
+        'home': "東京駅",
+        'departure_time': "10:00",
+        'return_time': "20:00",
+    },
+]
+
+RUNS_PER_MODE = 3
+BATCH_RECORDS = 8
+BATCH_WORKERS = 4
+
+
+def budget(name, default):
+    return float(os.getenv(name, default))
+
+
+class TestCrewBenchmark(unittest.TestCase):
+
+    report = {}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.env = patch.dict(os.environ, {**FAKE_ENV, "WEEKEND_PLANNER_CACHE_DIR": os.path.join(cls.tmp.name, "cache")})
+        cls.env.start()
+        cls.cwd = os.getcwd()
+        # build_itinerary writes its output file relative to the working directory
+        os.chdir(cls.tmp.name)
+
+        cls.cassette_path = Path(os.getenv("BENCHMARK_CASSETTE", Path(cls.tmp.name) / "benchmark.json"))
+        if "BENCHMARK_CASSETTE" not in os.environ:
+            with Cassette(cls.cassette_path, mode="record", upstream=fake_upstream):
+                for mode in MODES:
+                    for inputs in BENCHMARK_INPUTS:
+                        reset_tool_caches()
+                        plan_weekend(inputs, mode=mode, use_cache=False)
+
+    @classmethod
+    def tearDownClass(cls):
+        os.chdir(cls.cwd)
+        cls.env.stop()
+        reset_tool_caches()
+        cls.tmp.cleanup()
+        print("\n" + json.dumps(cls.report, ensure_ascii=False, indent=1))
+        if os.getenv("BENCHMARK_REPORT"):
+            Path(os.environ["BENCHMARK_REPORT"]).write_text(json.dumps(cls.report, ensure_ascii=False, indent=1), encoding="utf-8")
+
+    def replay_plan(self, inputs, mode):
+        """One plan from a cold process state; returns (seconds, planner)."""
+        reset_tool_caches()
+        planner = WeekendPlanner(mode=mode)
+        with Cassette(self.cassette_path) as cassette:
+            start = time.perf_counter()
+            plan_weekend(inputs, mode=mode, use_cache=False, planner=planner)
+            elapsed = time.perf_counter() - start
+        self.assertEqual(cassette.stats["misses"], 0, cassette.missed)
+        return elapsed, planner
+
+    def test_end_to_end_latency(self):
+        for mode in MODES:
+            samples = [
+                self.replay_plan(inputs, mode)[0]
+                for _ in range(RUNS_PER_MODE)
+                for inputs in BENCHMARK_INPUTS
+            ]
+            median = statistics.median(samples)
+            self.report[f"latency_{mode}"] = {"median": round(median, 3), "max": round(max(samples), 3)}
+            self.assertLess(median, budget("BENCHMARK_MAX_LATENCY", 10), mode)
+
+    def test_throughput(self):
+        records = Path(self.tmp.name) / "records.jsonl"
+        records.write_text(
+            "".join(json.dumps({**BENCHMARK_INPUTS[i % len(BENCHMARK_INPUTS)], "id": str(i)}, ensure_ascii=False) + "\n"
+                    for i in range(BATCH_RECORDS)),
+            encoding="utf-8",
+        )
+        reset_tool_caches()
+        with Cassette(self.cassette_path):
+            result = run_batch(
+                records,
+                Path(self.tmp.name) / "results.jsonl",
+                workers=BATCH_WORKERS,
+                mode="sequential",
+                resume=False,
+                planner=partial(plan, use_cache=False),
+            )
+        self.report["throughput"] = {
+            "plans_per_minute": round(result["plans_per_minute"], 1),
+            "p50": round(result["p50"], 3),
+            "p95": round(result["p95"], 3),
+        }
+        self.assertEqual(result["errors"], 0)
+        self.assertEqual(result["planned"], BATCH_RECORDS)
+        self.assertGreater(result["plans_per_minute"], budget("BENCHMARK_MIN_THROUGHPUT", 30))
+
+    def test_per_tool_overhead(self):
+        _, planner = self.replay_plan(BENCHMARK_INPUTS[0], "hierarchical")
+        tools = planner.instrumentation.to_dict()["tools"]
+        self.assertTrue(tools)
+        overhead = {}
+        for name, metrics in tools.items():
+            if not metrics["tool_calls"]:
+                continue
+            overhead[name] = (metrics["tool_time"] - metrics["network_time"]) / metrics["tool_calls"]
+        self.report["tool_overhead"] = {name: round(seconds, 4) for name, seconds in overhead.items()}
+        for name, seconds in overhead.items():
+            self.assertLess(seconds, budget("BENCHMARK_MAX_TOOL_OVERHEAD", 0.5), name)
+
+    def test_peak_memory(self):
+        # Warm up imports and lazily built objects so only the run itself is measured
+        self.replay_plan(BENCHMARK_INPUTS[0], "sequential")
+        tracemalloc.start()
+        try:
+            self.replay_plan(BENCHMARK_INPUTS[0], "sequential")
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        peak_mb = peak / 1024 / 1024
+        self.report["peak_memory_mb"] = round(peak_mb, 1)
+        self.assertLess(peak_mb, budget("BENCHMARK_MAX_PEAK_MB", 300))
+
+
+if __name__ == '__main__':
+    unittest.main()
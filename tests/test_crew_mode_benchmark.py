@@ -0,0 +1,130 @@
+"""Benchmark of the hierarchical and sequential crew modes on a stubbed LLM."""
+
+import unittest
+import sys
+import os
+import re
+import tempfile
+import threading
+import time
+
+os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+
+# Add project root to sys.path to allow imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from crewai import BaseLLM
+from crew import WeekendPlanner
+
+# Simulated latency of one LLM round trip
+CALL_LATENCY = 0.05
+
+INPUTS = {
+    'location': '東京23区',
+    'interests': 'カフェ巡りと美術館',
+    'budget': '1人1万円',
+    'companions': '友人1人',
+    'date': '2025年11月22日',
+    'home': '東京駅',
+    'departure_time': '09:00',
+    'return_time': '18:00',
+}
+
+
+class UsageCounter:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def add(self, prompt, completion):
+        with self.lock:
+            self.calls += 1
+            # Rough token estimate (about 4 characters per token)
+            self.prompt_tokens += len(prompt) // 4
+            self.completion_tokens += len(completion) // 4
+
+
+class StubLLM(BaseLLM):
+    """
+    A fixed-latency LLM that answers in CrewAI's ReAct format.
+
+    When the manager's delegation tool is offered and nothing has been
+    delegated yet, it delegates once to the first listed coworker;
+    otherwise it returns a final answer.
+    """
+
+    def __init__(self, usage):
+        super().__init__(model="stub")
+        self.usage = usage
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, from_task=None, from_agent=None):
+        if isinstance(messages, str):
+            messages = [{"role": "user", "content": messages}]
+        prompt = "\n".join(str(message.get("content", "")) for message in messages)
+        coworkers = re.search(r"Delegate a specific task to one of the following coworkers: (.+)", prompt)
+        delegated = any(message.get("role") == "assistant" for message in messages)
+        if coworkers and not delegated:
+            coworker = coworkers.group(1).split(",")[0].strip()
+            answer = (
+                "Thought: 専門家に任せます\n"
+                "Action: Delegate work to coworker\n"
+                f'Action Input: {{"task": "担当部分を調査してください", "context": "週末のお出かけプラン", "coworker": "{coworker}"}}'
+            )
+        else:
+            answer = "Thought: まとめました\nFinal Answer: スタブの回答です。"
+        time.sleep(CALL_LATENCY)
+        self.usage.add(prompt, answer)
+        return answer
+
+    def supports_function_calling(self):
+        return False
+
+    def supports_stop_words(self):
+        return False
+
+    def get_context_window_size(self):
+        return 128000
+
+
+def run_mode(mode):
+    usage = UsageCounter()
+    crew = WeekendPlanner(mode=mode).crew()
+    crew.verbose = False
+    agents = list(crew.agents) + ([crew.manager_agent] if crew.manager_agent else [])
+    for agent in agents:
+        agent.llm = StubLLM(usage)
+        agent.verbose = False
+
+    start = time.perf_counter()
+    crew.kickoff(inputs=INPUTS)
+    return time.perf_counter() - start, usage
+
+
+class TestCrewModeBenchmark(unittest.TestCase):
+
+    def setUp(self):
+        # build_itinerary writes its output file relative to the working directory
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        self.addCleanup(os.chdir, cwd)
+
+    def test_sequential_mode_is_faster_and_cheaper(self):
+        results = {mode: run_mode(mode) for mode in ("hierarchical", "sequential")}
+        for mode, (elapsed, usage) in results.items():
+            print(f"\n{mode}: {elapsed * 1000:.0f} ms, {usage.calls} LLM calls, "
+                  f"~{usage.prompt_tokens} prompt / ~{usage.completion_tokens} completion tokens")
+
+        hierarchical_time, hierarchical = results["hierarchical"]
+        sequential_time, sequential = results["sequential"]
+        self.assertLess(sequential.calls, hierarchical.calls)
+        self.assertLess(sequential.prompt_tokens, hierarchical.prompt_tokens)
+        self.assertLess(sequential_time, hierarchical_time)
+
+
+if __name__ == '__main__':
+    unittest.main()
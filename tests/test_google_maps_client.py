@@ -0,0 +1,54 @@
+import unittest
+import sys
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# Add project root to sys.path to allow imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tools import google_maps_client
+from tools.google_maps_client import get_client, get_client_stats, reset_clients, track_latency
+
+
+class TestGoogleMapsClientRegistry(unittest.TestCase):
+
+    def setUp(self):
+        reset_clients()
+
+    def tearDown(self):
+        reset_clients()
+
+    def test_same_key_reuses_client(self):
+        """The same API key always returns the same pooled client."""
+        first = get_client("AIza-test-key-1")
+        second = get_client("AIza-test-key-1")
+        other = get_client("AIza-test-key-2")
+
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+        self.assertEqual(first.session.get_adapter("https://")._pool_maxsize, google_maps_client.POOL_MAXSIZE)
+
+    def test_concurrent_get_client_creates_one_instance(self):
+        """Concurrent lookups for one key must not race into several clients."""
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            clients = list(pool.map(lambda _: get_client("AIza-test-key"), range(32)))
+
+        self.assertEqual(len({id(client) for client in clients}), 1)
+        self.assertEqual(get_client_stats()["clients"], 1)
+
+    def test_track_latency_records_calls_and_errors(self):
+        """Latency stats count successful and failed calls per endpoint."""
+        with track_latency("directions"):
+            pass
+        with self.assertRaises(RuntimeError):
+            with track_latency("directions"):
+                raise RuntimeError("boom")
+
+        stats = get_client_stats()["endpoints"]["directions"]
+        self.assertEqual(stats["calls"], 2)
+        self.assertEqual(stats["errors"], 1)
+        self.assertGreaterEqual(stats["p95_ms"], stats["p50_ms"])
+
+
+if __name__ == '__main__':
+    unittest.main()
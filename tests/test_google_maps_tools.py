@@ -0,0 +1,241 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import sys
+import os
+from datetime import datetime
+
+# Add project root to sys.path to allow imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tools import google_maps_tool
+from tools.google_maps_tool import GoogleMapsDirectionsTool, GoogleMapsDistanceMatrixTool, _matrix_chunks
+
+
+def fake_distance_matrix(origins, destinations, mode, departure_time, language):
+    """Return an all-OK matrix whose durations encode the requested cell."""
+    return {
+        'rows': [
+            {
+                'elements': [
+                    {
+                        'status': 'OK',
+                        'duration': {'text': f"{mode}:{origin}->{destination}"},
+                        'distance': {'text': "1 km"},
+                    }
+                    for destination in destinations
+                ]
+            }
+            for origin in origins
+        ]
+    }
+
+
+@patch.dict(os.environ, {"GOOGLE_MAPS_API_KEY": "AIza-test-key"})
+class TestGoogleMapsDistanceMatrixTool(unittest.TestCase):
+
+    def setUp(self):
+        self.gmaps = MagicMock()
+        self.gmaps.distance_matrix.side_effect = fake_distance_matrix
+        patcher = patch('tools.google_maps_tool.get_client', return_value=self.gmaps)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_one_request_per_mode_for_all_destinations(self):
+        """All candidates are compared with a single request per travel mode."""
+        tool = GoogleMapsDistanceMatrixTool()
+        result = tool._run(
+            origin="東京駅",
+            destinations=["横浜駅", "渋谷駅", "上野駅"],
+            departure_time="2025-11-23T09:00:00",
+        )
+
+        self.assertEqual(self.gmaps.distance_matrix.call_count, 3)
+        for call in self.gmaps.distance_matrix.call_args_list:
+            self.assertEqual(call.kwargs['origins'], ["東京駅"])
+            self.assertEqual(call.kwargs['destinations'], ["横浜駅", "渋谷駅", "上野駅"])
+        self.assertIn("| 東京駅 | 渋谷駅 | driving:東京駅->渋谷駅 / 1 km |", result)
+        self.assertIn("walking:東京駅->上野駅 / 1 km", result)
+
+    def test_mode_failure_is_reported_without_losing_other_modes(self):
+        """An error in one mode still returns the other columns."""
+        def flaky(**kwargs):
+            if kwargs['mode'] == 'transit':
+                raise RuntimeError("OVER_QUERY_LIMIT")
+            return fake_distance_matrix(**kwargs)
+
+        self.gmaps.distance_matrix.side_effect = flaky
+        result = GoogleMapsDistanceMatrixTool()._run(origin="東京駅", destination="横浜駅")
+
+        self.assertIn("driving:東京駅->横浜駅", result)
+        self.assertIn("公共交通機関: エラー（OVER_QUERY_LIMIT）", result)
+
+    def test_failed_chunk_only_marks_its_own_cells(self):
+        """Cells fetched by the other chunks of a failed mode are still shown."""
+        destinations = [f"駅{n}" for n in range(30)]
+
+        def flaky(**kwargs):
+            if kwargs['mode'] == 'transit' and "駅29" in kwargs['destinations']:
+                raise RuntimeError("UNKNOWN_ERROR")
+            return fake_distance_matrix(**kwargs)
+
+        self.gmaps.distance_matrix.side_effect = flaky
+        tool = GoogleMapsDistanceMatrixTool()
+        result = tool._run(origin="東京駅", destinations=destinations)
+
+        self.assertIn("transit:東京駅->駅0 / 1 km", result)
+        self.assertIn("transit:東京駅->駅24 / 1 km", result)
+        self.assertNotIn("transit:東京駅->駅25", result)
+        self.assertIn("| 東京駅 | 駅25 | driving:東京駅->駅25 / 1 km | エラー |", result)
+        self.assertIn("公共交通機関: エラー（UNKNOWN_ERROR）", result)
+
+        tool.output_format = "json"
+        structured = google_maps_tool.DistanceMatrixResult.model_validate_json(
+            tool._run(origin="東京駅", destinations=destinations)
+        )
+        transit = [cell.destination for cell in structured.cells if cell.mode == "transit"]
+        self.assertEqual(transit, destinations[:25])
+        self.assertEqual(structured.errors, {"transit": "UNKNOWN_ERROR"})
+
+    def test_json_output_lists_every_cell(self):
+        tool = GoogleMapsDistanceMatrixTool(output_format="json")
+        result = google_maps_tool.DistanceMatrixResult.model_validate_json(
+            tool._run(origin="東京駅", destinations=["横浜駅", "渋谷駅"])
+        )
+        self.assertEqual(len(result.cells), 6)
+        self.assertEqual(result.cells[0].duration, "driving:東京駅->横浜駅")
+
+    def test_missing_places_returns_error(self):
+        result = GoogleMapsDistanceMatrixTool()._run(origin="東京駅")
+        self.assertTrue(result.startswith("エラー"))
+        self.gmaps.distance_matrix.assert_not_called()
+
+
+def fake_route(duration):
+    return {
+        'legs': [{
+            'duration': {'text': duration},
+            'distance': {'text': "30 km"},
+            'duration_in_traffic': {'text': duration},
+            'steps': [],
+        }]
+    }
+
+
+@patch.dict(os.environ, {"GOOGLE_MAPS_API_KEY": "AIza-test-key"})
+class TestDirectionsCache(unittest.TestCase):
+
+    def setUp(self):
+        self.gmaps = MagicMock()
+        self.gmaps.directions.side_effect = lambda **kwargs: [fake_route(f"{kwargs['mode']} 40分")]
+        patcher = patch('tools.google_maps_tool.get_client', return_value=self.gmaps)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.dict(google_maps_tool._directions_caches, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_departures_in_the_same_bucket_share_one_request(self):
+        tool = GoogleMapsDirectionsTool()
+        first = tool._run("東京駅", "横浜駅", "transit", "2025-11-23T09:00:00")
+        second = tool._run(" 東京駅", "横浜駅", "transit", "2025-11-23T09:02:00")
+        tool._run("東京駅", "横浜駅", "transit", "2025-11-23T09:16:00")
+
+        self.assertEqual(self.gmaps.directions.call_count, 2)
+        # Cached routes are re-rendered with the requested departure time
+        self.assertIn("2025年11月23日 09:00", first)
+        self.assertIn("2025年11月23日 09:02", second)
+        self.assertIn("transit 40分", second)
+
+    def test_modes_use_separate_caches_and_ttls(self):
+        tool = GoogleMapsDirectionsTool()
+        tool._run("東京駅", "横浜駅", "transit", "2025-11-23T09:00:00")
+        tool._run("東京駅", "横浜駅", "driving", "2025-11-23T09:00:00")
+
+        self.assertEqual(self.gmaps.directions.call_count, 2)
+        driving = google_maps_tool.get_directions_cache("driving").memory.ttl
+        transit = google_maps_tool.get_directions_cache("transit").memory.ttl
+        self.assertLess(driving, transit)
+
+    def test_empty_results_are_not_cached(self):
+        self.gmaps.directions.side_effect = lambda **kwargs: []
+        tool = GoogleMapsDirectionsTool()
+        result = tool._run("東京駅", "どこか", "transit", "2025-11-23T09:00:00")
+        tool._run("東京駅", "どこか", "transit", "2025-11-23T09:00:00")
+
+        self.assertTrue(result.startswith("エラー"))
+        self.assertEqual(self.gmaps.directions.call_count, 2)
+
+
+TRANSIT_ROUTE = {
+    'legs': [{
+        'duration': {'text': "32分"},
+        'distance': {'text': "28.8 km"},
+        'steps': [
+            {'travel_mode': 'WALKING', 'duration': {'text': "3分"}, 'distance': {'text': "200 m"}},
+            {
+                'travel_mode': 'TRANSIT',
+                'duration': {'text': "25分"},
+                'distance': {'text': "28.6 km"},
+                'fare': {'value': 490},
+                'transit_details': {
+                    'line': {'name': "JR東海道線", 'short_name': "東海道線", 'vehicle': {'name': "電車"}},
+                    'departure_stop': {'name': "東京"},
+                    'arrival_stop': {'name': "横浜"},
+                    'num_stops': 3,
+                },
+            },
+        ],
+    }]
+}
+
+
+class TestDirectionsOutputFormats(unittest.TestCase):
+
+    def render(self, **kwargs):
+        tool = GoogleMapsDirectionsTool(**kwargs)
+        return tool._format_directions("東京駅", "横浜駅", "transit", datetime(2025, 11, 23, 9, 0), [TRANSIT_ROUTE])
+
+    def test_json_output_keeps_structured_steps(self):
+        result = google_maps_tool.DirectionsResult.model_validate_json(self.render(output_format="json"))
+
+        route = result.routes[0]
+        self.assertEqual(route.fare_total, 490)
+        self.assertEqual(route.lines, ["東海道線"])
+        self.assertEqual(route.steps[1].arrival_stop, "横浜")
+
+    def test_summary_drops_steps(self):
+        summary = self.render(verbosity="summary")
+        self.assertEqual(
+            summary,
+            "# 東京駅 → 横浜駅（公共交通機関、11/23 09:00発）\n- ルート1: 32分 / 28.8 km / 約490円 / 東海道線\n",
+        )
+        self.assertNotIn("steps", self.render(output_format="json", verbosity="summary"))
+
+    def test_markdown_full_is_unchanged(self):
+        full = self.render()
+        self.assertIn("### 乗り換え詳細", full)
+        self.assertIn("**合計運賃**: 約490円", full)
+
+
+class TestMatrixChunks(unittest.TestCase):
+
+    def test_chunks_respect_api_limits(self):
+        """Chunks stay within 25 places per side and 100 elements per request."""
+        origins = [f"o{i}" for i in range(7)]
+        destinations = [f"d{i}" for i in range(40)]
+        chunks = list(_matrix_chunks(origins, destinations))
+
+        covered = set()
+        for origin_offset, origin_chunk, destination_offset, destination_chunk in chunks:
+            self.assertLessEqual(len(origin_chunk), 25)
+            self.assertLessEqual(len(destination_chunk), 25)
+            self.assertLessEqual(len(origin_chunk) * len(destination_chunk), 100)
+            for i in range(len(origin_chunk)):
+                for j in range(len(destination_chunk)):
+                    covered.add((origin_offset + i, destination_offset + j))
+
+        self.assertEqual(len(covered), len(origins) * len(destinations))
+
+
+if __name__ == '__main__':
+    unittest.main()
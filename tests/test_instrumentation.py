@@ -0,0 +1,185 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import json
+import tempfile
+from types import SimpleNamespace
+
+os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+
+# Add project root to sys.path to allow imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from crewai import BaseLLM
+from crewai.agents.agent_builder.utilities.base_token_process import TokenProcess
+from crewai.utilities.events import LLMCallCompletedEvent, LLMCallStartedEvent, crewai_event_bus
+from crewai.utilities.events.llm_events import LLMCallType
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from crew import TASK_DEPENDENCIES, WeekendPlanner
+from instrumentation import RunInstrumentation
+from tools import telemetry
+
+INPUTS = {
+    'location': '東京23区',
+    'interests': 'カフェ巡りと美術館',
+    'budget': '1人1万円',
+    'companions': '友人1人',
+    'date': '2025年11月22日',
+    'home': '東京駅',
+    'departure_time': '09:00',
+    'return_time': '18:00',
+}
+
+
+class ReportingLLM(BaseLLM):
+    """
+    A stub LLM that behaves like CrewAI's LLM class towards instrumentation:
+    it emits the LLM call events and reports token usage to the callbacks.
+    """
+
+    def __init__(self):
+        super().__init__(model="stub")
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, from_task=None, from_agent=None):
+        crewai_event_bus.emit(self, event=LLMCallStartedEvent(
+            messages=messages, from_task=from_task, from_agent=from_agent, model=self.model,
+        ))
+        answer = "Thought: まとめました\nFinal Answer: スタブの回答です。"
+        usage = SimpleNamespace(prompt_tokens=100, completion_tokens=10, prompt_tokens_details=None)
+        for callback in callbacks or []:
+            callback.log_success_event({}, {"usage": usage}, 0, 0)
+        crewai_event_bus.emit(self, event=LLMCallCompletedEvent(
+            messages=messages, response=answer, call_type=LLMCallType.LLM_CALL,
+            from_task=from_task, from_agent=from_agent, model=self.model,
+        ))
+        return answer
+
+    def supports_function_calling(self):
+        return False
+
+    def supports_stop_words(self):
+        return False
+
+    def get_context_window_size(self):
+        return 128000
+
+
+def fake_agent(role):
+    agent = SimpleNamespace(id=role, role=role + "\n")
+    agent._token_process = TokenProcess()
+    return agent
+
+
+class TestRunInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.weather = fake_agent("weather")
+        self.scout = fake_agent("scout")
+        self.run = RunInstrumentation()
+        self.run._agents = {"weather": self.weather, "scout": self.scout}
+        self.run.start()
+
+    def test_tool_call_records_network_time_and_cache_hits(self):
+        self.run.record_task_start("fetch_weather", self.weather)
+        self.run.record_tool_start(None, "weather", "Open-Meteo")
+        telemetry.record_network(0.25)
+        telemetry.record_cache_hit()
+        self.run.record_tool_end("weather", retries=1)
+        self.run.record_task_end("fetch_weather", self.weather)
+
+        task = self.run.to_dict()["tasks"][0]
+        self.assertEqual(task["agent"], "weather")
+        self.assertEqual(task["tool_calls"], 1)
+        self.assertEqual(task["network_time"], 0.25)
+        self.assertEqual(task["cache_hits"], 1)
+        self.assertEqual(task["retries"], 1)
+        self.assertEqual(self.run.tools["Open-Meteo"]["tool_calls"], 1)
+
+    def test_tokens_of_overlapping_tasks_stay_with_their_agent(self):
+        self.run.record_task_start("fetch_weather", self.weather)
+        self.run.record_task_start("explore_local_options", self.scout)
+        self.weather._token_process.sum_prompt_tokens(50)
+        self.scout._token_process.sum_prompt_tokens(70)
+        self.run.record_task_end("fetch_weather", self.weather)
+        self.run.record_task_end("explore_local_options", self.scout)
+        self.run.finish()
+
+        tasks = {task["name"]: task for task in self.run.to_dict()["tasks"]}
+        self.assertEqual(tasks["fetch_weather"]["prompt_tokens"], 50)
+        self.assertEqual(tasks["explore_local_options"]["prompt_tokens"], 70)
+        self.assertEqual(self.run.totals()["prompt_tokens"], 120)
+
+    def test_task_running_alone_owns_delegated_tokens(self):
+        self.run.record_task_start("fetch_weather", self.scout)
+        self.weather._token_process.sum_completion_tokens(30)
+        self.run.record_llm_start(None, "weather")
+        self.run.record_llm_end("weather", "stub")
+        self.run.record_task_end("fetch_weather", self.scout)
+
+        task = self.run.to_dict()["tasks"][0]
+        self.assertEqual(task["completion_tokens"], 30)
+        self.assertEqual(task["llm_calls"], 1)
+
+    def test_write_json_and_summary(self):
+        self.run.record_task_start("fetch_weather", self.weather)
+        self.run.record_task_end("fetch_weather", self.weather)
+        self.run.finish()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = self.run.write_json(os.path.join(tmp, "traces", "run.json"))
+            data = json.loads(path.read_text(encoding="utf-8"))
+        self.assertEqual([task["name"] for task in data["tasks"]], ["fetch_weather"])
+        self.assertIn("| fetch_weather | weather |", self.run.summary())
+        self.assertIn("| 合計 |", self.run.summary())
+
+    def test_export_otel_nests_calls_under_tasks(self):
+        self.run.record_task_start("fetch_weather", self.weather)
+        self.run.record_tool_start(None, "weather", "Open-Meteo")
+        self.run.record_tool_end("weather")
+        self.run.record_task_end("fetch_weather", self.weather)
+        self.run.finish()
+
+        exporter = InMemorySpanExporter()
+        with patch.dict(os.environ, {"OTEL_SDK_DISABLED": "false"}):
+            self.assertTrue(self.run.export_otel(exporter=exporter))
+        spans = {span.name: span for span in exporter.get_finished_spans()}
+        self.assertEqual(set(spans), {"weekend_plan", "task fetch_weather", "tool Open-Meteo"})
+        self.assertEqual(spans["tool Open-Meteo"].parent.span_id, spans["task fetch_weather"].context.span_id)
+        self.assertEqual(spans["task fetch_weather"].parent.span_id, spans["weekend_plan"].context.span_id)
+
+
+class TestCrewInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        # build_itinerary writes its output file relative to the working directory
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        self.addCleanup(os.chdir, cwd)
+
+    def test_sequential_run_records_every_task(self):
+        planner = WeekendPlanner(mode="sequential")
+        crew = planner.crew()
+        crew.verbose = False
+        for agent in crew.agents:
+            agent.llm = ReportingLLM()
+            agent.verbose = False
+        crew.kickoff(inputs=INPUTS)
+
+        data = planner.instrumentation.to_dict()
+        self.assertEqual([task["name"] for task in data["tasks"]], list(TASK_DEPENDENCIES))
+        for task in data["tasks"]:
+            self.assertEqual(task["status"], "completed")
+            self.assertEqual(task["llm_calls"], 1)
+            self.assertEqual(task["prompt_tokens"], 100)
+            self.assertEqual(task["completion_tokens"], 10)
+        self.assertEqual(data["totals"]["llm_calls"], len(TASK_DEPENDENCIES))
+        self.assertEqual(data["totals"]["prompt_tokens"], 100 * len(TASK_DEPENDENCIES))
+
+
+if __name__ == '__main__':
+    unittest.main()
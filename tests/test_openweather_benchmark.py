@@ -0,0 +1,77 @@
+"""Micro-benchmark for the hourly forecast extraction in OpenMeteoTool."""
+
+import unittest
+import sys
+import os
+import json
+import timeit
+from datetime import datetime
+from pathlib import Path
+
+# Add project root to sys.path to allow imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tools.openweather_tool import OpenMeteoTool
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def legacy_format_hourly(tool, hourly_data, target_date_str):
+    """The previous row-by-row implementation, kept as the benchmark baseline."""
+    target_date = datetime.strptime(target_date_str, "%Y-%m-%d").date()
+    hourly_times = hourly_data.get("time", [])
+    result_text = ""
+    for i, time_str in enumerate(hourly_times):
+        forecast_datetime = datetime.fromisoformat(time_str)
+        if forecast_datetime.date() == target_date:
+            time_display = forecast_datetime.strftime("%H:%M")
+            temp = hourly_data.get("temperature_2m", [])[i]
+            humidity = hourly_data.get("relative_humidity_2m", [])[i]
+            wind_speed = hourly_data.get("wind_speed_10m", [])[i]
+            weather_code = hourly_data.get("weather_code", [])[i]
+            weather_desc = tool._get_weather_description(weather_code)
+            precip_prob = hourly_data.get("precipitation_probability", [])[i]
+
+            result_text += f"\n### {time_display}\n"
+            result_text += f"- 天気: {weather_desc}\n"
+            result_text += f"- 気温: {temp:.1f}°C\n"
+            result_text += f"- 湿度: {humidity}%\n"
+            result_text += f"- 風速: {wind_speed:.1f} m/s\n"
+            result_text += f"- 降水確率: {precip_prob}%\n"
+    return result_text
+
+
+class TestHourlyExtractionBenchmark(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        with open(FIXTURES / "open_meteo_forecast_tokyo.json", encoding="utf-8") as f:
+            payload = json.load(f)
+        cls.hourly = payload["hourly"]
+        cls.dates = payload["daily"]["time"]
+        cls.tool = OpenMeteoTool()
+
+    def test_columnar_output_matches_legacy(self):
+        for date in self.dates:
+            columnar = "".join(self.tool._format_hourly(self.hourly, date))
+            self.assertEqual(columnar, legacy_format_hourly(self.tool, self.hourly, date))
+
+    def test_columnar_extraction_is_faster(self):
+        def run_legacy():
+            for date in self.dates:
+                legacy_format_hourly(self.tool, self.hourly, date)
+
+        def run_columnar():
+            for date in self.dates:
+                "".join(self.tool._format_hourly(self.hourly, date))
+
+        legacy = min(timeit.repeat(run_legacy, number=50, repeat=5))
+        columnar = min(timeit.repeat(run_columnar, number=50, repeat=5))
+        print(f"\nhourly extraction (7 days x 50): legacy {legacy * 1000:.1f} ms, "
+              f"columnar {columnar * 1000:.1f} ms, speedup {legacy / columnar:.1f}x")
+
+        self.assertLess(columnar, legacy)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,292 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import sys
+import os
+import json
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Add project root to sys.path to allow imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tools import openweather_tool
+from tools.cache import MemoryLRUCache, SQLiteLRUCache, TieredCache, normalize_key
+from tools.openweather_tool import OpenMeteoTool, forecast_cache_key
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def load_fixture(name):
+    with open(FIXTURES / name, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def json_response(payload):
+    response = MagicMock()
+    response.json.return_value = payload
+    response.raise_for_status.return_value = None
+    return response
+
+
+GEOCODE_PAYLOAD = {
+    "results": [
+        {"latitude": 35.6895, "longitude": 139.6917, "name": "東京", "country": "日本", "admin1": "東京都"}
+    ]
+}
+
+
+class TestSQLiteLRUCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = Path(self.tmp.name) / "cache.sqlite3"
+
+    def test_lru_eviction_keeps_recently_used_entries(self):
+        cache = SQLiteLRUCache(self.path, max_entries=2)
+        self.addCleanup(cache.close)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        self.assertEqual(cache.get("a"), 1)  # touch "a" so "b" becomes least recently used
+        cache.set("c", 3)
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("c"), 3)
+
+    def test_ttl_expires_entries(self):
+        cache = SQLiteLRUCache(self.path, ttl=60)
+        self.addCleanup(cache.close)
+        with patch("tools.cache.time.time", return_value=1000.0):
+            cache.set("tokyo", {"latitude": 35.0})
+        with patch("tools.cache.time.time", return_value=1030.0):
+            self.assertEqual(cache.get("tokyo"), {"latitude": 35.0})
+        with patch("tools.cache.time.time", return_value=1061.0):
+            self.assertIsNone(cache.get("tokyo"))
+
+    def test_normalize_key_matches_width_and_whitespace_variants(self):
+        self.assertEqual(normalize_key("　渋谷区 "), normalize_key("渋谷区"))
+        self.assertEqual(normalize_key("ＴＯＫＹＯ"), normalize_key("tokyo"))
+
+
+class TestOpenMeteoGeocodeCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        cache = SQLiteLRUCache(Path(self.tmp.name) / "geocode.sqlite3")
+        self.addCleanup(cache.close)
+        patcher = patch.object(openweather_tool, "_geocode_cache", cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @patch("tools.openweather_tool.requests.get")
+    def test_cache_hit_skips_geocoding_request(self, mock_get):
+        mock_get.return_value = json_response(GEOCODE_PAYLOAD)
+        tool = OpenMeteoTool()
+
+        first = tool._geocode("東京")
+        second = tool._geocode(" 東京 ")
+
+        self.assertEqual(first, second)
+        self.assertEqual(first["latitude"], 35.6895)
+        self.assertEqual(mock_get.call_count, 1)
+
+    @patch("tools.openweather_tool.requests.get")
+    def test_unknown_location_is_not_cached(self, mock_get):
+        mock_get.return_value = json_response({})
+        tool = OpenMeteoTool()
+
+        self.assertIsNone(tool._geocode("存在しない地名"))
+        self.assertIsNone(tool._geocode("存在しない地名"))
+        self.assertEqual(mock_get.call_count, 2)
+
+
+class TestTieredCache(unittest.TestCase):
+
+    def test_concurrent_misses_fetch_once(self):
+        """Parallel lookups of a missing key share one upstream fetch."""
+        cache = TieredCache(MemoryLRUCache())
+        calls = []
+
+        def fetch():
+            calls.append(threading.get_ident())
+            time.sleep(0.05)
+            return {"payload": 1}
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda _: cache.get_or_fetch("cell", fetch), range(8)))
+
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(result == {"payload": 1} for result in results))
+
+    def test_fetches_of_one_key_never_overlap(self):
+        """Callers queued behind a fetch keep sharing its lock after it is released."""
+        cache = TieredCache(MemoryLRUCache())
+        lock = threading.Lock()
+        active = []
+        overlaps = []
+
+        def fetch():
+            with lock:
+                active.append(1)
+                overlaps.append(len(active))
+            time.sleep(0.005)
+            with lock:
+                active.pop()
+            # Nothing to cache, so every caller fetches in turn
+            return None
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda _: cache.get_or_fetch("cell", fetch), range(64)))
+
+        self.assertEqual(len(overlaps), 64)
+        self.assertEqual(max(overlaps), 1)
+        self.assertEqual(cache._key_locks, {})
+
+    def test_disk_hits_are_promoted_to_memory(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            disk = SQLiteLRUCache(Path(tmp) / "forecast.sqlite3")
+            disk.set("cell", {"payload": 2})
+            cache = TieredCache(MemoryLRUCache(), disk)
+
+            self.assertEqual(cache.get("cell"), {"payload": 2})
+            self.assertEqual(cache.memory.get("cell"), {"payload": 2})
+            disk.close()
+
+
+class TestOpenMeteoForecastCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        geocode_cache = SQLiteLRUCache(Path(self.tmp.name) / "geocode.sqlite3")
+        self.addCleanup(geocode_cache.close)
+        for name, value in (
+            ("_geocode_cache", geocode_cache),
+            ("_forecast_cache", TieredCache(MemoryLRUCache(ttl=3600))),
+        ):
+            patcher = patch.object(openweather_tool, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.forecast_calls = []
+        self.forecast_fixture = "open_meteo_forecast_tokyo.json"
+
+        def fake_get(url, params=None, timeout=None):
+            if "geocoding" in url:
+                return json_response(load_fixture("open_meteo_geocode_tokyo.json"))
+            self.forecast_calls.append(params)
+            payload = load_fixture(self.forecast_fixture)
+            cells = str(params["latitude"]).split(",")
+            return json_response(payload if len(cells) == 1 else [payload] * len(cells))
+
+        patcher = patch("tools.openweather_tool.requests.get", side_effect=fake_get)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_all_dates_share_one_forecast_request(self):
+        tool = OpenMeteoTool()
+        first = tool._run("東京", "2025-11-22")
+        second = tool._run("東京", "2025-11-24")
+
+        self.assertIn("2025年11月22日", first)
+        self.assertIn("2025年11月24日", second)
+        self.assertEqual(len(self.forecast_calls), 1)
+        self.assertEqual(self.forecast_calls[0]["latitude"], 35.69)
+        self.assertEqual(self.forecast_calls[0]["longitude"], 139.69)
+
+    def test_batch_mode_uses_one_multi_coordinate_request(self):
+        geocode = {
+            "東京駅": (35.6812, 139.7671),
+            "渋谷区": (35.6640, 139.6982),
+            "横浜": (35.4437, 139.6380),
+        }
+
+        def fake_geocode(name):
+            lat, lon = geocode[name]
+            return {"latitude": lat, "longitude": lon, "name": name, "country": "日本", "admin1": ""}
+
+        tool = OpenMeteoTool()
+        with patch.object(OpenMeteoTool, "_geocode", side_effect=fake_geocode):
+            result = tool._run(locations=["東京駅", "渋谷区", "横浜"], date="2025-11-22", end_date="2025-11-23")
+
+        self.assertEqual(len(self.forecast_calls), 1)
+        self.assertEqual(self.forecast_calls[0]["latitude"], "35.68,35.66,35.44")
+        self.assertEqual(result.count("| 渋谷区 |"), 2)
+        self.assertIn("| 横浜 | 11-23 |", result)
+
+        # A second batch for the same cells is answered from the forecast cache
+        with patch.object(OpenMeteoTool, "_geocode", side_effect=fake_geocode):
+            tool._run(locations=["横浜", "東京駅"], date="2025-11-24")
+        self.assertEqual(len(self.forecast_calls), 1)
+
+    def test_batch_mode_tolerates_a_null_precipitation_probability(self):
+        """A null daily precipitation probability only blanks its own cells."""
+        self.forecast_fixture = "open_meteo_forecast_null_precipitation.json"
+
+        def fake_geocode(name):
+            return {"latitude": 35.68, "longitude": 139.77, "name": name, "country": "日本", "admin1": ""}
+
+        with patch.object(OpenMeteoTool, "_geocode", side_effect=fake_geocode):
+            result = OpenMeteoTool()._run(locations=["東京駅", "横浜"], date="2025-11-22", end_date="2025-11-23")
+
+        self.assertIn("| 東京駅 | 11-22 | 曇り | 14.3/3.6°C | 20% | 屋外OK |", result)
+        self.assertIn("| 横浜 | 11-23 |", result)
+        self.assertIn("°C | - | - |", result)
+
+    def test_cache_key_uses_grid_cell_and_update_window(self):
+        self.assertEqual(
+            forecast_cache_key(35.6895, 139.6917, now=0),
+            forecast_cache_key(35.6901, 139.6874, now=1800),
+        )
+        self.assertNotEqual(
+            forecast_cache_key(35.6895, 139.6917, now=0),
+            forecast_cache_key(35.6895, 139.6917, now=3600),
+        )
+        self.assertNotEqual(
+            forecast_cache_key(35.6895, 139.6917, now=0),
+            forecast_cache_key(35.6580, 139.7016, now=0),
+        )
+
+
+class TestOpenMeteoOutputFormats(unittest.TestCase):
+
+    def setUp(self):
+        self.forecast = load_fixture("open_meteo_forecast_tokyo.json")
+        self.geo = {"latitude": 35.69, "longitude": 139.69, "name": "東京", "country": "日本", "admin1": "東京都"}
+
+    def test_summary_is_much_shorter_than_full_markdown(self):
+        full = OpenMeteoTool()._format_report("東京", self.geo, "2025-11-23", self.forecast)
+        summary = OpenMeteoTool(verbosity="summary")._format_report("東京", self.geo, "2025-11-23", self.forecast)
+
+        self.assertIn("| 06:00-09:00 |", summary)
+        self.assertNotIn("### 06:00", summary)
+        self.assertLess(len(summary), len(full) / 2)
+
+    def test_json_output_is_a_typed_report(self):
+        tool = OpenMeteoTool(output_format="json", verbosity="summary")
+        report = openweather_tool.WeatherReport.model_validate_json(
+            tool._format_report("東京", self.geo, "2025-11-23", self.forecast)
+        )
+
+        self.assertEqual(report.date, "2025-11-23")
+        self.assertEqual(len(report.blocks), 8)
+        self.assertIsNone(report.hourly)
+        day = self.forecast["daily"]["time"].index("2025-11-23")
+        self.assertEqual(report.temperature_max, self.forecast["daily"]["temperature_2m_max"][day])
+        self.assertEqual(max(b.temperature_max for b in report.blocks), report.temperature_max)
+
+    def test_json_full_output_keeps_every_hour(self):
+        tool = OpenMeteoTool(output_format="json")
+        report = json.loads(tool._format_report("東京", self.geo, "2025-11-23", self.forecast))
+        self.assertEqual(len(report["hourly"]), 24)
+        self.assertNotIn("blocks", report)
+
+
+if __name__ == '__main__':
+    unittest.main()
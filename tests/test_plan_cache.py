@@ -0,0 +1,98 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import sys
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+# Add project root to sys.path to allow imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import plan_cache
+from main import plan_weekend
+from tools.cache import SQLiteLRUCache
+
+INPUTS = {
+    'location': '東京23区',
+    'interests': 'カフェ巡り',
+    'budget': '1人1万円',
+    'companions': '友人1人',
+    'date': '2025年11月22日',
+    'home': '東京駅',
+    'departure_time': '09:00',
+    'return_time': '18:00',
+}
+
+
+class TestPlanCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dir = Path(self.tmp.name)
+        cache = SQLiteLRUCache(self.dir / "plans.sqlite3", ttl=3600)
+        self.addCleanup(cache.close)
+        patcher = patch.object(plan_cache, "_plan_cache", cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.itinerary = self.dir / "output" / "weekend_itinerary.md"
+        self.kickoffs = 0
+
+        def make_crew():
+            crew = MagicMock()
+
+            def kickoff(inputs):
+                self.kickoffs += 1
+                time.sleep(0.05)
+                self.itinerary.parent.mkdir(parents=True, exist_ok=True)
+                self.itinerary.write_text(f"# しおり {inputs['location']}", encoding="utf-8")
+                return MagicMock(raw=f"{inputs['location']}のプラン")
+
+            crew.kickoff.side_effect = kickoff
+            crew.tasks[-1].output_file = str(self.itinerary)
+            return crew
+
+        patcher = patch("crew.get_planner")
+        planner = patcher.start()
+        self.addCleanup(patcher.stop)
+        planner.return_value.crew.side_effect = make_crew
+
+    def test_identical_inputs_are_served_from_cache(self):
+        first = plan_weekend(INPUTS)
+        self.itinerary.unlink()
+
+        start = time.perf_counter()
+        second = plan_weekend({**INPUTS, 'location': ' 東京23区　'})
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.kickoffs, 1)
+        self.assertLess(elapsed, 0.05)
+        self.assertEqual(self.itinerary.read_text(encoding="utf-8"), "# しおり 東京23区")
+
+    def test_bypass_and_mode_skip_the_cached_plan(self):
+        plan_weekend(INPUTS)
+        plan_weekend(INPUTS, use_cache=False)
+        plan_weekend(INPUTS, mode="sequential")
+        self.assertEqual(self.kickoffs, 3)
+
+    def test_config_change_invalidates_the_key(self):
+        base = self.dir / "project"
+        for name in plan_cache.CONFIG_FILES:
+            (base / name).parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy(Path(plan_cache.BASE_DIR) / name, base / name)
+
+        with patch.object(plan_cache, "BASE_DIR", base):
+            before = plan_cache.plan_cache_key(INPUTS, "hierarchical")
+            with open(base / "config" / "tasks.yaml", "a", encoding="utf-8") as f:
+                f.write("\n# edited\n")
+            after = plan_cache.plan_cache_key(INPUTS, "hierarchical")
+
+        self.assertNotEqual(before, after)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,188 @@
+import unittest
+from unittest.mock import AsyncMock, patch
+import sys
+import os
+import asyncio
+import json
+import tempfile
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+# Add project root to sys.path to allow imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tests.fake_upstream import FAKE_ENV, fake_upstream, reset_tool_caches
+import plan_cache
+from main import plan_weekend, run_weekend
+from replay import Cassette
+from tools import openweather_tool, prefetch
+from tools.cache import MemoryLRUCache, SQLiteLRUCache, TieredCache
+from tools.openweather_tool import FORECAST_URL, GEOCODING_URL, OpenMeteoTool
+from tools.prefetch import prefetch_stats, start_prefetch
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def load_fixture(name):
+    with open(FIXTURES / name, encoding="utf-8") as f:
+        return json.load(f)
+
+
+class TestPrefetch(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        geocode_cache = SQLiteLRUCache(Path(tmp.name) / "geocode.sqlite3")
+        self.addCleanup(geocode_cache.close)
+        for name, value in (
+            ("_geocode_cache", geocode_cache),
+            ("_forecast_cache", TieredCache(MemoryLRUCache(ttl=3600))),
+        ):
+            patcher = patch.object(openweather_tool, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        prefetch.reset_prefetch()
+        self.addCleanup(prefetch.reset_prefetch)
+
+        self.requests = []
+        self.delay = 0.0
+        self.fail = False
+        patcher = patch("tools.openweather_tool._request_json", side_effect=self.request_json)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def request_json(self, url, params):
+        self.requests.append((url, params.get("name")))
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("upstream unavailable")
+        if url == GEOCODING_URL:
+            return load_fixture("open_meteo_geocode_tokyo.json")
+        return load_fixture("open_meteo_forecast_tokyo.json")
+
+    def start(self, location="東京", home="東京駅"):
+        handle = start_prefetch({"location": location, "home": home})
+        self.addCleanup(handle.close)
+        return handle
+
+    def test_tool_uses_the_prefetched_weather(self):
+        handle = self.start()
+        handle.close()
+        # Both places are geocoded in parallel, then the location's forecast is fetched
+        self.assertEqual(sorted(self.requests[:2]), [(GEOCODING_URL, "東京"), (GEOCODING_URL, "東京駅")])
+        self.assertEqual(self.requests[2:], [(FORECAST_URL, None)])
+
+        self.requests.clear()
+        report = OpenMeteoTool()._run("東京", "2025-11-22")
+        self.assertIn("東京", report)
+        self.assertEqual(self.requests, [])
+
+    def test_call_during_the_prefetch_waits_for_it(self):
+        self.delay = 0.1
+        self.start()
+        OpenMeteoTool()._run("東京", "2025-11-22")
+
+        self.assertEqual([name for url, name in self.requests if url == GEOCODING_URL].count("東京"), 1)
+        self.assertEqual(len([url for url, _ in self.requests if url == FORECAST_URL]), 1)
+        self.assertGreaterEqual(prefetch_stats()["used"], 2)
+
+    def test_async_tool_uses_the_prefetch(self):
+        self.delay = 0.05
+        self.start()
+        with patch("tools.openweather_tool._arequest_json", new_callable=AsyncMock) as request:
+            report = asyncio.run(OpenMeteoTool()._arun("東京", "2025-11-22"))
+        request.assert_not_called()
+        self.assertIn("東京", report)
+
+    def test_failed_prefetch_falls_back_to_the_tool(self):
+        self.fail = True
+        self.start().close()
+        self.assertEqual(prefetch_stats()["failed"], 2)
+
+        self.fail = False
+        self.requests.clear()
+        OpenMeteoTool()._run("東京", "2025-11-22")
+        self.assertEqual(len(self.requests), 2)
+
+    def test_cached_places_are_not_requested(self):
+        self.start().close()
+        self.requests.clear()
+        self.start().close()
+        self.assertEqual(self.requests, [])
+        # Closed prefetches are forgotten; the caches answer from now on
+        self.assertEqual(prefetch_stats()["pending"], 0)
+
+    @patch("tools.prefetch.PREFETCH", False)
+    def test_disabled(self):
+        self.assertIsNone(start_prefetch({"location": "東京", "home": "東京駅"}))
+        self.assertEqual(self.requests, [])
+
+
+class TestPrefetchAtKickoff(unittest.TestCase):
+
+    INPUTS = {
+        'location': "東京", 'interests': "美術館", 'budget': "1人1万円", 'companions': "友人1人",
+        'date': "2025年11月22日", 'home': "東京駅", 'departure_time': "09:00", 'return_time': "18:00",
+    }
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        cwd = os.getcwd()
+        os.chdir(tmp.name)
+        self.addCleanup(os.chdir, cwd)
+        env = patch.dict(os.environ, {**FAKE_ENV, "WEEKEND_PLANNER_CACHE_DIR": os.path.join(tmp.name, "cache")})
+        env.start()
+        self.addCleanup(env.stop)
+        reset_tool_caches()
+        self.addCleanup(reset_tool_caches)
+        self.cassette_path = os.path.join(tmp.name, "prefetch.json")
+        self.weather_requests = []
+
+    def upstream(self, method, url, headers, body):
+        if urlsplit(url).hostname.endswith("open-meteo.com"):
+            self.weather_requests.append(url)
+        return fake_upstream(method, url, headers, body)
+
+    def test_weather_tool_is_answered_from_the_prefetch(self):
+        with Cassette(self.cassette_path, mode="record", upstream=self.upstream):
+            plan_weekend(self.INPUTS, mode="sequential", use_cache=False)
+
+        # Geocoding of the location and home and one forecast; the weather
+        # agent's tool call (for 東京) was answered from the warmed caches
+        self.assertEqual(len(self.weather_requests), 3)
+        self.assertEqual(prefetch_stats()["started"], 3)
+        self.assertEqual(prefetch_stats()["pending"], 0)
+
+    def test_run_weekend_prefetches_before_building_the_planner(self):
+        """The prefetch overlaps crew construction and the plan cache is looked up once."""
+        import crew
+
+        events = []
+        real_start, real_get_planner, real_lookup = prefetch.start_prefetch, crew.get_planner, plan_cache.lookup
+
+        def start(inputs):
+            events.append("prefetch")
+            return real_start(inputs)
+
+        def get_planner(mode):
+            events.append("planner")
+            return real_get_planner(mode)
+
+        def lookup(inputs, mode):
+            events.append("lookup")
+            return real_lookup(inputs, mode)
+
+        with patch.object(prefetch, "start_prefetch", start), patch.object(crew, "get_planner", get_planner), \
+                patch.object(plan_cache, "lookup", lookup), patch("builtins.print"), \
+                Cassette(self.cassette_path, mode="record", upstream=self.upstream):
+            run_weekend(**self.INPUTS, mode="sequential")
+
+        self.assertEqual(events[:3], ["lookup", "prefetch", "planner"])
+        self.assertEqual(events.count("lookup"), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
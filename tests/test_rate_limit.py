@@ -0,0 +1,245 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import sys
+import os
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import googlemaps
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+# Add project root to sys.path to allow imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tools import google_maps_tool, openweather_tool
+from tools.google_maps_client import call_api, get_client, reset_clients
+from tools.google_maps_tool import GoogleMapsDirectionsTool
+from tools.rate_limit import RateLimiter, TokenBucket, get_limiter, limiter_stats, reset_limiters, retry_after
+
+
+def http_error(status, retry_after=None):
+    response = requests.Response()
+    response.status_code = status
+    if retry_after is not None:
+        response.headers["Retry-After"] = retry_after
+    return requests.HTTPError(f"{status} Error", response=response)
+
+
+class Flaky:
+    """Fails with the given errors, then returns "ok"; records the call times."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.times = []
+
+    def __call__(self):
+        self.times.append(time.monotonic())
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_burst_then_steady_rate(self):
+        bucket = TokenBucket(rate=20)
+        self.assertEqual([bucket.reserve() for _ in range(20)], [0.0] * 20)
+        # Later callers are told to wait for their turn, one token interval apart
+        waits = [bucket.reserve() for _ in range(3)]
+        for expected, wait in zip((0.05, 0.10, 0.15), waits):
+            self.assertAlmostEqual(wait, expected, delta=0.01)
+
+    def test_zero_rate_is_unlimited(self):
+        bucket = TokenBucket(rate=0)
+        self.assertEqual(sum(bucket.reserve() for _ in range(1000)), 0.0)
+
+
+class TestRetryAfter(unittest.TestCase):
+
+    def test_retryable_errors(self):
+        self.assertEqual(retry_after(http_error(429, "2")), 2.0)
+        self.assertEqual(retry_after(http_error(503)), 0.0)
+        self.assertEqual(retry_after(http_error(429, "Wed, 21 Oct 2026 07:28:00 GMT")), 0.0)
+        self.assertEqual(retry_after(googlemaps.exceptions._OverQueryLimit("OVER_QUERY_LIMIT", "quota")), 0.0)
+        self.assertEqual(retry_after(googlemaps.exceptions.HTTPError(502)), 0.0)
+        request = httpx.Request("GET", "https://api.open-meteo.com/v1/forecast")
+        response = httpx.Response(429, headers={"Retry-After": "1"}, request=request)
+        self.assertEqual(retry_after(httpx.HTTPStatusError("429", request=request, response=response)), 1.0)
+
+    def test_other_errors_are_not_retried(self):
+        self.assertIsNone(retry_after(http_error(404)))
+        self.assertIsNone(retry_after(googlemaps.exceptions.ApiError("REQUEST_DENIED")))
+        self.assertIsNone(retry_after(ValueError("bad input")))
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    def limiter(self, rate=0, concurrency=8, **kwargs):
+        return RateLimiter("test", rate=rate, concurrency=concurrency, backoff_base=0.01, backoff_max=0.5, **kwargs)
+
+    def test_requests_are_spread_over_the_budget(self):
+        limiter = self.limiter(rate=50)
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=10) as pool:
+            list(pool.map(lambda _: limiter.call(time.monotonic), range(75)))
+        # 50 from the full bucket, then 25 more at 50 per second
+        self.assertGreaterEqual(time.monotonic() - start, 0.45)
+        self.assertEqual(limiter.stats()["calls"], 75)
+        self.assertEqual(limiter.stats()["throttled"], 25)
+
+    def test_requests_in_flight_are_capped(self):
+        limiter = self.limiter(concurrency=3)
+        lock = threading.Lock()
+        in_flight = []
+        peak = []
+
+        def request():
+            with lock:
+                in_flight.append(1)
+                peak.append(len(in_flight))
+            time.sleep(0.02)
+            with lock:
+                in_flight.pop()
+
+        with ThreadPoolExecutor(max_workers=12) as pool:
+            list(pool.map(lambda _: limiter.call(request), range(24)))
+        self.assertEqual(max(peak), 3)
+
+    def test_429_is_retried_after_the_hint_and_pauses_other_callers(self):
+        limiter = self.limiter()
+        flaky = Flaky(http_error(429, "0.2"), http_error(503))
+
+        self.assertEqual(limiter.call(flaky), "ok")
+        self.assertGreaterEqual(flaky.times[1] - flaky.times[0], 0.2)
+        self.assertEqual(limiter.stats()["retries"], 2)
+
+        # A 429 holds off every caller of the API, not only the one that got it
+        limited = threading.Thread(target=limiter.call, args=(Flaky(http_error(429, "0.3")),))
+        limited.start()
+        while limiter.stats()["retries"] < 3:
+            time.sleep(0.005)
+        other = Flaky()
+        start = time.monotonic()
+        limiter.call(other)
+        limited.join()
+        self.assertGreaterEqual(other.times[0] - start, 0.2)
+        self.assertEqual(limiter.stats()["throttled"], 1)
+
+    def test_gives_up_after_max_retries(self):
+        limiter = self.limiter(max_retries=2)
+        flaky = Flaky(*(http_error(500) for _ in range(5)))
+        with self.assertRaises(requests.HTTPError):
+            limiter.call(flaky)
+        self.assertEqual(len(flaky.times), 3)
+        self.assertEqual(limiter.stats()["failures"], 1)
+
+        # Client errors are raised at once
+        flaky = Flaky(http_error(400))
+        with self.assertRaises(requests.HTTPError):
+            limiter.call(flaky)
+        self.assertEqual(len(flaky.times), 1)
+
+    def test_async_calls_share_the_budget(self):
+        limiter = self.limiter(rate=20, concurrency=2)
+        peak = []
+        in_flight = []
+
+        async def request(attempts):
+            in_flight.append(1)
+            peak.append(len(in_flight))
+            await asyncio.sleep(0.01)
+            in_flight.pop()
+            if attempts:
+                attempts.pop()
+                raise googlemaps.exceptions._OverQueryLimit("OVER_QUERY_LIMIT", "quota")
+            return "ok"
+
+        async def main():
+            return await asyncio.gather(*(limiter.acall(request, [1] if i == 0 else []) for i in range(25)))
+
+        start = time.monotonic()
+        self.assertEqual(asyncio.run(main()), ["ok"] * 25)
+        # 20 from the bucket plus 6 at 20 per second (one retry)
+        self.assertGreaterEqual(time.monotonic() - start, 0.25)
+        self.assertEqual(max(peak), 2)
+        self.assertEqual(limiter.stats()["retries"], 1)
+
+    @patch("tools.rate_limit.RATE_LIMIT", False)
+    def test_disabled(self):
+        limiter = self.limiter(rate=1)
+        flaky = Flaky(http_error(429))
+        with self.assertRaises(requests.HTTPError):
+            limiter.call(flaky)
+        self.assertEqual(limiter.stats()["calls"], 0)
+
+
+class TestToolsUseTheLimiters(unittest.TestCase):
+
+    def setUp(self):
+        reset_limiters()
+        self.addCleanup(reset_limiters)
+        env = patch.dict(os.environ, {"GOOGLE_MAPS_API_KEY": "AIza-test-key", "RATE_LIMIT_BACKOFF_BASE": "0"})
+        env.start()
+        self.addCleanup(env.stop)
+
+    def test_directions_retry_over_query_limit(self):
+        gmaps = MagicMock()
+        gmaps.directions.side_effect = [
+            googlemaps.exceptions._OverQueryLimit("OVER_QUERY_LIMIT", "quota"),
+            [{"legs": [{"duration": {"text": "40分"}, "distance": {"text": "30 km"}, "steps": []}]}],
+        ]
+        with patch("tools.google_maps_tool.get_client", return_value=gmaps), \
+                patch.dict(google_maps_tool._directions_caches, clear=True):
+            result = GoogleMapsDirectionsTool()._run("東京駅", "横浜駅", "transit", "2025-11-23T09:00:00")
+
+        self.assertIn("40分", result)
+        self.assertEqual(limiter_stats()["google_maps"]["retries"], 1)
+
+    def test_maps_client_leaves_server_errors_to_the_limiter(self):
+        statuses = [503, 200]
+        sent = []
+
+        class Upstream(HTTPAdapter):
+            def send(self, request, **kwargs):
+                sent.append(request.url)
+                response = requests.Response()
+                response.status_code = statuses.pop(0)
+                response._content = b'{"status": "OK", "routes": []}'
+                response.url, response.request = request.url, request
+                return response
+
+        self.addCleanup(reset_clients)
+        client = get_client("AIza-test-key")
+        client.session.mount("https://", Upstream())
+        self.assertEqual(call_api("directions", client.directions, "東京駅", "横浜駅"), [])
+
+        # One retry, made by the limiter rather than inside googlemaps.Client
+        self.assertEqual(len(sent), 2)
+        self.assertEqual(limiter_stats()["google_maps"]["retries"], 1)
+
+    def test_weather_retries_server_errors(self):
+        ok = MagicMock(status_code=200)
+        ok.json.return_value = {"results": [{"latitude": 35.68, "longitude": 139.76, "name": "東京"}]}
+        unavailable = MagicMock()
+        unavailable.raise_for_status.side_effect = http_error(503)
+        with patch("tools.openweather_tool.requests.get", side_effect=[unavailable, ok]) as get, \
+                patch.object(openweather_tool, "get_geocode_cache", return_value=None):
+            location = openweather_tool.OpenMeteoTool()._geocode("東京")
+
+        self.assertEqual(location["name"], "東京")
+        self.assertEqual(get.call_count, 2)
+        self.assertEqual(get_limiter("open_meteo").stats()["retries"], 1)
+
+    def test_budgets_come_from_the_environment(self):
+        with patch.dict(os.environ, {"RATE_LIMIT_SERPER_QPS": "2", "RATE_LIMIT_SERPER_CONCURRENCY": "1"}):
+            limiter = get_limiter("serper")
+        self.assertEqual((limiter.bucket.rate, limiter.concurrency), (2.0, 1))
+        self.assertIs(get_limiter("serper"), limiter)
+
+
+if __name__ == '__main__':
+    unittest.main()
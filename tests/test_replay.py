@@ -0,0 +1,107 @@
+import unittest
+import sys
+import os
+import asyncio
+import json
+import tempfile
+from pathlib import Path
+
+import httpx
+import requests
+
+# Add project root to sys.path to allow imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from replay import Cassette, normalize_url
+
+
+class Upstream:
+    """Counts requests and answers with the request number."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, method, url, headers, body):
+        self.calls.append((method, url, body))
+        payload = {"n": len(self.calls), "url": url}
+        return 200, {"Content-Type": "application/json", "Content-Encoding": "gzip"}, json.dumps(payload).encode("utf-8")
+
+
+class TestCassette(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = Path(self.tmp.name) / "cassette.json"
+        self.upstream = Upstream()
+
+    def record(self, *calls):
+        with Cassette(self.path, mode="record", upstream=self.upstream):
+            return [call() for call in calls]
+
+    def test_requests_round_trip(self):
+        recorded = self.record(lambda: requests.get("https://api.example.com/a", params={"q": "東京"}).json())
+        with Cassette(self.path) as cassette:
+            replayed = requests.get("https://api.example.com/a", params={"q": "東京"}).json()
+        self.assertEqual(replayed, recorded[0])
+        self.assertEqual(cassette.stats["hits"], 1)
+
+    def test_httpx_sync_and_async_round_trip(self):
+        async def fetch_async():
+            async with httpx.AsyncClient() as client:
+                return (await client.post("https://api.example.com/b", json={"x": 2})).json()
+
+        def fetch_sync():
+            with httpx.Client() as client:
+                return client.post("https://api.example.com/b", json={"x": 1}).json()
+
+        recorded = self.record(fetch_sync, lambda: asyncio.run(fetch_async()))
+        with Cassette(self.path):
+            # Bodies select the matching response regardless of order
+            self.assertEqual(asyncio.run(fetch_async()), recorded[1])
+            self.assertEqual(fetch_sync(), recorded[0])
+
+    def test_volatile_parameters_are_ignored(self):
+        self.record(lambda: requests.get("https://maps.example.com/json?origin=A&key=secret&departure_time=1").json())
+        with Cassette(self.path) as cassette:
+            requests.get("https://maps.example.com/json?departure_time=2&key=other&origin=A")
+        self.assertEqual(cassette.stats["hits"], 1)
+        interactions = json.loads(self.path.read_text(encoding="utf-8"))["interactions"]
+        self.assertEqual(interactions[0]["route"], "GET https://maps.example.com/json?origin=A")
+        self.assertEqual(normalize_url("https://x.test/p?b=2&a=1&key=k"), "https://x.test/p?a=1&b=2")
+
+    def test_unmatched_body_falls_back_to_the_same_url_in_order(self):
+        self.record(
+            lambda: requests.post("https://llm.example.com/chat", json={"prompt": "one"}).json(),
+            lambda: requests.post("https://llm.example.com/chat", json={"prompt": "two"}).json(),
+        )
+        with Cassette(self.path) as cassette:
+            first = requests.post("https://llm.example.com/chat", json={"prompt": "changed"}).json()
+            second = requests.post("https://llm.example.com/chat", json={"prompt": "changed again"}).json()
+        self.assertEqual([first["n"], second["n"]], [1, 2])
+        self.assertEqual(cassette.stats["fallbacks"], 2)
+
+        with Cassette(self.path, strict=True) as cassette:
+            with self.assertRaises(requests.ConnectionError):
+                requests.post("https://llm.example.com/chat", json={"prompt": "changed"})
+        self.assertEqual(cassette.missed, ["POST https://llm.example.com/chat"])
+
+    def test_replay_never_reaches_the_network(self):
+        self.record()
+        with Cassette(self.path) as cassette:
+            with self.assertRaises(requests.ConnectionError):
+                requests.get("https://api.example.com/missing")
+            with self.assertRaises(httpx.ConnectError):
+                httpx.get("https://api.example.com/missing")
+        self.assertEqual(cassette.stats["misses"], 2)
+        self.assertEqual(self.upstream.calls, [])
+
+    def test_transports_are_restored(self):
+        send = requests.adapters.HTTPAdapter.send
+        with Cassette(self.path, mode="record", upstream=self.upstream):
+            self.assertIsNot(requests.adapters.HTTPAdapter.send, send)
+        self.assertIs(requests.adapters.HTTPAdapter.send, send)
+
+
+if __name__ == '__main__':
+    unittest.main()
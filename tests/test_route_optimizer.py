@@ -0,0 +1,183 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import sys
+import os
+import itertools
+import json
+import random
+import time
+
+# Add project root to sys.path to allow imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tools import route_optimizer
+from tools.route_optimizer import INF, RouteOptimizerTool, schedule, solve_route
+
+# Positions on a line (minutes from home at 0) used by the fake matrices
+POSITIONS = {"東京駅": 0, "上野": 10, "浅草": 20, "押上": 30, "亀有": 45}
+
+
+def line_matrix(origins, destinations, mode, departure_time, language):
+    """Travel time is the distance between the places on POSITIONS' line."""
+    return {
+        'rows': [
+            {'elements': [
+                {'status': 'OK', 'duration': {'value': abs(POSITIONS[o] - POSITIONS[d]) * 60, 'text': ""}}
+                for d in destinations
+            ]}
+            for o in origins
+        ]
+    }
+
+
+def random_instance(rng, n):
+    points = [(rng.random() * 10, rng.random() * 10) for _ in range(n + 1)]
+    travel = [[((a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2) ** 0.5 * 6 for b in points] for a in points]
+    stays = [0] + [rng.choice([30, 45, 60, 90]) for _ in range(n)]
+    windows = [(0, INF)] + [(rng.choice([0, 60, 120]), rng.choice([INF, 400, 500])) for _ in range(n)]
+    scores = [0] + [rng.choice([1, 1, 2]) for _ in range(n)]
+    return travel, stays, windows, scores
+
+
+def brute_force(travel, stays, windows, horizon, scores):
+    """(total score, return time) of the best order over every permutation of every subset."""
+    best = (0, 0.0)
+    places = range(1, len(travel))
+    for size in range(1, len(travel)):
+        for order in itertools.permutations(places, size):
+            result = schedule(order, travel, stays, windows, horizon)
+            if result is not None:
+                best = max(best, (sum(scores[p] for p in order), -result[1]))
+    return best
+
+
+def value(order, travel, stays, windows, horizon, scores):
+    result = schedule(order, travel, stays, windows, horizon)
+    return (sum(scores[p] for p in order), -result[1]) if order else (0, 0.0)
+
+
+class TestSolver(unittest.TestCase):
+
+    def test_exact_solution_matches_brute_force(self):
+        rng = random.Random(7)
+        for _ in range(40):
+            n = rng.randint(1, 6)
+            travel, stays, windows, scores = random_instance(rng, n)
+            horizon = rng.choice([240, 360, 540])
+            order, method = solve_route(travel, stays, windows, horizon, scores)
+
+            self.assertEqual(method, "exact")
+            expected = brute_force(travel, stays, windows, horizon, scores)
+            got = value(order, travel, stays, windows, horizon, scores)
+            self.assertEqual(got[0], expected[0])
+            self.assertAlmostEqual(got[1], expected[1], places=6)
+
+    def test_waits_for_opening_and_respects_closing(self):
+        # 1 and 2 are equally far; 2 opens late, 1 closes early
+        travel = [[0, 10, 10], [10, 0, 5], [10, 5, 0]]
+        windows = [(0, INF), (0, 100), (120, 300)]
+        order, _ = solve_route(travel, [0, 60, 60], windows, horizon=400)
+        rows, back = schedule(order, travel, [0, 60, 60], windows, 400)
+
+        self.assertEqual(order, [1, 2])
+        self.assertEqual(rows[1], (75, 120, 180))
+        self.assertEqual(back, 190)
+
+    def test_drops_the_lowest_priority_when_time_runs_out(self):
+        travel = [[0, 10, 10, 10]] + [[10, 0, 1, 1], [10, 1, 0, 1], [10, 1, 1, 0]]
+        order, _ = solve_route(travel, [0, 60, 60, 60], [(0, INF)] * 4, horizon=150, scores=[0, 1, 3, 2])
+        self.assertEqual(sorted(order), [2, 3])
+
+        order, _ = solve_route(travel, [0, 60, 60, 60], [(0, INF)] * 4, horizon=30)
+        self.assertEqual(order, [])
+
+    def test_heuristic_for_many_stops_is_feasible_and_fast(self):
+        rng = random.Random(3)
+        travel, stays, windows, scores = random_instance(rng, 20)
+        start = time.perf_counter()
+        order, method = solve_route(travel, stays, windows, 600, scores)
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(method, "heuristic")
+        self.assertIsNotNone(schedule(order, travel, stays, windows, 600))
+        self.assertEqual(len(set(order)), len(order))
+        self.assertLess(elapsed, 1.0)
+
+    def test_heuristic_is_close_to_exact(self):
+        rng = random.Random(11)
+        exact_total = heuristic_total = 0
+        for _ in range(20):
+            travel, stays, windows, scores = random_instance(rng, 8)
+            exact, _ = solve_route(travel, stays, windows, 480, scores)
+            with patch.object(route_optimizer, "EXACT_MAX_STOPS", 0):
+                heuristic, method = solve_route(travel, stays, windows, 480, scores)
+            self.assertEqual(method, "heuristic")
+            self.assertIsNotNone(schedule(heuristic, travel, stays, windows, 480))
+            exact_total += value(exact, travel, stays, windows, 480, scores)[0]
+            heuristic_total += value(heuristic, travel, stays, windows, 480, scores)[0]
+        self.assertGreaterEqual(heuristic_total, 0.9 * exact_total)
+
+
+@patch.dict(os.environ, {"GOOGLE_MAPS_API_KEY": "AIza-test-key"})
+class TestRouteOptimizerTool(unittest.TestCase):
+
+    def setUp(self):
+        self.gmaps = MagicMock()
+        self.gmaps.distance_matrix.side_effect = line_matrix
+        patcher = patch('tools.google_maps_tool.get_client', return_value=self.gmaps)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_tool(self, **kwargs):
+        arguments = {
+            "home": "東京駅",
+            "venues": ["押上", "上野", "浅草"],
+            "departure_time": "09:00",
+            "return_time": "18:00",
+            "date": "2025-11-23",
+        }
+        return RouteOptimizerTool(output_format="json")._run(**{**arguments, **kwargs})
+
+    def test_orders_venues_along_the_way(self):
+        plan = json.loads(self.run_tool())
+
+        self.assertEqual([stop["place"] for stop in plan["stops"]], ["上野", "浅草", "押上"])
+        self.assertEqual(plan["stops"][0]["arrival"], "09:10")
+        # Three 10-minute hops and three 60-minute stays, then 30 minutes home
+        self.assertEqual(plan["return_time"], "13:00")
+        self.assertEqual(plan["total_travel_minutes"], 60)
+        self.assertEqual(plan["method"], "exact")
+        self.assertEqual(self.gmaps.distance_matrix.call_count, 1)
+
+    def test_opening_hours_and_deadline(self):
+        plan = json.loads(self.run_tool(
+            venues=["押上", "上野", "亀有"],
+            opening_hours=["", "", "10:00-11:00"],
+            stay_minutes=[60, 60, 30],
+            priorities=[1, 1, 2],
+            return_time="11:30",
+        ))
+        # Nothing else fits around 亀有's opening hours before the deadline
+        self.assertEqual([stop["place"] for stop in plan["stops"]], ["亀有"])
+        self.assertEqual(plan["stops"][0]["wait_minutes"], 15)
+        self.assertEqual(plan["stops"][0]["start"], "10:00")
+        self.assertEqual(sorted(plan["skipped"]), ["上野", "押上"])
+
+    def test_markdown_timeline(self):
+        result = RouteOptimizerTool()._run(
+            home="東京駅", venues=["浅草", "上野"], departure_time="2025-11-23T09:00:00", return_time="18:00",
+        )
+        self.assertIn("# 訪問順序の最適化（候補2件中 2件を訪問）", result)
+        self.assertIn("| 1 | 上野 | 09:10 | 60分 | 10:10 | 10分 |", result)
+        self.assertIn("| - | 東京駅（帰宅） | 11:40 |", result)
+
+    def test_invalid_arguments(self):
+        self.assertTrue(self.run_tool(venues=[]).startswith("エラー"))
+        self.assertTrue(self.run_tool(stay_minutes=[60]).startswith("エラー"))
+        self.assertTrue(self.run_tool(opening_hours=["朝", "", ""]).startswith("エラー"))
+        self.assertTrue(self.run_tool(return_time="08:00").startswith("エラー"))
+        self.gmaps.distance_matrix.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,175 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import json
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+# Add project root to sys.path to allow imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import crew
+from replay import Cassette
+from server import PlanningServer, PlanningService
+from tests.fake_upstream import FAKE_ENV, fake_upstream, reset_tool_caches
+
+INPUTS = {
+    'location': '東京23区',
+    'interests': 'カフェ巡りと美術館',
+    'budget': '1人1万円',
+    'companions': '友人1人',
+    'date': '2025年11月22日',
+    'home': '東京駅',
+    'departure_time': '09:00',
+    'return_time': '18:00',
+}
+
+
+class GatedPlanner:
+    """Plans only while the gate is open; counts the plans it made."""
+
+    def __init__(self):
+        self.gate = threading.Event()
+        self.calls = []
+
+    def __call__(self, inputs, mode, on_task=None):
+        if on_task:
+            on_task("fetch_weather", "晴れ", 0.1)
+        self.gate.wait(5)
+        if inputs['location'] == '失敗':
+            raise RuntimeError("LLM unavailable")
+        self.calls.append((inputs['location'], mode))
+        return f"{inputs['location']}のプラン ({mode})"
+
+
+class ServerTestCase(unittest.TestCase):
+
+    def serve(self, service):
+        service.start()
+        self.addCleanup(service.stop)
+        server = PlanningServer(("127.0.0.1", 0), service)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.base = f"http://127.0.0.1:{server.server_port}"
+
+    def request(self, method, path, payload=None, timeout=10):
+        data = None if payload is None else json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        request = urllib.request.Request(self.base + path, data=data, method=method)
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                return response.status, dict(response.headers), json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, dict(e.headers), json.loads(e.read())
+
+    def poll(self, job_id, timeout=5):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            _, _, job = self.request("GET", f"/plans/{job_id}")
+            if job["status"] in ("done", "error"):
+                return job
+            time.sleep(0.02)
+        self.fail(f"job {job_id} did not finish")
+
+
+class TestPlanningServer(ServerTestCase):
+
+    def setUp(self):
+        self.planner = GatedPlanner()
+        self.serve(PlanningService(workers=1, queue_size=1, mode="sequential", planner=self.planner))
+        self.addCleanup(self.planner.gate.set)
+
+    def test_submit_and_poll(self):
+        status, headers, job = self.request("POST", "/plans", {"location": "横浜"})
+        self.assertEqual(status, 202)
+        self.assertEqual(headers["Location"], f"/plans/{job['id']}")
+        self.assertIn(job["status"], ("queued", "running"))
+
+        self.planner.gate.set()
+        job = self.poll(job["id"])
+        self.assertEqual(job["raw"], "横浜のプラン (sequential)")
+        # Missing fields fall back to the CLI defaults
+        self.assertEqual(job["inputs"]["companions"], "友人2人")
+
+    def test_wait_returns_the_finished_plan(self):
+        self.planner.gate.set()
+        status, _, job = self.request("POST", "/plans?wait=1", {**INPUTS, "mode": "parallel"})
+        self.assertEqual(status, 200)
+        self.assertEqual(job["raw"], "東京23区のプラン (parallel)")
+
+        status, _, job = self.request("POST", "/plans", {"location": "失敗", "wait": True})
+        self.assertEqual(status, 500)
+        self.assertEqual(job["error"], "LLM unavailable")
+
+    def test_full_queue_is_rejected_with_retry_after(self):
+        first = self.request("POST", "/plans", {"location": "横浜"})[2]
+        # Wait until the worker holds the first job, so the second one fills the queue
+        while self.request("GET", "/health")[2]["running"] != 1:
+            time.sleep(0.01)
+        self.assertEqual(self.request("POST", "/plans", {"location": "鎌倉"})[0], 202)
+
+        status, headers, body = self.request("POST", "/plans", {"location": "箱根"})
+        self.assertEqual(status, 429)
+        self.assertGreaterEqual(int(headers["Retry-After"]), 1)
+        self.assertEqual(self.request("GET", "/health")[2]["queued"], 1)
+
+        self.planner.gate.set()
+        self.poll(first["id"])
+        self.assertEqual([location for location, _ in self.planner.calls][:1], ["横浜"])
+
+    def test_task_outputs_are_streamed_as_events(self):
+        status, _, job = self.request("POST", "/plans", {"location": "横浜"})
+        with urllib.request.urlopen(f"{self.base}/plans/{job['id']}/events", timeout=10) as response:
+            self.assertEqual(response.headers["Content-Type"], "text/event-stream; charset=utf-8")
+            # The weather arrives while the plan is still blocked
+            self.assertEqual(response.readline(), b"event: task\n")
+            weather = json.loads(response.readline()[len(b"data: "):])
+            self.assertEqual((weather["title"], weather["raw"]), ("天気予報", "晴れ"))
+            self.assertEqual(self.request("GET", f"/plans/{job['id']}")[2]["tasks"][0]["task"], "fetch_weather")
+
+            self.planner.gate.set()
+            rest = response.read().decode("utf-8")
+        self.assertIn("event: done\n", rest)
+        self.assertIn("横浜のプラン (sequential)", rest)
+
+    def test_bad_requests(self):
+        self.assertEqual(self.request("POST", "/plans", {"mode": "fastest"})[0], 400)
+        self.assertEqual(self.request("POST", "/plans", ["東京"])[0], 400)
+        self.assertEqual(self.request("GET", "/plans/unknown")[0], 404)
+        self.assertEqual(self.request("GET", "/nowhere")[0], 404)
+
+
+class TestWarmCrews(ServerTestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        # build_itinerary writes its output file relative to the working directory
+        cwd = os.getcwd()
+        os.chdir(tmp.name)
+        self.addCleanup(os.chdir, cwd)
+        env = patch.dict(os.environ, {**FAKE_ENV, "WEEKEND_PLANNER_CACHE_DIR": os.path.join(tmp.name, "cache")})
+        env.start()
+        self.addCleanup(env.stop)
+        reset_tool_caches()
+        self.addCleanup(reset_tool_caches)
+
+    def test_worker_builds_its_crew_once(self):
+        with patch.object(crew, "WeekendPlanner", wraps=crew.WeekendPlanner) as planner_class, \
+                Cassette(os.path.join(os.getcwd(), "server.json"), mode="record", upstream=fake_upstream):
+            self.serve(PlanningService(workers=1, mode="sequential", use_cache=False))
+            for location in ("東京23区", "横浜"):
+                status, _, job = self.request("POST", "/plans?wait=1", {**INPUTS, "location": location}, timeout=60)
+                self.assertEqual(status, 200, job)
+                self.assertTrue(job["raw"])
+
+        self.assertEqual(planner_class.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
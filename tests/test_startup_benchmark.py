@@ -0,0 +1,139 @@
+"""
+Startup-time benchmark: CLI start, crew import and crew construction.
+
+The CLI commands and the batch workers only import crewai once a crew has
+to run (a cached plan or a completed run never imports it), the SerperDevTool is loaded without the crewai_tools catalog, the
+YAML configs are parsed once per process and a planner's crew is built once
+and reused. Imports are timed in fresh interpreters.
+
+Budgets (regressions fail the suite) can be tuned with environment variables:
+
+    STARTUP_MAX_HELP_SECONDS     `main.py --help` wall time (default 2)
+    STARTUP_MAX_PLANNER_SECONDS  WeekendPlanner() + crew() after the first one (default 0.5)
+"""
+
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import json
+import subprocess
+import tempfile
+import threading
+import time
+
+# Add project root to sys.path to allow imports
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+import crew
+from crew import WeekendPlanner, shared_planner
+from tests.fake_upstream import FAKE_ENV
+
+# Modules the CLI must not import before a crew runs
+HEAVY_MODULES = ("crewai", "crewai_tools", "googlemaps", "litellm")
+
+
+def budget(name, default):
+    return float(os.getenv(name, default))
+
+
+def run_python(*args, env=None):
+    """Run a fresh interpreter in the project root; returns (seconds, stdout)."""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, *args], cwd=ROOT, env={**os.environ, **FAKE_ENV, **(env or {})},
+        capture_output=True, text=True, check=True,
+    )
+    return time.perf_counter() - start, result.stdout
+
+
+class TestStartupBenchmark(unittest.TestCase):
+
+    report = {}
+
+    @classmethod
+    def tearDownClass(cls):
+        print("\n" + json.dumps(cls.report, ensure_ascii=False, indent=1))
+
+    def test_cli_starts_without_crewai(self):
+        _, out = run_python("-c", (
+            "import json, sys, main, batch\n"
+            f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+        ))
+        self.assertEqual(json.loads(out), [])
+
+        seconds, out = run_python("main.py", "--help")
+        self.assertIn("--mode", out)
+        self.report["main_help_seconds"] = round(seconds, 3)
+        self.assertLess(seconds, budget("STARTUP_MAX_HELP_SECONDS", 2))
+
+    def test_cached_plan_and_completed_run_skip_crewai(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            _, out = run_python("-c", (
+                "import contextlib, io, json, sys, main, plan_cache\n"
+                "from checkpoints import RunCheckpoint\n"
+                "inputs = dict(main.DEFAULT_INPUTS, date='2025年11月22日')\n"
+                "plan_cache.store(inputs, 'sequential', 'キャッシュ済みのプラン')\n"
+                "run = RunCheckpoint.create(inputs, 'sequential')\n"
+                "run.finish('完了済みのプラン')\n"
+                "with contextlib.redirect_stdout(io.StringIO()):\n"
+                "    raws = [main.run_weekend(**inputs, mode='sequential', breakdown=True),\n"
+                "            main.run_weekend(**inputs, resume=run.run_id)]\n"
+                f"print(json.dumps([raws, [m for m in {HEAVY_MODULES!r} if m in sys.modules]], ensure_ascii=False))"
+            ), env={"WEEKEND_PLANNER_CACHE_DIR": tmp})
+        raws, imported = json.loads(out)
+        self.assertEqual(raws, ["キャッシュ済みのプラン", "完了済みのプラン"])
+        self.assertEqual(imported, [])
+
+    def test_crew_loads_only_the_serper_tool(self):
+        _, out = run_python("-c", (
+            "import json, sys, time\n"
+            "start = time.perf_counter()\n"
+            "import crew\n"
+            "imported = time.perf_counter() - start\n"
+            "crew.WeekendPlanner().crew()\n"
+            "print(json.dumps({'import': imported, 'built': time.perf_counter() - start,\n"
+            "                  'catalog': 'crewai_tools' in sys.modules}))"
+        ))
+        result = json.loads(out)
+        self.report["crew_import_seconds"] = round(result["import"], 3)
+        self.report["first_crew_seconds"] = round(result["built"], 3)
+        self.assertFalse(result["catalog"])
+
+    def test_configs_are_parsed_once(self):
+        crew._parse_yaml.cache_clear()
+        with patch.dict(os.environ, FAKE_ENV), patch("crew.yaml.safe_load", wraps=crew.yaml.safe_load) as safe_load:
+            first = WeekendPlanner(mode="sequential")
+            start = time.perf_counter()
+            second = WeekendPlanner(mode="sequential")
+            second.crew()
+            elapsed = time.perf_counter() - start
+
+        self.assertEqual(safe_load.call_count, 2)
+        # CrewBase replaces agent names with Agent objects in place; the memoized data stays untouched
+        self.assertIsNot(first.tasks_config, second.tasks_config)
+        memoized = crew.load_config(WeekendPlanner.base_directory / WeekendPlanner.tasks_config)
+        self.assertEqual(memoized['fetch_weather']['agent'], 'weather_specialist')
+        self.report["planner_seconds"] = round(elapsed, 4)
+        self.assertLess(elapsed, budget("STARTUP_MAX_PLANNER_SECONDS", 0.5))
+
+    def test_shared_planner_builds_the_crew_once_per_thread(self):
+        with patch.dict(os.environ, FAKE_ENV):
+            planner = shared_planner("parallel")
+            built = planner.crew()
+            start = time.perf_counter()
+            self.assertIs(shared_planner("parallel").crew(), built)
+            self.report["reused_crew_seconds"] = round(time.perf_counter() - start, 6)
+
+            other = []
+            worker = threading.Thread(target=lambda: other.append(shared_planner("parallel")))
+            worker.start()
+            worker.join()
+
+        self.assertIsNot(other[0], planner)
+        self.assertIsNot(shared_planner("sequential"), planner)
+
+
+if __name__ == '__main__':
+    unittest.main()
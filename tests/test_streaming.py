@@ -0,0 +1,89 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import io
+import tempfile
+from contextlib import redirect_stdout
+
+# Add project root to sys.path to allow imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from main import run_weekend
+from pipeline import TASK_DEPENDENCIES, TASK_TITLES
+from replay import Cassette
+from streaming import format_task_output, stream_weekend, task_event
+from tests.fake_upstream import FAKE_ENV, fake_upstream, reset_tool_caches
+
+INPUTS = {
+    'location': "鎌倉",
+    'interests': "寺社巡りと海辺の散歩",
+    'budget': "1人8000円",
+    'companions': "友人1人",
+    'date': "2025年11月29日",
+    'home': "東京駅",
+    'departure_time': "09:00",
+    'return_time': "18:00",
+}
+
+
+class TestTaskEvents(unittest.TestCase):
+
+    def test_task_event_and_section(self):
+        event = task_event("fetch_weather", "晴れ時々曇り", 1.23456)
+        self.assertEqual(event, {"event": "task", "task": "fetch_weather", "title": "天気予報",
+                                 "raw": "晴れ時々曇り", "elapsed": 1.235})
+        self.assertEqual(format_task_output("fetch_weather", " 晴れ \n", 1.2), "## 天気予報 （1.2s）\n\n晴れ\n")
+        self.assertEqual(set(TASK_TITLES), set(TASK_DEPENDENCIES) | {"coordinate_planning"})
+
+
+class TestStreamingReplay(unittest.TestCase):
+    """Task outputs of recorded crew runs arrive before the finished plan."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        # build_itinerary writes its output file relative to the working directory
+        cwd = os.getcwd()
+        os.chdir(tmp.name)
+        self.addCleanup(os.chdir, cwd)
+        env = patch.dict(os.environ, {**FAKE_ENV, "WEEKEND_PLANNER_CACHE_DIR": os.path.join(tmp.name, "cache")})
+        env.start()
+        self.addCleanup(env.stop)
+        reset_tool_caches()
+        self.addCleanup(reset_tool_caches)
+        self.cassette_path = os.path.join(tmp.name, "stream.json")
+
+    def test_stream_yields_every_task_then_the_plan(self):
+        with Cassette(self.cassette_path, mode="record", upstream=fake_upstream):
+            events = list(stream_weekend(INPUTS, mode="sequential"))
+
+        *tasks, done = events
+        self.assertEqual(done["event"], "done", done)
+        self.assertEqual([event["task"] for event in tasks], list(TASK_DEPENDENCIES))
+        self.assertEqual(tasks[-1]["raw"], done["raw"])
+        self.assertTrue(all(event["raw"] for event in tasks))
+        elapsed = [event["elapsed"] for event in events]
+        self.assertEqual(elapsed, sorted(elapsed))
+
+        # A cached plan has no task outputs to stream
+        with Cassette(self.cassette_path):
+            cached = list(stream_weekend(INPUTS, mode="sequential"))
+        self.assertEqual([event["event"] for event in cached], ["done"])
+
+    def test_cli_prints_sections_as_tasks_finish(self):
+        out = io.StringIO()
+        with Cassette(self.cassette_path, mode="record", upstream=fake_upstream), redirect_stdout(out):
+            raw = run_weekend(**INPUTS, mode="parallel", use_cache=False, stream=True)
+
+        printed = out.getvalue()
+        positions = [printed.find(f"## {TASK_TITLES[name]} （") for name in TASK_DEPENDENCIES]
+        self.assertNotIn(-1, positions)
+        self.assertEqual(positions[-1], max(positions))
+        # The plan itself is the itinerary section
+        self.assertIn(f"## {TASK_TITLES['build_itinerary']} （", printed)
+        self.assertIn(f"）\n\n{raw.strip()}\n", printed[positions[-1]:])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import sys
+import os
+
+# Add project root to sys.path to allow imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from crew import TASK_DEPENDENCIES, WeekendPlanner, dependency_layers
+from timeline import TaskTimeline
+
+
+class TestDependencyLayers(unittest.TestCase):
+
+    def test_independent_tasks_share_a_layer(self):
+        layers = dependency_layers(TASK_DEPENDENCIES)
+        self.assertEqual(layers[0], ["fetch_weather", "explore_local_options"])
+        self.assertEqual(layers[1], ["craft_recommendations"])
+        self.assertEqual(layers[-1], ["build_itinerary"])
+
+    def test_cycle_is_rejected(self):
+        with self.assertRaises(ValueError):
+            dependency_layers({"a": ["b"], "b": ["a"]})
+
+
+class TestParallelCrew(unittest.TestCase):
+
+    def test_parallel_mode_wires_context_and_async_layers(self):
+        planner = WeekendPlanner(mode="parallel")
+        crew = planner.crew()
+        tasks = {task.name: task for task in crew.tasks}
+
+        self.assertNotIn("coordinate_planning", tasks)
+        self.assertIsNone(crew.manager_agent)
+        self.assertTrue(tasks["fetch_weather"].async_execution)
+        self.assertTrue(tasks["explore_local_options"].async_execution)
+        self.assertFalse(tasks["craft_recommendations"].async_execution)
+        self.assertEqual(
+            [task.name for task in tasks["craft_recommendations"].context],
+            ["fetch_weather", "explore_local_options"],
+        )
+        self.assertIsNotNone(planner.timeline)
+
+    def test_unknown_mode_is_rejected(self):
+        with self.assertRaises(ValueError):
+            WeekendPlanner(mode="fastest")
+
+
+class TestTaskTimeline(unittest.TestCase):
+
+    def test_critical_path_follows_the_last_finishing_dependency(self):
+        timeline = TaskTimeline(TASK_DEPENDENCIES)
+        timeline.record_start("fetch_weather", at=0.0)
+        timeline.record_start("explore_local_options", at=0.0)
+        timeline.record_end("fetch_weather", at=2.0)
+        timeline.record_end("explore_local_options", at=5.0)
+        timeline.record_start("craft_recommendations", at=5.0)
+        timeline.record_end("craft_recommendations", at=7.0)
+
+        self.assertEqual(timeline.critical_path(), ["explore_local_options", "craft_recommendations"])
+        self.assertEqual(timeline.wall_time(), 7.0)
+        spans = {span["name"]: span for span in timeline.spans()}
+        self.assertEqual(spans["fetch_weather"]["duration"], 2.0)
+        self.assertIn("explore_local_options * |", timeline.summary())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import sys
+import os
+import asyncio
+from typing import Optional, Type
+
+# Add project root to sys.path to allow imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import googlemaps
+from crewai.tools import BaseTool
+from pydantic import BaseModel, Field
+
+from crew import WeekendPlanner
+from tools.google_maps_tool import GoogleMapsDirectionsTool
+from tools.output import ToolError
+from tools.tool_cache import CachedTool, ToolCallCache
+
+
+class RouteInput(BaseModel):
+    origin: str = Field(..., description="出発地")
+    destination: str = Field(..., description="目的地")
+    mode: Optional[str] = Field(default="transit", description="移動手段")
+
+
+class CountingTool(BaseTool):
+    name: str = "経路"
+    description: str = "テスト用の経路ツール"
+    args_schema: Type[BaseModel] = RouteInput
+    calls: int = 0
+
+    def _run(self, origin: str, destination: str, mode: Optional[str] = "transit") -> str:
+        self.calls += 1
+        if destination == "不明":
+            return ToolError("エラー: 経路が見つかりませんでした。")
+        return f"{origin}→{destination} ({mode})"
+
+
+class TestCachedTool(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = ToolCallCache()
+        self.inner = CountingTool()
+        self.tool = CachedTool.wrap(self.inner, self.cache)
+
+    def test_validated_arguments_share_one_entry(self):
+        first = self.tool.run(origin="東京駅", destination="横浜駅")
+        second = self.tool.run(destination="横浜駅", origin="東京駅", mode="transit")
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.inner.calls, 1)
+        self.assertEqual(self.cache.stats()["経路"]["hits"], 1)
+        self.assertEqual(self.cache.stats()["経路"]["hit_rate"], 0.5)
+
+    def test_errors_are_not_cached(self):
+        self.tool.run(origin="東京駅", destination="不明")
+        self.tool.run(origin="東京駅", destination="不明")
+        self.assertEqual(self.inner.calls, 2)
+
+    @patch.dict(os.environ, {"GOOGLE_MAPS_API_KEY": "AIza-test-key"})
+    def test_maps_api_errors_are_not_cached(self):
+        """A transient UNKNOWN_ERROR is retried on the next call instead of being replayed."""
+        gmaps = MagicMock()
+        gmaps.directions.side_effect = googlemaps.exceptions.ApiError("UNKNOWN_ERROR")
+        tool = CachedTool.wrap(GoogleMapsDirectionsTool(), self.cache)
+        with patch("tools.google_maps_tool.get_client", return_value=gmaps):
+            first = tool.run(origin="東京駅", destination="横浜駅")
+            second = tool.run(origin="東京駅", destination="横浜駅")
+
+        self.assertEqual(first, "Google Maps APIエラー: UNKNOWN_ERROR")
+        self.assertEqual(second, first)
+        self.assertEqual(gmaps.directions.call_count, 2)
+        self.assertEqual(self.cache.stats()[tool.name]["hits"], 0)
+
+    def test_async_invocation_uses_the_same_cache(self):
+        self.tool.run(origin="東京駅", destination="渋谷駅")
+        result = asyncio.run(
+            self.tool.to_structured_tool().ainvoke({"origin": "東京駅", "destination": "渋谷駅"})
+        )
+        self.assertEqual(result, "東京駅→渋谷駅 (transit)")
+        self.assertEqual(self.inner.calls, 1)
+
+    def test_wrapper_keeps_name_and_description(self):
+        self.assertEqual(self.tool.name, self.inner.name)
+        self.assertEqual(self.tool.description, self.inner.description)
+
+
+class TestCrewToolCache(unittest.TestCase):
+
+    def test_agents_share_the_planner_cache(self):
+        planner = WeekendPlanner(mode="sequential")
+        crew = planner.crew()
+        tools = [tool for agent in crew.agents for tool in agent.tools]
+
+        self.assertTrue(tools)
+        self.assertTrue(all(isinstance(tool, CachedTool) for tool in tools))
+        self.assertTrue(all(tool.cache is planner.tool_cache for tool in tools))
+
+    def test_per_run_cache_is_cleared_before_kickoff(self):
+        planner = WeekendPlanner()
+        planner.tool_cache.set("key", "value")
+        planner.reset_tool_cache({})
+        self.assertEqual(planner.tool_cache.stats(), {})
+        self.assertIsNone(planner.tool_cache.get("tool", "key"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,230 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import sys
+import os
+import asyncio
+import json
+import tempfile
+import time
+from datetime import date, datetime
+
+import numpy as np
+
+# Add project root to sys.path to allow imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from build_travel_index import bucket_departures, build_index, next_saturday
+from tools import travel_index
+from tools.google_maps_tool import GoogleMapsDistanceMatrixTool, fetch_duration_matrix
+from tools.travel_index import TravelIndex, format_distance, format_duration, get_travel_index, reset_travel_index, save_index
+
+# Positions on a line (minutes from 東京駅) used by the fake matrices
+POSITIONS = {"東京駅": 0, "上野": 10, "浅草": 20, "押上": 30, "亀有": 45}
+MODES = ["driving", "transit", "walking"]
+# Walking is five times slower than the other modes
+SPEED = {"driving": 1, "transit": 1, "walking": 5}
+# Driving takes twice as long in traffic
+TRAFFIC = 2
+
+
+def line_matrix(origins, destinations, mode, departure_time, language="ja"):
+    """Distance Matrix response for places on POSITIONS' line (1 minute = 500 m)."""
+    def element(o, d):
+        minutes = abs(POSITIONS[o] - POSITIONS[d])
+        element = {
+            'status': 'OK',
+            'duration': {'value': minutes * 60 * SPEED[mode], 'text': f"{minutes * SPEED[mode]}分"},
+            'distance': {'value': minutes * 500, 'text': ""},
+        }
+        if mode == "driving":
+            element['duration_in_traffic'] = {'value': minutes * 60 * TRAFFIC, 'text': f"{minutes * TRAFFIC}分"}
+        return element
+    return {'rows': [{'elements': [element(o, d) for d in destinations]} for o in origins]}
+
+
+def fake_fetch(origins, destinations, mode, departure):
+    rows = line_matrix(origins, destinations, mode, departure)['rows']
+    return {(i, j): element for i, row in enumerate(rows) for j, element in enumerate(row['elements'])}
+
+
+class TravelIndexTestCase(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.directory = tmp.name
+        env = patch.dict(os.environ, {"TRAVEL_INDEX_DIR": tmp.name, "GOOGLE_MAPS_API_KEY": "AIza-test-key"})
+        env.start()
+        self.addCleanup(env.stop)
+        reset_travel_index()
+        self.addCleanup(reset_travel_index)
+        self.gmaps = MagicMock()
+        self.gmaps.distance_matrix.side_effect = line_matrix
+        patcher = patch('tools.google_maps_tool.get_client', return_value=self.gmaps)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def build(self, origins, destinations, hours=(6, 21)):
+        data = build_index(origins, destinations, MODES, date(2025, 11, 22), hours, bucket_hours=3, fetch=fake_fetch)
+        save_index(self.directory, data, MODES, origins, destinations, 3, "2025-11-22")
+        return data
+
+
+class TestBuildIndex(TravelIndexTestCase):
+
+    def test_buckets_cover_the_requested_hours(self):
+        departures = bucket_departures(date(2025, 11, 22), (6, 21), 3)
+        self.assertEqual([bucket for bucket, _ in departures], [2, 3, 4, 5, 6])
+        self.assertEqual(departures[0][1], datetime(2025, 11, 22, 7, 30))
+        self.assertEqual(next_saturday(date(2025, 11, 20)), date(2025, 11, 22))
+        self.assertEqual(next_saturday(date(2025, 11, 22)), date(2025, 11, 29))
+
+    def test_saved_index_is_memory_mapped(self):
+        data = self.build(["東京駅", "上野"], ["浅草", "押上", "亀有"])
+        self.assertEqual(data.shape, (3, 8, 2, 3, 3))
+        # Buckets outside the built hours stay empty
+        self.assertTrue(np.isnan(data[:, 0]).all())
+
+        index = get_travel_index()
+        self.assertIsInstance(index.data, np.memmap)
+        self.assertEqual(index.lookup("東京駅", "押上", "transit", datetime(2025, 11, 23, 10, 40)), (1800.0, 15000.0, None))
+        self.assertEqual(index.lookup("上野", "亀有", "walking", datetime(2025, 11, 23, 9, 0)), (10500.0, 17500.0, None))
+        # Names are normalized like the other caches
+        # Driving keeps the plain and the traffic-aware duration
+        self.assertEqual(index.lookup("　東京駅 ", "浅草", "driving", datetime(2025, 11, 23, 12, 0)), (1200.0, 10000.0, 2400.0))
+        self.assertIsNone(index.lookup("東京駅", "上野", "transit", datetime(2025, 11, 23, 10, 0)))
+        self.assertIsNone(index.lookup("東京駅", "浅草", "transit", datetime(2025, 11, 23, 23, 0)))
+        self.assertIsNone(index.lookup("東京駅", "浅草", "bicycling", datetime(2025, 11, 23, 10, 0)))
+        self.assertEqual((index.stats()["hits"], index.stats()["misses"]), (3, 3))
+
+    def test_only_departures_on_the_same_kind_of_day_are_answered(self):
+        self.build(["東京駅"], ["浅草"])
+        index = get_travel_index()
+        self.assertEqual(index.day_kind, "weekend")
+        # A Monday departure is not answered from Saturday's traffic
+        self.assertIsNotNone(index.lookup("東京駅", "浅草", "driving", datetime(2025, 11, 23, 10, 0)))
+        self.assertIsNone(index.lookup("東京駅", "浅草", "driving", datetime(2025, 11, 24, 10, 0)))
+
+        data = build_index(["東京駅"], ["浅草"], MODES, date(2025, 11, 26), bucket_hours=3, fetch=fake_fetch)
+        save_index(self.directory, data, MODES, ["東京駅"], ["浅草"], 3, "2025-11-26")
+        weekday = TravelIndex.load(self.directory)
+        self.assertEqual(weekday.day_kind, "weekday")
+        self.assertIsNotNone(weekday.lookup("東京駅", "浅草", "driving", datetime(2025, 11, 24, 10, 0)))
+        self.assertIsNone(weekday.lookup("東京駅", "浅草", "driving", datetime(2025, 11, 23, 10, 0)))
+
+    def test_stale_or_mismatched_index_is_ignored(self):
+        self.build(["東京駅"], ["浅草"])
+        self.assertIsNotNone(TravelIndex.load(self.directory))
+        with patch.object(travel_index, "MAX_AGE", 60), patch("tools.travel_index.time.time", return_value=time.time() + 120):
+            self.assertIsNone(TravelIndex.load(self.directory))
+
+        meta_path = os.path.join(self.directory, travel_index.META_FILE)
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        meta["destinations"].append("押上")
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        self.assertIsNone(TravelIndex.load(self.directory))
+
+    def test_rebuilt_index_is_picked_up(self):
+        self.assertIsNone(get_travel_index())
+        self.build(["東京駅"], ["浅草"])
+        self.assertEqual(get_travel_index().meta["destinations"], ["浅草"])
+        # A rebuild replaces the files; the next call sees the new id map
+        os.utime(os.path.join(self.directory, travel_index.META_FILE), ns=(1, 1))
+        self.build(["東京駅"], ["浅草", "押上"])
+        self.assertEqual(get_travel_index().meta["destinations"], ["浅草", "押上"])
+
+    @patch("tools.travel_index.TRAVEL_INDEX", False)
+    def test_disabled(self):
+        self.build(["東京駅"], ["浅草"])
+        self.assertIsNone(get_travel_index())
+
+    def test_texts(self):
+        self.assertEqual(format_duration(1500), "25分")
+        self.assertEqual(format_duration(3900), "1時間5分")
+        self.assertEqual(format_distance(850), "850 m")
+        self.assertEqual(format_distance(12345), "12.3 km")
+
+
+class TestToolsReadTheIndex(TravelIndexTestCase):
+
+    def run_matrix(self, destinations, departure_time="2025-11-23T10:00:00"):
+        tool = GoogleMapsDistanceMatrixTool(output_format="json")
+        return json.loads(tool._run(origin="東京駅", destinations=destinations, departure_time=departure_time))
+
+    def test_distance_matrix_answers_from_the_index(self):
+        self.build(["東京駅"], ["上野", "浅草"])
+        result = self.run_matrix(["上野", "浅草"])
+
+        self.gmaps.distance_matrix.assert_not_called()
+        cells = {(cell["destination"], cell["mode"]): cell for cell in result["cells"]}
+        self.assertEqual(len(cells), 6)
+        self.assertEqual(cells[("浅草", "transit")]["duration"], "20分")
+        self.assertEqual(cells[("上野", "walking")]["duration"], "50分")
+        self.assertEqual(cells[("浅草", "driving")]["distance"], "10.0 km")
+        self.assertEqual(cells[("浅草", "driving")]["duration"], "20分")
+        self.assertEqual(cells[("浅草", "driving")]["duration_in_traffic"], "40分")
+
+    def test_indexed_and_live_driving_cells_render_alike(self):
+        def driving_cell(report):
+            row = next(line for line in report.splitlines() if line.startswith("| 東京駅 | 浅草 |"))
+            duration, _, rest = row.split(" | ")[2].partition(" / ")
+            return duration, rest[rest.index("（"):]
+
+        tool = GoogleMapsDistanceMatrixTool(output_format="markdown")
+        args = dict(origin="東京駅", destinations=["浅草"], departure_time="2025-11-23T10:00:00")
+        live = driving_cell(tool._run(**args))
+        self.build(["東京駅"], ["浅草"])
+        self.gmaps.distance_matrix.reset_mock()
+        indexed = driving_cell(tool._run(**args))
+
+        self.gmaps.distance_matrix.assert_not_called()
+        self.assertEqual(indexed, ("20分", "（渋滞時: 40分）"))
+        self.assertEqual(indexed, live)
+
+    def test_only_the_missing_pairs_go_to_the_api(self):
+        self.build(["東京駅"], ["上野", "浅草"])
+        result = self.run_matrix(["上野", "押上", "浅草"])
+
+        # One request per mode, for the destination missing from the index only
+        self.assertEqual(self.gmaps.distance_matrix.call_count, 3)
+        for call in self.gmaps.distance_matrix.call_args_list:
+            self.assertEqual((call.kwargs["origins"], call.kwargs["destinations"]), (["東京駅"], ["押上"]))
+        durations = [cell["duration"] for cell in result["cells"] if cell["mode"] == "transit"]
+        self.assertEqual(durations, ["10分", "30分", "20分"])
+
+        # Departures outside the built hours are not indexed at all
+        self.gmaps.distance_matrix.reset_mock()
+        self.run_matrix(["上野", "浅草"], departure_time="2025-11-23T23:00:00")
+        self.assertEqual(self.gmaps.distance_matrix.call_count, 3)
+
+    def test_async_distance_matrix_uses_the_index(self):
+        self.build(["東京駅"], ["上野", "浅草"])
+        tool = GoogleMapsDistanceMatrixTool(output_format="json")
+        with patch("tools.google_maps_tool._maps_request_async") as request:
+            result = json.loads(asyncio.run(tool._arun(
+                origin="東京駅", destinations=["上野", "浅草"], departure_time="2025-11-23T10:00:00",
+            )))
+        request.assert_not_called()
+        self.assertEqual(len(result["cells"]), 6)
+
+    def test_duration_matrix_for_the_route_optimizer(self):
+        places = ["東京駅", "上野", "浅草", "押上"]
+        self.build(places, places)
+        matrix = fetch_duration_matrix(places, "transit", datetime(2025, 11, 23, 9, 0))
+
+        self.gmaps.distance_matrix.assert_not_called()
+        self.assertEqual(matrix[0], [0.0, 600.0, 1200.0, 1800.0])
+        self.assertEqual(matrix[3][1], 1200.0)
+
+        # Pairs between venues that are not indexed are fetched in one request
+        self.build(["東京駅"], places)
+        matrix = fetch_duration_matrix(places, "transit", datetime(2025, 11, 23, 9, 0))
+        self.assertEqual(self.gmaps.distance_matrix.call_count, 1)
+        self.assertEqual(self.gmaps.distance_matrix.call_args.kwargs["origins"], ["上野", "浅草", "押上"])
+        self.assertEqual(matrix[2][3], 600.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
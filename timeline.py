@@ -0,0 +1,161 @@
+"""
+Per-task execution timeline for crew runs.
+Records when each task starts and finishes, using CrewAI's event bus, and
+derives the critical path through the task dependency graph.
+"""
+
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from crewai import Task
+from crewai.utilities.events import (
+    TaskCompletedEvent,
+    TaskFailedEvent,
+    TaskStartedEvent,
+    crewai_event_bus,
+)
+
+# Task id -> (timeline, task name) for every task currently being tracked
+_tracked: Dict[str, Tuple["TaskTimeline", str]] = {}
+_tracked_lock = threading.Lock()
+_handlers_registered = False
+
+
+def _lookup(task) -> Optional[Tuple["TaskTimeline", str]]:
+    task_id = getattr(task, "id", None)
+    if task_id is None:
+        return None
+    with _tracked_lock:
+        return _tracked.get(str(task_id))
+
+
+def _register_handlers() -> None:
+    """Register the event bus handlers once per process."""
+    global _handlers_registered
+    with _tracked_lock:
+        if _handlers_registered:
+            return
+        _handlers_registered = True
+
+    @crewai_event_bus.on(TaskStartedEvent)
+    def on_task_started(source, event):
+        entry = _lookup(event.task or source)
+        if entry:
+            entry[0].record_start(entry[1])
+
+    @crewai_event_bus.on(TaskCompletedEvent)
+    def on_task_completed(source, event):
+        entry = _lookup(event.task or source)
+        if entry:
+            entry[0].record_end(entry[1])
+
+    @crewai_event_bus.on(TaskFailedEvent)
+    def on_task_failed(source, event):
+        entry = _lookup(event.task or source)
+        if entry:
+            entry[0].record_end(entry[1], status="failed")
+
+
+class TaskTimeline:
+    """
+    Start/end times of the tasks of one crew run.
+
+    Times are stored as offsets in seconds from the first recorded start,
+    so the timeline of a run reads the same however long the process has
+    been alive.
+    """
+
+    def __init__(self, dependencies: Dict[str, List[str]]):
+        self.dependencies = dependencies
+        self._lock = threading.Lock()
+        self._origin: Optional[float] = None
+        self._spans: Dict[str, dict] = {}
+        self._task_ids: List[str] = []
+
+    def track(self, tasks: Dict[str, Task]) -> None:
+        """Start recording the given tasks (name -> Task) from the event bus."""
+        _register_handlers()
+        with _tracked_lock:
+            for name, task in tasks.items():
+                _tracked[str(task.id)] = (self, name)
+                self._task_ids.append(str(task.id))
+
+    def untrack(self) -> None:
+        """Stop recording; the collected spans are kept."""
+        with _tracked_lock:
+            for task_id in self._task_ids:
+                _tracked.pop(task_id, None)
+        self._task_ids = []
+
+    def record_start(self, name: str, at: Optional[float] = None) -> None:
+        at = time.perf_counter() if at is None else at
+        with self._lock:
+            if self._origin is None:
+                self._origin = at
+            self._spans[name] = {"name": name, "start": at - self._origin, "end": None, "status": "running"}
+
+    def record_end(self, name: str, status: str = "completed", at: Optional[float] = None) -> None:
+        at = time.perf_counter() if at is None else at
+        with self._lock:
+            span = self._spans.get(name)
+            if span is None:
+                return
+            span["end"] = at - self._origin
+            span["status"] = status
+
+    def spans(self) -> List[dict]:
+        """Recorded spans ordered by start time, with their duration in seconds."""
+        with self._lock:
+            spans = [dict(span) for span in self._spans.values()]
+        for span in spans:
+            span["duration"] = None if span["end"] is None else span["end"] - span["start"]
+        return sorted(spans, key=lambda span: span["start"])
+
+    def critical_path(self) -> List[str]:
+        """
+        The chain of tasks that determined the end of the run.
+
+        Starts from the task that finished last and walks back through
+        the dependency that finished last at each step.
+        """
+        finished = {span["name"]: span for span in self.spans() if span["end"] is not None}
+        if not finished:
+            return []
+        name = max(finished, key=lambda n: finished[n]["end"])
+        path = [name]
+        while True:
+            deps = [dep for dep in self.dependencies.get(name, []) if dep in finished]
+            if not deps:
+                break
+            name = max(deps, key=lambda n: finished[n]["end"])
+            path.append(name)
+        return list(reversed(path))
+
+    def wall_time(self) -> float:
+        """Seconds from the first task start to the last task end."""
+        ends = [span["end"] for span in self.spans() if span["end"] is not None]
+        return max(ends) if ends else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "wall_time": self.wall_time(),
+            "critical_path": self.critical_path(),
+            "tasks": self.spans(),
+        }
+
+    def summary(self) -> str:
+        """Markdown table of the timeline followed by the critical path."""
+        critical = set(self.critical_path())
+        lines = [
+            "| タスク | 開始 | 終了 | 所要 | 状態 |",
+            "|--------|------|------|------|------|",
+        ]
+        for span in self.spans():
+            end = "-" if span["end"] is None else f"{span['end']:.1f}s"
+            duration = "-" if span["duration"] is None else f"{span['duration']:.1f}s"
+            marker = " *" if span["name"] in critical else ""
+            lines.append(f"| {span['name']}{marker} | {span['start']:.1f}s | {end} | {duration} | {span['status']} |")
+        lines.append("")
+        lines.append(f"クリティカルパス (*): {' → '.join(self.critical_path())} （合計 {self.wall_time():.1f}s）")
+        return "\n".join(lines)
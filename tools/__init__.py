@@ -1,5 +1,19 @@
 """Custom tools for Weekend Planner agents."""
 
-from .google_maps_tool import GoogleMapsDirectionsTool, GoogleMapsDistanceMatrixTool
+import importlib
 
-__all__ = ["GoogleMapsDirectionsTool", "GoogleMapsDistanceMatrixTool"]
+__all__ = ["GoogleMapsDirectionsTool", "GoogleMapsDistanceMatrixTool", "RouteOptimizerTool"]
+
+# The tool classes are imported on first access, so the lightweight helpers of
+# this package (cache, telemetry, output) can be used without loading crewai
+_LAZY_ATTRS = {
+    "GoogleMapsDirectionsTool": ".google_maps_tool",
+    "GoogleMapsDistanceMatrixTool": ".google_maps_tool",
+    "RouteOptimizerTool": ".route_optimizer",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRS:
+        return getattr(importlib.import_module(_LAZY_ATTRS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
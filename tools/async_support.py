@@ -0,0 +1,109 @@
+"""
+Async execution support for the custom tools.
+Provides a shared, pooled httpx.AsyncClient per event loop with timeouts and
+bounded concurrency, and a mixin that exposes a tool's native _arun coroutine
+to CrewAI's async tool invocation.
+"""
+
+import asyncio
+import os
+import weakref
+from typing import Any, Optional, Tuple
+
+import httpx
+from crewai.tools.structured_tool import CrewStructuredTool
+
+from . import telemetry
+
+MAX_CONNECTIONS = int(os.getenv("TOOLS_HTTP_MAX_CONNECTIONS", "20"))
+MAX_CONCURRENCY = int(os.getenv("TOOLS_HTTP_MAX_CONCURRENCY", "10"))
+REQUEST_TIMEOUT = float(os.getenv("TOOLS_HTTP_TIMEOUT", "10"))
+
+# httpx.AsyncClient and asyncio.Semaphore are bound to the loop they are used on,
+# so keep one pair per running event loop.
+_loop_state: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Tuple[httpx.AsyncClient, asyncio.Semaphore]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _state() -> Tuple[httpx.AsyncClient, asyncio.Semaphore]:
+    loop = asyncio.get_running_loop()
+    state = _loop_state.get(loop)
+    if state is None:
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(REQUEST_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_CONNECTIONS,
+            ),
+        )
+        state = (client, asyncio.Semaphore(MAX_CONCURRENCY))
+        _loop_state[loop] = state
+    return state
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Return the shared async HTTP client for the running event loop."""
+    return _state()[0]
+
+
+async def get_json(url: str, params: Optional[dict] = None) -> Any:
+    """
+    GET a JSON document through the shared client.
+
+    At most MAX_CONCURRENCY requests are in flight per event loop; raises
+    httpx.HTTPStatusError for non-2xx responses.
+    """
+    client, semaphore = _state()
+    async with semaphore:
+        with telemetry.network_timer():
+            response = await client.get(url, params=params)
+    response.raise_for_status()
+    return response.json()
+
+
+async def aclose_client() -> None:
+    """Close the shared client of the running event loop (e.g. on shutdown)."""
+    state = _loop_state.pop(asyncio.get_running_loop(), None)
+    if state is not None:
+        await state[0].aclose()
+
+
+class AsyncStructuredTool(CrewStructuredTool):
+    """A CrewStructuredTool whose async invocation awaits a native coroutine."""
+
+    def __init__(self, *args: Any, coroutine: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.coroutine = coroutine
+
+    async def ainvoke(self, input: Any, config: Optional[dict] = None, **kwargs: Any) -> Any:
+        parsed_args = self._parse_args(input)
+        return await self.coroutine(**parsed_args, **kwargs)
+
+
+class AsyncToolMixin:
+    """
+    Mixin for BaseTool subclasses that implement a native async _arun.
+
+    The synchronous _run path is unchanged; async callers (arun, or CrewAI's
+    ainvoke) await _arun instead of blocking a worker thread.
+    """
+
+    async def arun(self, *args: Any, **kwargs: Any) -> Any:
+        print(f"Using Tool: {self.name}")
+        result = await self._arun(*args, **kwargs)
+        self.current_usage_count += 1
+        return result
+
+    def to_structured_tool(self) -> CrewStructuredTool:
+        self._set_args_schema()
+        return AsyncStructuredTool(
+            name=self.name,
+            description=self.description,
+            args_schema=self.args_schema,
+            func=self._run,
+            coroutine=self._arun,
+            result_as_answer=self.result_as_answer,
+            max_usage_count=self.max_usage_count,
+            current_usage_count=self.current_usage_count,
+        )
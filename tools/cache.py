@@ -0,0 +1,244 @@
+"""
+Caches shared by the custom tools.
+In-memory LRU caches, plus persistent ones that store values as JSON
+in small SQLite files under a configurable directory.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from . import telemetry
+
+
+def cache_dir() -> Path:
+    """
+    Return the directory used for on-disk caches.
+
+    Configurable with the WEEKEND_PLANNER_CACHE_DIR environment variable
+    (default: ~/.cache/weekend_planner).
+    """
+    default = Path.home() / ".cache" / "weekend_planner"
+    return Path(os.getenv("WEEKEND_PLANNER_CACHE_DIR", default)).expanduser()
+
+
+def env_seconds(name: str, default: Optional[float]) -> Optional[float]:
+    """
+    Read a TTL in seconds from the environment.
+
+    Empty or non-positive values mean "no expiry" and return None.
+    """
+    raw = os.getenv(name)
+    if raw is None:
+        return default
+    try:
+        value = float(raw)
+    except ValueError:
+        return default
+    return value if value > 0 else None
+
+
+def normalize_key(text: str) -> str:
+    """
+    Normalize free-form text (e.g. a location name) into a cache key.
+
+    Applies NFKC so full-width and half-width forms match, case-folds
+    and collapses whitespace: '　渋谷区 ' and '渋谷区' share one key.
+    """
+    text = unicodedata.normalize("NFKC", text)
+    return re.sub(r"\s+", " ", text).strip().casefold()
+
+
+class SQLiteLRUCache:
+    """
+    A size-bounded key/value cache persisted in SQLite.
+
+    Entries are evicted least-recently-used first once more than
+    max_entries are stored, and expire after ttl seconds when a TTL is set.
+    Safe to share between threads and between processes using the same file.
+    """
+
+    def __init__(self, path: Path, max_entries: int = 1000, ttl: Optional[float] = None):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.path), timeout=5, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at)"
+        )
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None on a miss or expiry."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            if self.ttl is not None and now - created_at > self.ttl:
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                return None
+            self._conn.execute(
+                "UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+        telemetry.record_cache_hit()
+        return json.loads(value)
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a JSON-serializable value and evict the oldest entries if needed."""
+        now = time.time()
+        payload = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, created_at, accessed_at)"
+                " VALUES (?, ?, ?, ?)",
+                (key, payload, now, now),
+            )
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM entries WHERE key IN ("
+                    " SELECT key FROM entries ORDER BY accessed_at ASC LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()
+        return count
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class MemoryLRUCache:
+    """
+    A thread-safe in-memory LRU cache with an optional TTL.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None on a miss or expiry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, created_at = entry
+            if self.ttl is not None and time.time() - created_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        telemetry.record_cache_hit()
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class TieredCache:
+    """
+    An in-memory cache backed by an optional on-disk tier.
+
+    Reads check memory first and promote disk hits into memory.
+    get_or_fetch() collapses concurrent misses for the same key into a
+    single fetch, so parallel crew runs share one upstream request.
+    """
+
+    def __init__(self, memory: MemoryLRUCache, disk: Optional[SQLiteLRUCache] = None):
+        self.memory = memory
+        self.disk = disk
+        self._key_locks: dict = {}
+        self._key_locks_lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.set(key, value)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+
+    def get_or_fetch(self, key: str, fetch: Callable[[], Any]) -> Any:
+        """Return the cached value for key, calling fetch() once on a miss."""
+        value = self.get(key)
+        if value is not None:
+            return value
+        # key -> [lock, callers holding or waiting for it]; the entry is only
+        # dropped by the last of them, so later callers queue on the same lock
+        with self._key_locks_lock:
+            entry = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                value = self.get(key)
+                if value is None:
+                    value = fetch()
+                    if value is not None:
+                        self.set(key, value)
+                return value
+        finally:
+            with self._key_locks_lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._key_locks[key]
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
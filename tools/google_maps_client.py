@@ -0,0 +1,207 @@
+"""Shared, pooled Google Maps clients.
+
+googlemaps.Client はインスタンスごとに requests.Session を持つため、
+ツール呼び出しのたびに生成すると TLS ハンドシェイクからやり直しになります。
+このモジュールは API キーごとに 1 つのクライアントを保持し、
+同一プロセス内のすべてのツール呼び出し・クルー実行で接続を再利用します。
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, TypeVar
+
+import googlemaps
+import requests
+from requests.adapters import HTTPAdapter
+
+from . import telemetry
+from .rate_limit import get_limiter
+
+T = TypeVar("T")
+
+POOL_MAXSIZE = int(os.getenv("GOOGLE_MAPS_POOL_MAXSIZE", "10"))
+REQUEST_TIMEOUT = float(os.getenv("GOOGLE_MAPS_TIMEOUT", "10"))
+
+_clients: Dict[str, googlemaps.Client] = {}
+_clients_lock = threading.Lock()
+
+
+class LatencyStats:
+    """エンドポイントごとの呼び出し回数とレイテンシを記録するクラス"""
+
+    def __init__(self, max_samples: int = 1024):
+        self._lock = threading.Lock()
+        self._samples: Deque[float] = deque(maxlen=max_samples)
+        self.calls = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+
+    def record(self, seconds: float, ok: bool = True) -> None:
+        """1 回分の呼び出し時間を記録"""
+        with self._lock:
+            self.calls += 1
+            if not ok:
+                self.errors += 1
+            self.total_seconds += seconds
+            self._samples.append(seconds)
+
+    def snapshot(self) -> dict:
+        """現在の統計値をミリ秒単位の辞書で返す"""
+        with self._lock:
+            samples = sorted(self._samples)
+            calls, errors, total = self.calls, self.errors, self.total_seconds
+
+        def percentile(p: float) -> float:
+            if not samples:
+                return 0.0
+            index = min(len(samples) - 1, int(round(p * (len(samples) - 1))))
+            return samples[index] * 1000
+
+        return {
+            "calls": calls,
+            "errors": errors,
+            "mean_ms": (total / calls * 1000) if calls else 0.0,
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "max_ms": samples[-1] * 1000 if samples else 0.0,
+        }
+
+
+_stats: Dict[str, LatencyStats] = {}
+_stats_lock = threading.Lock()
+
+
+def _raise_server_error(response: requests.Response, *args: Any, **kwargs: Any) -> None:
+    """
+    5xx 応答をその場で例外にするレスポンスフック。
+
+    googlemaps.Client は 5xx を retry_timeout の間ひとりでに再試行してしまうため、
+    ステータスを持った例外として call_api のレート制限に渡し、再試行をそちらに一本化します。
+    """
+    if response.status_code >= 500:
+        response.raise_for_status()
+
+
+def _build_session() -> requests.Session:
+    """keep-alive 付きのコネクションプールを持つセッションを作成"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE)
+    session.mount("https://", adapter)
+    session.hooks["response"].append(_raise_server_error)
+    return session
+
+
+def get_client(api_key: str) -> googlemaps.Client:
+    """
+    API キーに対応する共有クライアントを返します。
+
+    初回呼び出し時のみクライアントを生成し、以降は同じインスタンスを返します。
+    スレッドセーフです。
+    """
+    client = _clients.get(api_key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(api_key)
+            if client is None:
+                client = googlemaps.Client(
+                    key=api_key,
+                    timeout=REQUEST_TIMEOUT,
+                    requests_session=_build_session(),
+                    # 上限超過も 5xx（_raise_server_error）もクライアント内で再試行せず、
+                    # プロセス共通のレート制限（call_api）に任せる
+                    retry_over_query_limit=False,
+                )
+                _clients[api_key] = client
+    return client
+
+
+def _get_latency_stats(endpoint: str) -> LatencyStats:
+    stats = _stats.get(endpoint)
+    if stats is None:
+        with _stats_lock:
+            stats = _stats.setdefault(endpoint, LatencyStats())
+    return stats
+
+
+@contextmanager
+def track_latency(endpoint: str) -> Iterator[None]:
+    """with ブロック内の API 呼び出し時間をエンドポイント別に記録"""
+    start = time.perf_counter()
+    ok = False
+    try:
+        yield
+        ok = True
+    finally:
+        elapsed = time.perf_counter() - start
+        _get_latency_stats(endpoint).record(elapsed, ok)
+        telemetry.record_network(elapsed)
+
+
+def call_api(endpoint: str, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    プロセス共通のレート制限の範囲で API を呼び出します。
+
+    トークンと同時実行数の空きを待ってから呼び出し、OVER_QUERY_LIMIT・429・5xx は
+    ジッター付きの指数バックオフで再試行します。レイテンシは試行ごとに記録します。
+    """
+    def attempt() -> T:
+        with track_latency(endpoint):
+            return fn(*args, **kwargs)
+
+    return get_limiter("google_maps").call(attempt)
+
+
+def _pool_usage(client: googlemaps.Client) -> Dict[str, int]:
+    """urllib3 のプールから、開いた接続数と送信リクエスト数を集計"""
+    opened = 0
+    sent = 0
+    adapter = client.session.get_adapter("https://")
+    pools = adapter.poolmanager.pools
+    for key in list(pools.keys()):
+        pool = pools.get(key)
+        if pool is None:
+            continue
+        opened += pool.num_connections
+        sent += pool.num_requests
+    return {"connections_opened": opened, "requests_sent": sent}
+
+
+def get_client_stats() -> dict:
+    """
+    クライアントプールとレイテンシの統計を返します。
+
+    requests_sent に対して connections_opened が小さいほど、
+    接続が再利用されていることを示します。
+    """
+    with _clients_lock:
+        clients = list(_clients.values())
+    with _stats_lock:
+        endpoints = dict(_stats)
+
+    opened = 0
+    sent = 0
+    for client in clients:
+        usage = _pool_usage(client)
+        opened += usage["connections_opened"]
+        sent += usage["requests_sent"]
+
+    return {
+        "clients": len(clients),
+        "pool_maxsize": POOL_MAXSIZE,
+        "connections_opened": opened,
+        "requests_sent": sent,
+        "endpoints": {name: stats.snapshot() for name, stats in endpoints.items()},
+    }
+
+
+def reset_clients() -> None:
+    """共有クライアントを破棄し、統計をリセット（主にテスト用）"""
+    with _clients_lock:
+        for client in _clients.values():
+            client.session.close()
+        _clients.clear()
+    with _stats_lock:
+        _stats.clear()
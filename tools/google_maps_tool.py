@@ -1,13 +1,95 @@
 """Google Maps API tools for accurate travel time and route information."""
 
+import asyncio
+import logging
 import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Optional, Type
+from typing import Dict, List, Optional, Tuple, Type
 
 import googlemaps
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
 
+from .async_support import AsyncToolMixin, get_json
+from .cache import MemoryLRUCache, SQLiteLRUCache, TieredCache, cache_dir, env_seconds, normalize_key
+from .google_maps_client import call_api, get_client, track_latency
+from .rate_limit import get_limiter
+from .output import ToolError, default_output_format, default_verbosity, to_json
+from .travel_index import get_travel_index
+
+logger = logging.getLogger(__name__)
+
+# Google Maps Web Service endpoints used by the async (_arun) paths
+MAPS_BASE_URL = "https://maps.googleapis.com/maps/api"
+# URL path -> latency stats name used by the sync client (call_api)
+LATENCY_ENDPOINTS = {"distancematrix": "distance_matrix"}
+
+# Distance Matrix APIで比較する移動手段
+MATRIX_MODES = [
+    ("driving", "自動車"),
+    ("transit", "公共交通機関"),
+    ("walking", "徒歩"),
+]
+
+# Distance Matrix APIの1リクエストあたりの上限
+MAX_PLACES_PER_REQUEST = 25
+MAX_ELEMENTS_PER_REQUEST = 100
+MAX_PARALLEL_REQUESTS = 8
+
+# 経路キャッシュの設定
+# 出発時刻はこの幅（分）のバケットにまとめ、同じバケット内の検索は同じ結果を共有する
+DIRECTIONS_BUCKET_MINUTES = int(os.getenv("GOOGLE_MAPS_DIRECTIONS_BUCKET_MINUTES", "15"))
+DIRECTIONS_CACHE_SIZE = int(os.getenv("GOOGLE_MAPS_DIRECTIONS_CACHE_SIZE", "512"))
+DIRECTIONS_DISK_CACHE = os.getenv("GOOGLE_MAPS_DIRECTIONS_DISK_CACHE", "0") == "1"
+# 移動手段ごとの有効期限（秒）。渋滞情報を含む自動車は短く、時刻表ベースの公共交通機関は長めに保持
+DIRECTIONS_CACHE_TTLS = {
+    "driving": env_seconds("GOOGLE_MAPS_DIRECTIONS_TTL_DRIVING", 10 * 60),
+    "transit": env_seconds("GOOGLE_MAPS_DIRECTIONS_TTL_TRANSIT", 6 * 3600),
+    "walking": env_seconds("GOOGLE_MAPS_DIRECTIONS_TTL_WALKING", 7 * 24 * 3600),
+    "bicycling": env_seconds("GOOGLE_MAPS_DIRECTIONS_TTL_BICYCLING", 7 * 24 * 3600),
+}
+
+_directions_caches: Dict[str, TieredCache] = {}
+_directions_caches_lock = threading.Lock()
+
+
+def get_directions_cache(mode: str) -> TieredCache:
+    """
+    移動手段ごとの経路キャッシュを返す（初回呼び出し時に生成）。
+    
+    メモリ上のキャッシュは常に有効で、GOOGLE_MAPS_DIRECTIONS_DISK_CACHE=1 のときは
+    プロセス間で共有できるディスクキャッシュも併用します。
+    """
+    cache = _directions_caches.get(mode)
+    if cache is None:
+        with _directions_caches_lock:
+            cache = _directions_caches.get(mode)
+            if cache is None:
+                ttl = DIRECTIONS_CACHE_TTLS.get(mode, DIRECTIONS_CACHE_TTLS["driving"])
+                disk = None
+                if DIRECTIONS_DISK_CACHE:
+                    try:
+                        disk = SQLiteLRUCache(
+                            cache_dir() / f"directions_{mode}.sqlite3",
+                            max_entries=DIRECTIONS_CACHE_SIZE,
+                            ttl=ttl,
+                        )
+                    except (OSError, sqlite3.Error) as e:
+                        logger.warning("On-disk directions cache disabled: %s", e)
+                cache = TieredCache(MemoryLRUCache(max_entries=DIRECTIONS_CACHE_SIZE, ttl=ttl), disk)
+                _directions_caches[mode] = cache
+    return cache
+
+
+def directions_cache_key(origin: str, destination: str, mode: str, dep_time: datetime) -> str:
+    """出発地・目的地・移動手段・出発時刻バケットから経路キャッシュのキーを作成"""
+    bucket_seconds = max(1, DIRECTIONS_BUCKET_MINUTES) * 60
+    bucket = int(dep_time.timestamp() // bucket_seconds)
+    return f"{normalize_key(origin)}|{normalize_key(destination)}|{mode}|{bucket}"
+
 
 class GoogleMapsDirectionsInput(BaseModel):
     """Input schema for GoogleMapsDirectionsTool."""
@@ -33,13 +115,21 @@ class GoogleMapsDirectionsInput(BaseModel):
 class GoogleMapsDistanceMatrixInput(BaseModel):
     """Input schema for GoogleMapsDistanceMatrixTool."""
     
-    origin: str = Field(
-        ...,
-        description="出発地点の住所または地名"
+    origin: Optional[str] = Field(
+        default=None,
+        description="出発地点の住所または地名（1地点のみの場合）"
     )
-    destination: str = Field(
-        ...,
-        description="目的地の住所または地名"
+    destination: Optional[str] = Field(
+        default=None,
+        description="目的地の住所または地名（1地点のみの場合）"
+    )
+    origins: Optional[List[str]] = Field(
+        default=None,
+        description="出発地点のリスト（例: ['東京駅']）。複数指定すると全組み合わせを一度に比較"
+    )
+    destinations: Optional[List[str]] = Field(
+        default=None,
+        description="目的地のリスト（例: 候補スポットすべて）。候補が複数ある場合はここにまとめて指定"
     )
     departure_time: Optional[str] = Field(
         default=None,
@@ -47,7 +137,62 @@ class GoogleMapsDistanceMatrixInput(BaseModel):
     )
 
 
-class GoogleMapsDirectionsTool(BaseTool):
+class RouteStep(BaseModel):
+    """経路の1ステップ（乗車区間または徒歩区間など）"""
+    
+    travel_mode: str
+    duration: Optional[str] = None
+    distance: Optional[str] = None
+    vehicle: Optional[str] = None
+    line: Optional[str] = None
+    departure_stop: Optional[str] = None
+    arrival_stop: Optional[str] = None
+    num_stops: Optional[int] = None
+    fare: Optional[int] = None
+
+
+class Route(BaseModel):
+    """1つのルートの要約。steps は verbosity='full' のときのみ"""
+    
+    duration: str
+    distance: str
+    duration_in_traffic: Optional[str] = None
+    fare_total: Optional[int] = None
+    lines: List[str] = []
+    steps: Optional[List[RouteStep]] = None
+
+
+class DirectionsResult(BaseModel):
+    """経路検索ツールの構造化出力"""
+    
+    origin: str
+    destination: str
+    mode: str
+    departure_time: str
+    routes: List[Route]
+
+
+class MatrixCell(BaseModel):
+    """出発地 × 目的地 × 移動手段 の1要素"""
+    
+    origin: str
+    destination: str
+    mode: str
+    duration: Optional[str] = None
+    distance: Optional[str] = None
+    duration_in_traffic: Optional[str] = None
+    status: str = "OK"
+
+
+class DistanceMatrixResult(BaseModel):
+    """複数手段比較ツールの構造化出力"""
+    
+    departure_time: str
+    cells: List[MatrixCell]
+    errors: Dict[str, str] = {}
+
+
+class GoogleMapsDirectionsTool(AsyncToolMixin, BaseTool):
     """
     Google Maps Directions APIを使用して、詳細な経路情報を取得するツール。
     
@@ -63,6 +208,9 @@ class GoogleMapsDirectionsTool(BaseTool):
         "所要時間、距離、乗り換え情報、運賃情報を含む詳細な経路を返します。"
     )
     args_schema: Type[BaseModel] = GoogleMapsDirectionsInput
+    # 出力形式: "markdown" または "json"／詳細度: "full" または "summary"（各ステップを省略）
+    output_format: str = Field(default_factory=default_output_format)
+    verbosity: str = Field(default_factory=default_verbosity)
     
     def _run(
         self,
@@ -85,87 +233,224 @@ class GoogleMapsDirectionsTool(BaseTool):
         """
         api_key = os.getenv("GOOGLE_MAPS_API_KEY")
         if not api_key:
-            return "エラー: GOOGLE_MAPS_API_KEY環境変数が設定されていません。"
+            return ToolError("エラー: GOOGLE_MAPS_API_KEY環境変数が設定されていません。")
         
         try:
-            gmaps = googlemaps.Client(key=api_key)
+            gmaps = get_client(api_key)
             
-            # 出発時刻の処理
-            if departure_time:
-                if departure_time.lower() == "now":
-                    dep_time = datetime.now()
-                else:
-                    dep_time = datetime.fromisoformat(departure_time)
-            else:
-                dep_time = datetime.now()
+            dep_time = _parse_departure_time(departure_time)
             
-            # Directions APIを呼び出し
-            directions = gmaps.directions(
-                origin=origin,
-                destination=destination,
-                mode=mode,
-                departure_time=dep_time,
-                language="ja",
-                alternatives=True,  # 代替ルートも取得
+            def fetch() -> Optional[List[dict]]:
+                # Directions APIを呼び出し
+                routes = call_api(
+                    "directions",
+                    gmaps.directions,
+                    origin=origin,
+                    destination=destination,
+                    mode=mode,
+                    departure_time=dep_time,
+                    language="ja",
+                    alternatives=True,  # 代替ルートも取得
+                )
+                # 経路なしは一時的な場合もあるためキャッシュしない
+                return routes or None
+            
+            # 生のルート（legs を含む）をキャッシュし、表示は毎回ここから組み立てる
+            cache_key = directions_cache_key(origin, destination, mode, dep_time)
+            directions = get_directions_cache(mode).get_or_fetch(cache_key, fetch) or []
+            
+            return self._format_directions(origin, destination, mode, dep_time, directions)
+            
+        except googlemaps.exceptions.ApiError as e:
+            return ToolError(f"Google Maps APIエラー: {str(e)}")
+        except Exception as e:
+            return ToolError(f"エラーが発生しました: {str(e)}")
+    
+    async def _arun(
+        self,
+        origin: str,
+        destination: str,
+        mode: str = "transit",
+        departure_time: Optional[str] = None,
+    ) -> str:
+        """
+        _run の非同期版。共有の非同期HTTPクライアントでDirections APIを呼び出します。
+        
+        Args:
+            origin: 出発地点
+            destination: 目的地
+            mode: 移動手段
+            departure_time: 出発時刻
+            
+        Returns:
+            整形された経路情報の文字列
+        """
+        api_key = os.getenv("GOOGLE_MAPS_API_KEY")
+        if not api_key:
+            return ToolError("エラー: GOOGLE_MAPS_API_KEY環境変数が設定されていません。")
+        
+        try:
+            dep_time = _parse_departure_time(departure_time)
+            
+            cache = get_directions_cache(mode)
+            cache_key = directions_cache_key(origin, destination, mode, dep_time)
+            directions = cache.get(cache_key)
+            if directions is None:
+                body = await _maps_request_async("directions", api_key, {
+                    "origin": origin,
+                    "destination": destination,
+                    "mode": mode,
+                    "departure_time": googlemaps.convert.time(dep_time),
+                    "language": "ja",
+                    "alternatives": "true",
+                })
+                directions = body.get("routes", [])
+                if directions:
+                    cache.set(cache_key, directions)
+            
+            return self._format_directions(origin, destination, mode, dep_time, directions)
+            
+        except googlemaps.exceptions.ApiError as e:
+            return ToolError(f"Google Maps APIエラー: {str(e)}")
+        except Exception as e:
+            return ToolError(f"エラーが発生しました: {str(e)}")
+    
+    def _format_directions(
+        self,
+        origin: str,
+        destination: str,
+        mode: str,
+        dep_time: datetime,
+        directions: List[dict],
+    ) -> str:
+        """Directions APIのルート一覧を整形された文字列に変換"""
+        if not directions:
+            return ToolError(f"エラー: {origin}から{destination}への経路が見つかりませんでした。")
+        
+        if self.output_format != "markdown" or self.verbosity != "full":
+            return self._render_directions(
+                self._build_directions(origin, destination, mode, dep_time, directions)
             )
+        
+        # 結果を整形
+        result_text = f"# {origin} → {destination} の経路情報\n\n"
+        result_text += f"**移動手段**: {self._get_mode_name(mode)}\n"
+        result_text += f"**出発時刻**: {dep_time.strftime('%Y年%m月%d日 %H:%M')}\n\n"
+        
+        # 各ルートを処理（最大3つ）
+        for idx, route in enumerate(directions[:3], 1):
+            leg = route['legs'][0]
             
-            if not directions:
-                return f"エラー: {origin}から{destination}への経路が見つかりませんでした。"
+            result_text += f"## ルート {idx}\n\n"
+            result_text += f"- **所要時間**: {leg['duration']['text']}\n"
+            result_text += f"- **距離**: {leg['distance']['text']}\n"
             
-            # 結果を整形
-            result_text = f"# {origin} → {destination} の経路情報\n\n"
-            result_text += f"**移動手段**: {self._get_mode_name(mode)}\n"
-            result_text += f"**出発時刻**: {dep_time.strftime('%Y年%m月%d日 %H:%M')}\n\n"
+            # 渋滞を考慮した時間（自動車の場合）
+            if mode == "driving" and 'duration_in_traffic' in leg:
+                result_text += f"- **渋滞時の所要時間**: {leg['duration_in_traffic']['text']}\n"
             
-            # 各ルートを処理（最大3つ）
-            for idx, route in enumerate(directions[:3], 1):
-                leg = route['legs'][0]
-                
-                result_text += f"## ルート {idx}\n\n"
-                result_text += f"- **所要時間**: {leg['duration']['text']}\n"
-                result_text += f"- **距離**: {leg['distance']['text']}\n"
-                
-                # 渋滞を考慮した時間（自動車の場合）
-                if mode == "driving" and 'duration_in_traffic' in leg:
-                    result_text += f"- **渋滞時の所要時間**: {leg['duration_in_traffic']['text']}\n"
+            # 公共交通機関の場合の詳細情報
+            if mode == "transit":
+                result_text += f"\n### 乗り換え詳細\n\n"
                 
-                # 公共交通機関の場合の詳細情報
-                if mode == "transit":
-                    result_text += f"\n### 乗り換え詳細\n\n"
-                    
-                    total_fare = 0
-                    for step_idx, step in enumerate(leg['steps'], 1):
-                        if step['travel_mode'] == 'TRANSIT':
-                            transit = step['transit_details']
-                            line = transit['line']
-                            
-                            result_text += f"{step_idx}. **{line['vehicle']['name']}** "
-                            result_text += f"({line.get('short_name', line['name'])})\n"
-                            result_text += f"   - 乗車: {transit['departure_stop']['name']}\n"
-                            result_text += f"   - 下車: {transit['arrival_stop']['name']}\n"
-                            result_text += f"   - 停車駅数: {transit['num_stops']}駅\n"
-                            
-                            # 運賃情報
-                            if 'fare' in step:
-                                fare = step['fare']['value']
-                                total_fare += fare
-                                result_text += f"   - 運賃: {fare}円\n"
-                            
-                            result_text += "\n"
-                        elif step['travel_mode'] == 'WALKING':
-                            result_text += f"{step_idx}. 徒歩: {step['duration']['text']} ({step['distance']['text']})\n\n"
-                    
-                    if total_fare > 0:
-                        result_text += f"**合計運賃**: 約{total_fare}円\n"
+                total_fare = 0
+                for step_idx, step in enumerate(leg['steps'], 1):
+                    if step['travel_mode'] == 'TRANSIT':
+                        transit = step['transit_details']
+                        line = transit['line']
+                        
+                        result_text += f"{step_idx}. **{line['vehicle']['name']}** "
+                        result_text += f"({line.get('short_name', line['name'])})\n"
+                        result_text += f"   - 乗車: {transit['departure_stop']['name']}\n"
+                        result_text += f"   - 下車: {transit['arrival_stop']['name']}\n"
+                        result_text += f"   - 停車駅数: {transit['num_stops']}駅\n"
+                        
+                        # 運賃情報
+                        if 'fare' in step:
+                            fare = step['fare']['value']
+                            total_fare += fare
+                            result_text += f"   - 運賃: {fare}円\n"
+                        
+                        result_text += "\n"
+                    elif step['travel_mode'] == 'WALKING':
+                        result_text += f"{step_idx}. 徒歩: {step['duration']['text']} ({step['distance']['text']})\n\n"
                 
-                result_text += "\n"
+                if total_fare > 0:
+                    result_text += f"**合計運賃**: 約{total_fare}円\n"
             
-            return result_text
+            result_text += "\n"
+        
+        return result_text
+    
+    def _build_directions(
+        self,
+        origin: str,
+        destination: str,
+        mode: str,
+        dep_time: datetime,
+        directions: List[dict],
+    ) -> DirectionsResult:
+        """ルート一覧（最大3件）を構造化された結果に変換"""
+        routes = []
+        for route in directions[:3]:
+            leg = route['legs'][0]
+            steps = []
+            for step in leg.get('steps', []):
+                item = RouteStep(
+                    travel_mode=step['travel_mode'],
+                    duration=step.get('duration', {}).get('text'),
+                    distance=step.get('distance', {}).get('text'),
+                )
+                if step['travel_mode'] == 'TRANSIT':
+                    transit = step['transit_details']
+                    line = transit['line']
+                    item.vehicle = line['vehicle']['name']
+                    item.line = line.get('short_name', line['name'])
+                    item.departure_stop = transit['departure_stop']['name']
+                    item.arrival_stop = transit['arrival_stop']['name']
+                    item.num_stops = transit['num_stops']
+                    if 'fare' in step:
+                        item.fare = step['fare']['value']
+                steps.append(item)
             
-        except googlemaps.exceptions.ApiError as e:
-            return f"Google Maps APIエラー: {str(e)}"
-        except Exception as e:
-            return f"エラーが発生しました: {str(e)}"
+            fare_total = sum(step.fare for step in steps if step.fare)
+            routes.append(Route(
+                duration=leg['duration']['text'],
+                distance=leg['distance']['text'],
+                duration_in_traffic=leg.get('duration_in_traffic', {}).get('text') if mode == "driving" else None,
+                fare_total=fare_total or None,
+                lines=[step.line for step in steps if step.line],
+                steps=steps if self.verbosity == "full" else None,
+            ))
+        
+        return DirectionsResult(
+            origin=origin,
+            destination=destination,
+            mode=mode,
+            departure_time=dep_time.strftime("%Y-%m-%dT%H:%M"),
+            routes=routes,
+        )
+    
+    def _render_directions(self, result: DirectionsResult) -> str:
+        """構造化された経路をJSON または 要約Markdownとして出力"""
+        if self.output_format == "json":
+            return to_json(result)
+        
+        dep_time = datetime.fromisoformat(result.departure_time)
+        lines = [
+            f"# {result.origin} → {result.destination}"
+            f"（{self._get_mode_name(result.mode)}、{dep_time.strftime('%m/%d %H:%M')}発）"
+        ]
+        for idx, route in enumerate(result.routes, 1):
+            parts = [route.duration, route.distance]
+            if route.duration_in_traffic:
+                parts.append(f"渋滞時 {route.duration_in_traffic}")
+            if route.fare_total:
+                parts.append(f"約{route.fare_total}円")
+            if route.lines:
+                parts.append(" → ".join(route.lines))
+            lines.append(f"- ルート{idx}: " + " / ".join(parts))
+        return "\n".join(lines) + "\n"
     
     def _get_mode_name(self, mode: str) -> str:
         """移動手段の日本語名を取得"""
@@ -178,32 +463,47 @@ class GoogleMapsDirectionsTool(BaseTool):
         return mode_names.get(mode, mode)
 
 
-class GoogleMapsDistanceMatrixTool(BaseTool):
+class GoogleMapsDistanceMatrixTool(AsyncToolMixin, BaseTool):
     """
     Google Maps Distance Matrix APIを使用して、
-    複数の移動手段を一度に比較するツール。
+    複数の出発地・目的地・移動手段を一度に比較するツール。
+    
+    移動手段ごとに全出発地 × 全目的地の行列を1リクエストで取得し、
+    移動手段間のリクエストは並列に実行します。
     """
     
     name: str = "Google Maps複数手段比較"
     description: str = (
         "出発地から目的地までの所要時間と距離を、"
         "複数の移動手段（自動車、公共交通機関、徒歩）で一度に比較します。"
+        "候補地が複数ある場合は destinations にまとめて指定すると、"
+        "全候補との所要時間を1回の呼び出しで一覧比較できます。"
         "最適な移動手段を選択するのに役立ちます。"
     )
     args_schema: Type[BaseModel] = GoogleMapsDistanceMatrixInput
+    # 出力形式: "markdown" または "json"／詳細度: "full" または "summary"
+    output_format: str = Field(default_factory=default_output_format)
+    verbosity: str = Field(default_factory=default_verbosity)
     
     def _run(
         self,
-        origin: str,
-        destination: str,
+        origin: Optional[str] = None,
+        destination: Optional[str] = None,
+        origins: Optional[List[str]] = None,
+        destinations: Optional[List[str]] = None,
         departure_time: Optional[str] = None,
     ) -> str:
         """
-        複数の移動手段の所要時間を比較して返します。
+        複数の出発地・目的地・移動手段の所要時間をまとめて比較して返します。
+        
+        移動手段ごとに1回（要素数の上限を超える場合は分割）の
+        Distance Matrix APIリクエストを並列に実行します。
         
         Args:
-            origin: 出発地点
-            destination: 目的地
+            origin: 出発地点（単一）
+            destination: 目的地（単一）
+            origins: 出発地点のリスト
+            destinations: 目的地のリスト
             departure_time: 出発時刻
             
         Returns:
@@ -211,65 +511,381 @@ class GoogleMapsDistanceMatrixTool(BaseTool):
         """
         api_key = os.getenv("GOOGLE_MAPS_API_KEY")
         if not api_key:
-            return "エラー: GOOGLE_MAPS_API_KEY環境変数が設定されていません。"
+            return ToolError("エラー: GOOGLE_MAPS_API_KEY環境変数が設定されていません。")
+        
+        origin_list = _merge_places(origin, origins)
+        destination_list = _merge_places(destination, destinations)
+        if not origin_list or not destination_list:
+            return ToolError("エラー: 出発地（origin/origins）と目的地（destination/destinations）を指定してください。")
         
         try:
-            gmaps = googlemaps.Client(key=api_key)
+            gmaps = get_client(api_key)
             
-            # 出発時刻の処理
-            if departure_time:
-                if departure_time.lower() == "now":
-                    dep_time = datetime.now()
-                else:
-                    dep_time = datetime.fromisoformat(departure_time)
-            else:
-                dep_time = datetime.now()
+            dep_time = _parse_departure_time(departure_time)
             
-            result_text = f"# {origin} → {destination} の移動手段比較\n\n"
-            result_text += f"**出発時刻**: {dep_time.strftime('%Y年%m月%d日 %H:%M')}\n\n"
-            result_text += "| 移動手段 | 所要時間 | 距離 | 備考 |\n"
-            result_text += "|---------|---------|------|------|\n"
+            # 事前計算した索引にある組は索引から答え、残りの組だけを問い合わせる
+            cells = _indexed_cells(origin_list, destination_list, dep_time)
+            jobs = _matrix_jobs(origin_list, destination_list, known=cells)
             
-            # 各移動手段で取得
-            modes = [
-                ("driving", "自動車"),
-                ("transit", "公共交通機関"),
-                ("walking", "徒歩"),
-            ]
+            def fetch(job):
+                mode, _, origin_chunk, _, destination_chunk = job
+                return call_api(
+                    "distance_matrix",
+                    gmaps.distance_matrix,
+                    origins=origin_chunk,
+                    destinations=destination_chunk,
+                    mode=mode,
+                    departure_time=dep_time,
+                    language="ja",
+                )
             
-            for mode, mode_name in modes:
-                try:
-                    matrix = gmaps.distance_matrix(
-                        origins=[origin],
-                        destinations=[destination],
-                        mode=mode,
-                        departure_time=dep_time,
-                        language="ja",
-                    )
-                    
-                    if matrix['rows'][0]['elements'][0]['status'] == 'OK':
-                        element = matrix['rows'][0]['elements'][0]
-                        duration = element['duration']['text']
-                        distance = element['distance']['text']
-                        
-                        # 自動車の場合は渋滞情報も
-                        note = ""
-                        if mode == "driving" and 'duration_in_traffic' in element:
-                            traffic_duration = element['duration_in_traffic']['text']
-                            note = f"渋滞時: {traffic_duration}"
-                        
-                        result_text += f"| {mode_name} | {duration} | {distance} | {note} |\n"
-                    else:
-                        result_text += f"| {mode_name} | 利用不可 | - | - |\n"
-                        
-                except Exception as e:
-                    result_text += f"| {mode_name} | エラー | - | {str(e)} |\n"
+            # 移動手段 × 分割単位ごとのリクエストをすべて並列に実行
+            outcomes = []
+            if jobs:
+                with ThreadPoolExecutor(max_workers=min(len(jobs), MAX_PARALLEL_REQUESTS)) as executor:
+                    futures = [executor.submit(fetch, job) for job in jobs]
+                    for future in futures:
+                        try:
+                            outcomes.append(future.result())
+                        except Exception as e:
+                            outcomes.append(e)
+            
+            fetched, errors = _collect_matrix(jobs, outcomes)
+            cells.update(fetched)
+            return self._format_matrix(origin_list, destination_list, dep_time, cells, errors)
+            
+        except googlemaps.exceptions.ApiError as e:
+            return ToolError(f"Google Maps APIエラー: {str(e)}")
+        except Exception as e:
+            return ToolError(f"エラーが発生しました: {str(e)}")
+    
+    async def _arun(
+        self,
+        origin: Optional[str] = None,
+        destination: Optional[str] = None,
+        origins: Optional[List[str]] = None,
+        destinations: Optional[List[str]] = None,
+        departure_time: Optional[str] = None,
+    ) -> str:
+        """
+        _run の非同期版。移動手段ごとのリクエストを共有の非同期HTTPクライアントで並行実行します。
+        
+        Args:
+            origin: 出発地点（単一）
+            destination: 目的地（単一）
+            origins: 出発地点のリスト
+            destinations: 目的地のリスト
+            departure_time: 出発時刻
             
-            result_text += "\n**推奨**: より詳細な情報が必要な場合は、Google Maps経路検索ツールを使用してください。\n"
+        Returns:
+            整形された比較表
+        """
+        api_key = os.getenv("GOOGLE_MAPS_API_KEY")
+        if not api_key:
+            return ToolError("エラー: GOOGLE_MAPS_API_KEY環境変数が設定されていません。")
+        
+        origin_list = _merge_places(origin, origins)
+        destination_list = _merge_places(destination, destinations)
+        if not origin_list or not destination_list:
+            return ToolError("エラー: 出発地（origin/origins）と目的地（destination/destinations）を指定してください。")
+        
+        try:
+            dep_time = _parse_departure_time(departure_time)
+            cells = _indexed_cells(origin_list, destination_list, dep_time)
+            jobs = _matrix_jobs(origin_list, destination_list, known=cells)
+            
+            async def fetch(job):
+                mode, _, origin_chunk, _, destination_chunk = job
+                return await _maps_request_async("distancematrix", api_key, {
+                    "origins": googlemaps.convert.location_list(origin_chunk),
+                    "destinations": googlemaps.convert.location_list(destination_chunk),
+                    "mode": mode,
+                    "departure_time": googlemaps.convert.time(dep_time),
+                    "language": "ja",
+                })
+            
+            outcomes = await asyncio.gather(*(fetch(job) for job in jobs), return_exceptions=True)
+            fetched, errors = _collect_matrix(jobs, outcomes)
+            cells.update(fetched)
             
-            return result_text
+            return self._format_matrix(origin_list, destination_list, dep_time, cells, errors)
             
         except googlemaps.exceptions.ApiError as e:
-            return f"Google Maps APIエラー: {str(e)}"
+            return ToolError(f"Google Maps APIエラー: {str(e)}")
         except Exception as e:
-            return f"エラーが発生しました: {str(e)}"
+            return ToolError(f"エラーが発生しました: {str(e)}")
+    
+    def _format_matrix(
+        self,
+        origins: List[str],
+        destinations: List[str],
+        dep_time: datetime,
+        cells: Dict[Tuple[str, int, int], dict],
+        errors: Dict[str, str],
+    ) -> str:
+        """出発地 × 目的地を行、移動手段を列とするコンパクトな比較表を作成"""
+        if self.output_format == "json":
+            return to_json(self._build_matrix(origins, destinations, dep_time, cells, errors))
+        
+        lines = [
+            f"# 移動手段比較（出発地{len(origins)}件 × 目的地{len(destinations)}件）",
+            "",
+            f"**出発時刻**: {dep_time.strftime('%Y年%m月%d日 %H:%M')}",
+            "",
+            "| 出発 | 到着 | " + " | ".join(name for _, name in MATRIX_MODES) + " |",
+            "|------|------|" + "|".join("------" for _ in MATRIX_MODES) + "|",
+        ]
+        
+        for i, origin in enumerate(origins):
+            for j, destination in enumerate(destinations):
+                row = [origin, destination]
+                for mode, _ in MATRIX_MODES:
+                    element = cells.get((mode, i, j))
+                    # 索引にもなく取得もできなかった組は、失敗したリクエストの組
+                    if element is None and mode in errors:
+                        row.append("エラー")
+                        continue
+                    if not element or element.get('status') != 'OK':
+                        row.append("利用不可")
+                        continue
+                    cell = f"{element['duration']['text']} / {element['distance']['text']}"
+                    # 自動車の場合は渋滞情報も
+                    if mode == "driving" and 'duration_in_traffic' in element:
+                        cell += f"（渋滞時: {element['duration_in_traffic']['text']}）"
+                    row.append(cell)
+                lines.append("| " + " | ".join(row) + " |")
+        
+        if errors:
+            lines.append("")
+            for mode, name in MATRIX_MODES:
+                if mode in errors:
+                    lines.append(f"- {name}: エラー（{errors[mode]}）")
+        
+        if self.verbosity == "full":
+            lines.append("")
+            lines.append("**推奨**: より詳細な情報が必要な場合は、Google Maps経路検索ツールを使用してください。")
+        return "\n".join(lines) + "\n"
+    
+    def _build_matrix(
+        self,
+        origins: List[str],
+        destinations: List[str],
+        dep_time: datetime,
+        cells: Dict[Tuple[str, int, int], dict],
+        errors: Dict[str, str],
+    ) -> DistanceMatrixResult:
+        """比較結果を構造化された結果に変換（リクエストが失敗した組の要素は除き、errors にまとめる）"""
+        items = []
+        for i, origin in enumerate(origins):
+            for j, destination in enumerate(destinations):
+                for mode, _ in MATRIX_MODES:
+                    element = cells.get((mode, i, j))
+                    if element is None and mode in errors:
+                        continue
+                    element = element or {}
+                    status = element.get('status', 'NOT_FOUND')
+                    items.append(MatrixCell(
+                        origin=origin,
+                        destination=destination,
+                        mode=mode,
+                        status=status,
+                        duration=element.get('duration', {}).get('text') if status == 'OK' else None,
+                        distance=element.get('distance', {}).get('text') if status == 'OK' else None,
+                        duration_in_traffic=(
+                            element.get('duration_in_traffic', {}).get('text')
+                            if status == 'OK' and mode == "driving" else None
+                        ),
+                    ))
+        return DistanceMatrixResult(
+            departure_time=dep_time.strftime("%Y-%m-%dT%H:%M"),
+            cells=items,
+            errors=errors,
+        )
+
+
+def _parse_departure_time(departure_time: Optional[str]) -> datetime:
+    """出発時刻の文字列（ISO形式 または 'now'）を datetime に変換。未指定なら現在時刻"""
+    if departure_time and departure_time.lower() != "now":
+        return datetime.fromisoformat(departure_time)
+    return datetime.now()
+
+
+async def _maps_request_async(endpoint: str, api_key: str, params: dict) -> dict:
+    """
+    Google Maps Web Service を非同期に呼び出し、レスポンス本文を返す。
+    
+    ステータスの扱いは googlemaps.Client と同じで、
+    OK / ZERO_RESULTS 以外は googlemaps.exceptions.ApiError を送出します。
+    同期版（call_api）と同じプロセス共通のレート制限を受け、上限超過・429・5xx は再試行します。
+    レイテンシは同期版と同じく試行ごとに記録し、レート制限の待ち時間やバックオフは含めません。
+    """
+    async def request() -> dict:
+        with track_latency(LATENCY_ENDPOINTS.get(endpoint, endpoint)):
+            body = await get_json(f"{MAPS_BASE_URL}/{endpoint}/json", {**params, "key": api_key})
+        status = body.get("status")
+        if status in ("OK", "ZERO_RESULTS"):
+            return body
+        if status == "OVER_QUERY_LIMIT":
+            raise googlemaps.exceptions._OverQueryLimit(status, body.get("error_message"))
+        raise googlemaps.exceptions.ApiError(status, body.get("error_message"))
+
+    return await get_limiter("google_maps").acall(request)
+
+
+def fetch_matrix_elements(
+    origins: List[str],
+    destinations: List[str],
+    mode: str,
+    dep_time: datetime,
+    known: Optional[Dict[Tuple[str, int, int], dict]] = None,
+) -> Dict[Tuple[int, int], dict]:
+    """
+    origins × destinations の Distance Matrix 要素を (出発地番号, 目的地番号) ごとに返します。
+
+    known（(移動手段, 出発地番号, 目的地番号) ごとの要素）にある組は問い合わせず、
+    残りの組を API の上限に収まる単位に分割して並列に取得します。
+    """
+    elements = dict(known or {})
+    jobs = _matrix_jobs(origins, destinations, [mode], elements)
+    if jobs:
+        api_key = os.getenv("GOOGLE_MAPS_API_KEY")
+        if not api_key:
+            raise ValueError("GOOGLE_MAPS_API_KEY環境変数が設定されていません。")
+        gmaps = get_client(api_key)
+
+        def fetch(job):
+            _, _, origin_chunk, _, destination_chunk = job
+            return call_api(
+                "distance_matrix",
+                gmaps.distance_matrix,
+                origins=origin_chunk,
+                destinations=destination_chunk,
+                mode=mode,
+                departure_time=dep_time,
+                language="ja",
+            )
+
+        with ThreadPoolExecutor(max_workers=min(len(jobs), MAX_PARALLEL_REQUESTS)) as executor:
+            responses = list(executor.map(fetch, jobs))
+        fetched, _ = _collect_matrix(jobs, responses)
+        elements.update(fetched)
+    return {(i, j): element for (_, i, j), element in elements.items()}
+
+
+def fetch_duration_matrix(places: List[str], mode: str, dep_time: datetime) -> List[List[Optional[float]]]:
+    """
+    地点間の所要時間（秒）の正方行列を返します。
+
+    事前計算した索引にある組は索引から、残りは Distance Matrix API から取得し、
+    matrix[i][j] に places[i] から places[j] への所要時間を入れます（経路がなければ None）。
+    自動車は渋滞を考慮した所要時間があればそちらを使います。
+    """
+    known = _indexed_cells(places, places, dep_time, [mode])
+    # 同じ地点どうしは問い合わせるまでもない
+    for i in range(len(places)):
+        known[(mode, i, i)] = {'status': 'OK', 'duration': {'value': 0}}
+
+    matrix: List[List[Optional[float]]] = [[None] * len(places) for _ in places]
+    for (i, j), element in fetch_matrix_elements(places, places, mode, dep_time, known).items():
+        if element.get('status') != 'OK':
+            continue
+        duration = element.get('duration_in_traffic') or element['duration']
+        matrix[i][j] = float(duration['value'])
+    for i in range(len(places)):
+        matrix[i][i] = 0.0
+    return matrix
+
+
+def _indexed_cells(
+    origins: List[str],
+    destinations: List[str],
+    dep_time: datetime,
+    modes: Optional[List[str]] = None,
+) -> Dict[Tuple[str, int, int], dict]:
+    """事前計算した所要時間の索引から答えられる要素（索引がなければ空）"""
+    index = get_travel_index()
+    if index is None:
+        return {}
+    return index.elements(origins, destinations, modes or [mode for mode, _ in MATRIX_MODES], dep_time)
+
+
+def _merge_places(single: Optional[str], many: Optional[List[str]]) -> List[str]:
+    """単一指定とリスト指定をまとめ、空要素と重複を取り除く"""
+    places: List[str] = []
+    for place in ([single] if single else []) + list(many or []):
+        place = place.strip()
+        if place and place not in places:
+            places.append(place)
+    return places
+
+
+def _matrix_chunks(origins: List[str], destinations: List[str]):
+    """
+    APIの上限（1リクエスト25地点・100要素）に収まるように
+    出発地・目的地を分割し、(出発地オフセット, 出発地, 目的地オフセット, 目的地) を返す
+    """
+    origin_size = min(len(origins), MAX_PLACES_PER_REQUEST)
+    destination_size = max(1, min(MAX_PLACES_PER_REQUEST, MAX_ELEMENTS_PER_REQUEST // origin_size))
+    for origin_offset in range(0, len(origins), origin_size):
+        for destination_offset in range(0, len(destinations), destination_size):
+            yield (
+                origin_offset,
+                origins[origin_offset:origin_offset + origin_size],
+                destination_offset,
+                destinations[destination_offset:destination_offset + destination_size],
+            )
+
+
+def _matrix_jobs(
+    origins: List[str],
+    destinations: List[str],
+    modes: Optional[List[str]] = None,
+    known: Optional[Dict[Tuple[str, int, int], dict]] = None,
+) -> List[tuple]:
+    """
+    移動手段 × 分割単位ごとのリクエスト一覧を
+    (移動手段, 出発地番号, 出発地, 目的地番号, 目的地) の形で作成。
+    known に含まれる組だけの出発地・目的地はリクエストしない
+    """
+    known = known or {}
+    jobs = []
+    for mode in modes or [mode for mode, _ in MATRIX_MODES]:
+        origin_ids = [
+            i for i in range(len(origins))
+            if any((mode, i, j) not in known for j in range(len(destinations)))
+        ]
+        destination_ids = [
+            j for j in range(len(destinations))
+            if any((mode, i, j) not in known for i in origin_ids)
+        ]
+        if not origin_ids:
+            continue
+        for origin_offset, origin_chunk, destination_offset, destination_chunk in _matrix_chunks(
+            [origins[i] for i in origin_ids], [destinations[j] for j in destination_ids]
+        ):
+            jobs.append((
+                mode,
+                origin_ids[origin_offset:origin_offset + len(origin_chunk)],
+                origin_chunk,
+                destination_ids[destination_offset:destination_offset + len(destination_chunk)],
+                destination_chunk,
+            ))
+    return jobs
+
+
+def _collect_matrix(jobs: List[tuple], outcomes: List) -> Tuple[Dict[Tuple[str, int, int], dict], Dict[str, str]]:
+    """
+    各リクエストの結果（レスポンス または 例外）を
+    (移動手段, 出発地番号, 目的地番号) ごとの要素と、移動手段ごとのエラーにまとめる。
+    失敗したリクエストの組は要素に含めない
+    """
+    cells: Dict[Tuple[str, int, int], dict] = {}
+    errors: Dict[str, str] = {}
+    for (mode, origin_ids, _, destination_ids, _), outcome in zip(jobs, outcomes):
+        if isinstance(outcome, Exception):
+            errors.setdefault(mode, str(outcome))
+            continue
+        for i, row in enumerate(outcome['rows']):
+            for j, element in enumerate(row['elements']):
+                cells[(mode, origin_ids[i], destination_ids[j])] = element
+    return cells, errors
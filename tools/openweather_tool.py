@@ -4,27 +4,261 @@ Provides weather forecast data for specified locations and dates.
 No API key required - completely free!
 """
 
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Type
+from typing import List, Optional, Type
+import httpx
 import requests
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
 
+from . import prefetch, telemetry
+from .async_support import AsyncToolMixin, get_json
+from .rate_limit import get_limiter
+from .output import ToolError, default_output_format, default_verbosity, to_json
+from .cache import (
+    MemoryLRUCache,
+    SQLiteLRUCache,
+    TieredCache,
+    cache_dir,
+    env_seconds,
+    normalize_key,
+)
+
+logger = logging.getLogger(__name__)
+
+# Geocoding cache settings (TTL in seconds; unset or 0 means entries never expire)
+GEOCODE_CACHE_ENABLED = os.getenv("OPENMETEO_GEOCODE_CACHE", "1") != "0"
+GEOCODE_CACHE_SIZE = int(os.getenv("OPENMETEO_GEOCODE_CACHE_SIZE", "2000"))
+GEOCODE_CACHE_TTL = env_seconds("OPENMETEO_GEOCODE_TTL", None)
+
+# Forecast cache settings. Open-Meteo refreshes its models roughly hourly, so a
+# forecast for one grid cell is reused for the rest of the current update window.
+FORECAST_CACHE_TTL = env_seconds("OPENMETEO_FORECAST_TTL", 3600)
+FORECAST_GRID_DECIMALS = int(os.getenv("OPENMETEO_FORECAST_GRID_DECIMALS", "2"))
+FORECAST_CACHE_SIZE = int(os.getenv("OPENMETEO_FORECAST_CACHE_SIZE", "256"))
+FORECAST_DISK_CACHE = os.getenv("OPENMETEO_FORECAST_DISK_CACHE", "0") == "1"
+
+GEOCODING_URL = "https://geocoding-api.open-meteo.com/v1/search"
+FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
+HOURLY_FIELDS = "temperature_2m,relative_humidity_2m,precipitation_probability,weather_code,wind_speed_10m"
+DAILY_FIELDS = "temperature_2m_max,temperature_2m_min,precipitation_probability_max,weather_code"
+
+# Batch mode: maximum locations per call and parallel geocoding requests
+MAX_BATCH_LOCATIONS = 20
+MAX_PARALLEL_GEOCODING = 8
+
+_geocode_cache: Optional[SQLiteLRUCache] = None
+_geocode_cache_lock = threading.Lock()
+_forecast_cache: Optional[TieredCache] = None
+_forecast_cache_lock = threading.Lock()
+
+
+def get_geocode_cache() -> Optional[SQLiteLRUCache]:
+    """
+    Return the process-wide geocoding cache, creating it on first use.
+
+    Returns None when caching is disabled or the cache directory is not writable,
+    in which case every lookup goes to the geocoding API.
+    """
+    global _geocode_cache
+    if not GEOCODE_CACHE_ENABLED:
+        return None
+    if _geocode_cache is None:
+        with _geocode_cache_lock:
+            if _geocode_cache is None:
+                try:
+                    _geocode_cache = SQLiteLRUCache(
+                        cache_dir() / "geocode.sqlite3",
+                        max_entries=GEOCODE_CACHE_SIZE,
+                        ttl=GEOCODE_CACHE_TTL,
+                    )
+                except (OSError, sqlite3.Error) as e:
+                    logger.warning("Geocoding cache disabled: %s", e)
+                    return None
+    return _geocode_cache
+
+
+def get_forecast_cache() -> TieredCache:
+    """
+    Return the process-wide forecast cache, creating it on first use.
+
+    The in-memory tier is always enabled; the on-disk tier is added when
+    OPENMETEO_FORECAST_DISK_CACHE=1 so separate processes can share payloads.
+    """
+    global _forecast_cache
+    if _forecast_cache is None:
+        with _forecast_cache_lock:
+            if _forecast_cache is None:
+                disk = None
+                if FORECAST_DISK_CACHE:
+                    try:
+                        disk = SQLiteLRUCache(
+                            cache_dir() / "forecast.sqlite3",
+                            max_entries=FORECAST_CACHE_SIZE,
+                            ttl=FORECAST_CACHE_TTL,
+                        )
+                    except (OSError, sqlite3.Error) as e:
+                        logger.warning("On-disk forecast cache disabled: %s", e)
+                _forecast_cache = TieredCache(
+                    MemoryLRUCache(max_entries=FORECAST_CACHE_SIZE, ttl=FORECAST_CACHE_TTL),
+                    disk,
+                )
+    return _forecast_cache
+
+
+def _request_json(url: str, params: dict) -> dict:
+    """GET an Open-Meteo JSON document within the process-wide rate limit."""
+    def request() -> dict:
+        with telemetry.network_timer():
+            response = requests.get(url, params=params, timeout=10)
+        response.raise_for_status()
+        return response.json()
+
+    return get_limiter("open_meteo").call(request)
+
+
+async def _arequest_json(url: str, params: dict) -> dict:
+    """Async version of _request_json using the shared async HTTP client."""
+    return await get_limiter("open_meteo").acall(get_json, url, params)
+
+
+def grid_cell(lat: float, lon: float) -> tuple:
+    """Round coordinates to the forecast cache grid (0.01° ≈ 1 km by default)."""
+    return round(lat, FORECAST_GRID_DECIMALS), round(lon, FORECAST_GRID_DECIMALS)
+
+
+def forecast_cache_key(lat: float, lon: float, now: Optional[float] = None) -> str:
+    """
+    Build the forecast cache key from the grid cell and the current update window.
+
+    The window index changes every FORECAST_CACHE_TTL seconds, so entries
+    roll over together with Open-Meteo's model updates.
+    """
+    cell_lat, cell_lon = grid_cell(lat, lon)
+    window = int((now if now is not None else time.time()) // FORECAST_CACHE_TTL) if FORECAST_CACHE_TTL else 0
+    return f"{cell_lat:.{FORECAST_GRID_DECIMALS}f},{cell_lon:.{FORECAST_GRID_DECIMALS}f}@{window}"
+
+
+# WMO Weather interpretation codes -> Japanese description
+WEATHER_CODES = {
+    0: "快晴",
+    1: "晴れ",
+    2: "一部曇り",
+    3: "曇り",
+    45: "霧",
+    48: "霧氷",
+    51: "小雨",
+    53: "雨",
+    55: "強い雨",
+    56: "凍雨（弱）",
+    57: "凍雨（強）",
+    61: "弱い雨",
+    63: "雨",
+    65: "強い雨",
+    66: "凍った雨（弱）",
+    67: "凍った雨（強）",
+    71: "弱い雪",
+    73: "雪",
+    75: "強い雪",
+    77: "みぞれ",
+    80: "にわか雨（弱）",
+    81: "にわか雨",
+    82: "にわか雨（強）",
+    85: "にわか雪（弱）",
+    86: "にわか雪（強）",
+    95: "雷雨",
+    96: "雷雨と雹（弱）",
+    99: "雷雨と雹（強）"
+}
+
 
 class OpenMeteoToolInput(BaseModel):
     """Input schema for OpenMeteoTool."""
-    location: str = Field(..., description="Location name (e.g., '東京', 'Tokyo', '渋谷区')")
+    location: Optional[str] = Field(None, description="Location name (e.g., '東京', 'Tokyo', '渋谷区')")
     date: Optional[str] = Field(None, description="Date for forecast in YYYY-MM-DD format. If not provided, uses current date.")
+    locations: Optional[List[str]] = Field(
+        None,
+        description="Batch mode: several location names to compare at once (e.g., ['東京駅', '渋谷区', '横浜']).",
+    )
+    end_date: Optional[str] = Field(
+        None,
+        description="Batch mode: last date of the range in YYYY-MM-DD format. The range starts at 'date'.",
+    )
+
+
+class HourlyForecast(BaseModel):
+    """One hour of the forecast."""
+    time: str
+    weather: str
+    temperature: float
+    humidity: Optional[float] = None
+    wind_speed: Optional[float] = None
+    precipitation_probability: Optional[int] = None
+
+
+class ForecastBlock(BaseModel):
+    """Aggregate of several consecutive hours (3 by default)."""
+    start: str
+    end: str
+    weather: str
+    temperature_min: float
+    temperature_max: float
+    precipitation_probability: Optional[int] = None
+
 
+class WeatherReport(BaseModel):
+    """Structured single-location forecast for one day."""
+    location: str
+    date: str
+    weather: str
+    temperature_max: float
+    temperature_min: float
+    precipitation_probability: Optional[int] = None
+    advice: List[str] = []
+    hourly: Optional[List[HourlyForecast]] = None
+    blocks: Optional[List[ForecastBlock]] = None
 
-class OpenMeteoTool(BaseTool):
+
+class WeatherComparisonRow(BaseModel):
+    location: str
+    date: str
+    weather: Optional[str] = None
+    temperature_max: Optional[float] = None
+    temperature_min: Optional[float] = None
+    precipitation_probability: Optional[int] = None
+    outdoor: Optional[str] = None
+
+
+class WeatherComparison(BaseModel):
+    """Structured batch comparison of several locations and dates."""
+    start_date: str
+    end_date: str
+    rows: List[WeatherComparisonRow]
+    not_found: List[str] = []
+
+
+class OpenMeteoTool(AsyncToolMixin, BaseTool):
     name: str = "天気予報取得"
     description: str = (
         "Open-Meteo APIを使用して、指定された場所の天気予報を取得します。"
         "現在の天気、7日間の予報、気温、湿度、風速、降水確率などの詳細情報を提供します。"
+        "複数の場所（locations）と期間（date〜end_date）を指定すると、"
+        "全地点の日別予報を1回の呼び出しで比較表として返します。"
         "APIキー不要で完全無料です。"
     )
     args_schema: Type[BaseModel] = OpenMeteoToolInput
+    # "markdown" or "json"; "full" or "summary" (daily summary plus 3-hour blocks)
+    output_format: str = Field(default_factory=default_output_format)
+    verbosity: str = Field(default_factory=default_verbosity)
+    block_hours: int = 3
 
     def _get_weather_description(self, weather_code: int) -> str:
         """
@@ -36,180 +270,672 @@ class OpenMeteoTool(BaseTool):
         Returns:
             Japanese weather description
         """
-        weather_codes = {
-            0: "快晴",
-            1: "晴れ",
-            2: "一部曇り",
-            3: "曇り",
-            45: "霧",
-            48: "霧氷",
-            51: "小雨",
-            53: "雨",
-            55: "強い雨",
-            56: "凍雨（弱）",
-            57: "凍雨（強）",
-            61: "弱い雨",
-            63: "雨",
-            65: "強い雨",
-            66: "凍った雨（弱）",
-            67: "凍った雨（強）",
-            71: "弱い雪",
-            73: "雪",
-            75: "強い雪",
-            77: "みぞれ",
-            80: "にわか雨（弱）",
-            81: "にわか雨",
-            82: "にわか雨（強）",
-            85: "にわか雪（弱）",
-            86: "にわか雪（強）",
-            95: "雷雨",
-            96: "雷雨と雹（弱）",
-            99: "雷雨と雹（強）"
+        return WEATHER_CODES.get(weather_code, f"不明({weather_code})")
+
+    def _geocode(self, location: str) -> Optional[dict]:
+        """
+        Resolve a location name to coordinates using the Open-Meteo Geocoding API.
+        
+        Results are kept in the persistent geocoding cache keyed by the normalized
+        location name, so known places never hit the network again.
+        
+        Args:
+            location: Location name (e.g., '東京', '渋谷区')
+            
+        Returns:
+            Dict with latitude, longitude, name, country and admin1, or None if not found
+        """
+        cache = get_geocode_cache()
+        key = normalize_key(location)
+        if cache is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+        
+        # Started at kickoff for the planner's location and home
+        prefetched = prefetch.resolved("geocode", key)
+        if prefetched is not None:
+            return prefetched.result()
+        
+        geo_data = _request_json(GEOCODING_URL, self._geocode_params(location))
+        return self._store_geocode(cache, key, location, geo_data)
+
+    async def _ageocode(self, location: str) -> Optional[dict]:
+        """Async version of _geocode using the shared async HTTP client."""
+        cache = get_geocode_cache()
+        key = normalize_key(location)
+        if cache is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+        
+        prefetched = await prefetch.aresolved("geocode", key)
+        if prefetched is not None:
+            return prefetched.result()
+        
+        geo_data = await _arequest_json(GEOCODING_URL, self._geocode_params(location))
+        return self._store_geocode(cache, key, location, geo_data)
+
+    def _geocode_params(self, location: str) -> dict:
+        return {
+            "name": location,
+            "count": 1,
+            "language": "ja",
+            "format": "json"
+        }
+
+    def _store_geocode(
+        self, cache: Optional[SQLiteLRUCache], key: str, location: str, geo_data: dict
+    ) -> Optional[dict]:
+        """Extract the first geocoding result and store it in the cache."""
+        if not geo_data.get("results"):
+            return None
+        
+        first = geo_data["results"][0]
+        result = {
+            "latitude": first["latitude"],
+            "longitude": first["longitude"],
+            "name": first.get("name", location),
+            "country": first.get("country", ""),
+            "admin1": first.get("admin1", ""),
         }
-        return weather_codes.get(weather_code, f"不明({weather_code})")
+        if cache is not None:
+            cache.set(key, result)
+        return result
+
+    def _forecast_params(self, cells: List[tuple]) -> dict:
+        """Forecast request parameters for one or more grid cells."""
+        if len(cells) == 1:
+            latitude, longitude = cells[0]
+        else:
+            latitude = ",".join(str(lat) for lat, _ in cells)
+            longitude = ",".join(str(lon) for _, lon in cells)
+        return {
+            "latitude": latitude,
+            "longitude": longitude,
+            "hourly": HOURLY_FIELDS,
+            "daily": DAILY_FIELDS,
+            "timezone": "Asia/Tokyo",
+            "forecast_days": 7
+        }
+
+    def _fetch_forecast(self, lat: float, lon: float) -> dict:
+        """
+        Fetch the 7-day hourly and daily forecast for a grid cell.
+        
+        The payload is cached per grid cell and update window, so every date
+        lookup for the same area within the TTL reuses a single request.
+        
+        Args:
+            lat: Latitude
+            lon: Longitude
+            
+        Returns:
+            Open-Meteo forecast response payload
+        """
+        cell = grid_cell(lat, lon)
+        key = forecast_cache_key(lat, lon)
+        
+        def fetch() -> dict:
+            prefetched = prefetch.resolved("forecast", key)
+            if prefetched is not None:
+                return prefetched.result()
+            return _request_json(FORECAST_URL, self._forecast_params([cell]))
+        
+        return get_forecast_cache().get_or_fetch(key, fetch)
+
+    async def _afetch_forecast(self, lat: float, lon: float) -> dict:
+        """Async version of _fetch_forecast using the shared async HTTP client."""
+        key = forecast_cache_key(lat, lon)
+        if get_forecast_cache().get(key) is None:
+            prefetched = await prefetch.aresolved("forecast", key)
+            if prefetched is not None:
+                return prefetched.result()
+        return (await self._afetch_forecasts([(lat, lon)]))[0]
+
+    def _format_hourly(self, hourly_data: dict, target_date_str: str) -> List[str]:
+        """
+        Format the hourly forecast blocks for one day.
+        
+        The hourly series is sorted ISO timestamps, so the target day is a
+        contiguous index range found by bisection; each field is then sliced
+        as a column instead of parsing and indexing every row.
+        
+        Args:
+            hourly_data: The "hourly" section of an Open-Meteo payload
+            target_date_str: Target date in YYYY-MM-DD format
+            
+        Returns:
+            Output parts for the hourly section, to be joined by the caller
+        """
+        hourly_times = hourly_data.get("time", [])
+        start, end = self._day_range(hourly_times, target_date_str)
+        
+        columns = zip(
+            hourly_times[start:end],
+            hourly_data.get("temperature_2m", [])[start:end],
+            hourly_data.get("relative_humidity_2m", [])[start:end],
+            hourly_data.get("wind_speed_10m", [])[start:end],
+            hourly_data.get("weather_code", [])[start:end],
+            hourly_data.get("precipitation_probability", [])[start:end],
+        )
+        describe = self._get_weather_description
+        return [
+            f"\n### {time_str[11:16]}\n"
+            f"- 天気: {describe(weather_code)}\n"
+            f"- 気温: {temp:.1f}°C\n"
+            f"- 湿度: {humidity}%\n"
+            f"- 風速: {wind_speed:.1f} m/s\n"
+            f"- 降水確率: {precip_prob}%\n"
+            for time_str, temp, humidity, wind_speed, weather_code, precip_prob in columns
+        ]
+
+    def _day_range(self, hourly_times: List[str], target_date_str: str) -> tuple:
+        """Index range [start, end) of the target day in the sorted hourly timestamps."""
+        next_date_str = (datetime.strptime(target_date_str, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+        start = bisect_left(hourly_times, target_date_str)
+        return start, bisect_left(hourly_times, next_date_str, lo=start)
+
+    def _hourly_models(self, hourly_data: dict, target_date_str: str) -> List[HourlyForecast]:
+        """Hourly forecast of the target day as models (structured full output)."""
+        hourly_times = hourly_data.get("time", [])
+        start, end = self._day_range(hourly_times, target_date_str)
+        columns = zip(
+            hourly_times[start:end],
+            hourly_data.get("temperature_2m", [])[start:end],
+            hourly_data.get("relative_humidity_2m", [])[start:end],
+            hourly_data.get("wind_speed_10m", [])[start:end],
+            hourly_data.get("weather_code", [])[start:end],
+            hourly_data.get("precipitation_probability", [])[start:end],
+        )
+        return [
+            HourlyForecast(
+                time=time_str[11:16],
+                weather=self._get_weather_description(weather_code),
+                temperature=temp,
+                humidity=humidity,
+                wind_speed=wind_speed,
+                precipitation_probability=precip_prob,
+            )
+            for time_str, temp, humidity, wind_speed, weather_code, precip_prob in columns
+        ]
+
+    def _hour_blocks(self, hourly_data: dict, target_date_str: str) -> List[ForecastBlock]:
+        """
+        Aggregate the target day into blocks of block_hours hours.
+        
+        Each block reports the most severe weather code, the temperature
+        range and the highest precipitation probability within it.
+        """
+        hourly_times = hourly_data.get("time", [])
+        start, end = self._day_range(hourly_times, target_date_str)
+        times = hourly_times[start:end]
+        temps = hourly_data.get("temperature_2m", [])[start:end]
+        codes = hourly_data.get("weather_code", [])[start:end]
+        precip = hourly_data.get("precipitation_probability", [])[start:end]
+        
+        blocks = []
+        for offset in range(0, len(times), self.block_hours):
+            block = slice(offset, offset + self.block_hours)
+            block_temps = [t for t in temps[block] if t is not None]
+            block_codes = [c for c in codes[block] if c is not None]
+            block_precip = [p for p in precip[block] if p is not None]
+            if not block_temps:
+                continue
+            first_hour = int(times[offset][11:13])
+            blocks.append(ForecastBlock(
+                start=f"{first_hour:02d}:00",
+                end=f"{first_hour + len(times[block]):02d}:00",
+                weather=self._get_weather_description(max(block_codes)) if block_codes else "不明",
+                temperature_min=min(block_temps),
+                temperature_max=max(block_temps),
+                precipitation_probability=max(block_precip) if block_precip else None,
+            ))
+        return blocks
+
+    def _advice(self, rain_prob: int, max_temp: float, min_temp: float) -> List[str]:
+        """Outing advice derived from the daily summary."""
+        advice = []
+        # Open-Meteo returns null for some dates and grid cells
+        if rain_prob is not None and rain_prob > 50:
+            advice.append("⚠️ 降水確率が高いです。傘や雨具を必ず持参してください。")
+            advice.append("屋内施設を中心としたプランをおすすめします。")
+        elif rain_prob is not None and rain_prob > 20:
+            advice.append("折りたたみ傘を持参することをおすすめします。")
+        
+        if max_temp > 30:
+            advice.append("🌡️ 暑い日です。水分補給と熱中症対策をしっかりと。")
+            advice.append("日焼け止め、帽子、サングラスの持参をおすすめします。")
+        elif max_temp < 10:
+            advice.append("🧥 寒い日です。暖かい服装で出かけてください。")
+            advice.append("カイロやマフラーなどの防寒具があると良いでしょう。")
+        elif min_temp < 15 and max_temp > 20:
+            advice.append("👕 寒暖差があります。調整しやすい服装（上着など）がおすすめです。")
+        return advice
+
+    def _render_report(self, report: WeatherReport) -> str:
+        """Render a structured report as JSON or as compact (summary) Markdown."""
+        if self.output_format == "json":
+            return to_json(report)
+        
+        target_date = datetime.strptime(report.date, "%Y-%m-%d")
+        lines = [
+            f"# 天気予報: {report.location}（{target_date.strftime('%Y年%m月%d日')}）",
+            f"- {report.weather} / 最高 {report.temperature_max:.1f}°C / 最低 {report.temperature_min:.1f}°C"
+            f" / 降水確率 {report.precipitation_probability}%",
+            "",
+            "| 時間帯 | 天気 | 気温 | 降水確率 |",
+            "|--------|------|------|----------|",
+        ]
+        for block in report.blocks or []:
+            lines.append(
+                f"| {block.start}-{block.end} | {block.weather} | "
+                f"{block.temperature_min:.1f}〜{block.temperature_max:.1f}°C | {block.precipitation_probability}% |"
+            )
+        if report.advice:
+            lines.append("")
+            lines.extend(f"- {advice}" for advice in report.advice)
+        return "\n".join(lines) + "\n"
+
+    def _fetch_forecasts(self, coordinates: List[tuple]) -> List[dict]:
+        """
+        Fetch forecasts for several coordinates with a single multi-coordinate request.
+        
+        Grid cells already in the forecast cache are served from it; only the
+        missing cells are requested, as comma-separated latitude/longitude lists.
+        
+        Args:
+            coordinates: List of (latitude, longitude) tuples
+            
+        Returns:
+            Forecast payloads in the same order as coordinates
+        """
+        keys, payloads, missing = self._cached_forecasts(coordinates)
+        if missing:
+            cells = [grid_cell(*coordinates[i]) for _, i in missing]
+            fetched = _request_json(FORECAST_URL, self._forecast_params(cells))
+            payloads = self._store_forecasts(keys, payloads, missing, fetched)
+        return payloads
+
+    async def _afetch_forecasts(self, coordinates: List[tuple]) -> List[dict]:
+        """Async version of _fetch_forecasts using the shared async HTTP client."""
+        keys, payloads, missing = self._cached_forecasts(coordinates)
+        if missing:
+            cells = [grid_cell(*coordinates[i]) for _, i in missing]
+            fetched = await _arequest_json(FORECAST_URL, self._forecast_params(cells))
+            payloads = self._store_forecasts(keys, payloads, missing, fetched)
+        return payloads
+
+    def _cached_forecasts(self, coordinates: List[tuple]) -> tuple:
+        """Look up each coordinate in the forecast cache and list the missing keys."""
+        cache = get_forecast_cache()
+        keys = [forecast_cache_key(lat, lon) for lat, lon in coordinates]
+        payloads = [cache.get(key) for key in keys]
+        missing = list({key: i for i, key in enumerate(keys) if payloads[i] is None}.items())
+        return keys, payloads, missing
 
-    def _run(self, location: str, date: Optional[str] = None) -> str:
+    def _store_forecasts(self, keys: List[str], payloads: List[Optional[dict]], missing: List[tuple], fetched) -> List[dict]:
+        """Cache freshly fetched payloads and fill them into the result list."""
+        cache = get_forecast_cache()
+        # A single coordinate returns an object instead of a list
+        if isinstance(fetched, dict):
+            fetched = [fetched]
+        fetched_by_key = {key: payload for (key, _), payload in zip(missing, fetched)}
+        for key, payload in fetched_by_key.items():
+            cache.set(key, payload)
+        return [fetched_by_key.get(key) if payload is None else payload for key, payload in zip(keys, payloads)]
+
+    def _run(
+        self,
+        location: Optional[str] = None,
+        date: Optional[str] = None,
+        locations: Optional[List[str]] = None,
+        end_date: Optional[str] = None,
+    ) -> str:
         """
         Get weather forecast for a specified location and date.
         
+        When locations or end_date is given, switches to batch mode and
+        returns a compact per-location, per-date comparison instead.
+        
         Args:
             location: Location name (e.g., '東京', 'Tokyo')
             date: Target date in YYYY-MM-DD format (optional)
+            locations: Several location names for batch mode (optional)
+            end_date: Last date of the range for batch mode (optional)
             
         Returns:
             Formatted weather forecast information
         """
+        if locations or end_date:
+            return self._run_batch(self._batch_names(location, locations), date, end_date)
+        if not location:
+            return ToolError("エラー: locationを指定してください。")
+        
         try:
-            # Get coordinates for the location using Open-Meteo Geocoding API
-            geo_url = "https://geocoding-api.open-meteo.com/v1/search"
-            geo_params = {
-                "name": location,
-                "count": 1,
-                "language": "ja",
-                "format": "json"
-            }
-            
-            geo_response = requests.get(geo_url, params=geo_params, timeout=10)
-            geo_response.raise_for_status()
-            geo_data = geo_response.json()
-            
-            if not geo_data.get("results"):
-                return f"エラー: '{location}'の位置情報が見つかりませんでした。別の地名をお試しください。"
-            
-            result = geo_data["results"][0]
-            lat = result["latitude"]
-            lon = result["longitude"]
-            location_name = result.get("name", location)
-            country = result.get("country", "")
-            admin1 = result.get("admin1", "")
-            
-            # Format location name with region info
-            display_location = location_name
-            if admin1 and admin1 != location_name:
-                display_location = f"{location_name}（{admin1}）"
-            if country:
-                display_location = f"{display_location}, {country}"
-            
-            # Parse target date
-            if date:
-                try:
-                    target_date = datetime.strptime(date, "%Y-%m-%d").date()
-                except ValueError:
-                    target_date = datetime.now().date()
-            else:
-                target_date = datetime.now().date()
+            # Get coordinates for the location (cached, so repeated areas skip the HTTP call)
+            result = self._geocode(location)
+            if result is None:
+                return ToolError(f"エラー: '{location}'の位置情報が見つかりませんでした。別の地名をお試しください。")
             
-            # Get weather forecast from Open-Meteo
-            forecast_url = "https://api.open-meteo.com/v1/forecast"
-            forecast_params = {
-                "latitude": lat,
-                "longitude": lon,
-                "hourly": "temperature_2m,relative_humidity_2m,precipitation_probability,weather_code,wind_speed_10m",
-                "daily": "temperature_2m_max,temperature_2m_min,precipitation_probability_max,weather_code",
-                "timezone": "Asia/Tokyo",
-                "forecast_days": 7
-            }
-            
-            forecast_response = requests.get(forecast_url, params=forecast_params, timeout=10)
-            forecast_response.raise_for_status()
-            forecast_data = forecast_response.json()
-            
-            # Find data for target date
-            daily_data = forecast_data.get("daily", {})
-            daily_times = daily_data.get("time", [])
+            # Get weather forecast from Open-Meteo (one 7-day payload per grid cell)
+            forecast_data = self._fetch_forecast(result["latitude"], result["longitude"])
             
-            target_date_str = target_date.strftime("%Y-%m-%d")
+            return self._format_report(location, result, date, forecast_data)
             
-            if target_date_str not in daily_times:
-                return f"エラー: {target_date}の予報データが見つかりませんでした（予報は7日先までです）。"
-            
-            day_index = daily_times.index(target_date_str)
+        except requests.exceptions.RequestException as e:
+            return ToolError(f"エラー: 天気情報の取得に失敗しました。{str(e)}")
+        except Exception as e:
+            return ToolError(f"エラー: {str(e)}")
+
+    async def _arun(
+        self,
+        location: Optional[str] = None,
+        date: Optional[str] = None,
+        locations: Optional[List[str]] = None,
+        end_date: Optional[str] = None,
+    ) -> str:
+        """
+        Async version of _run.
+        
+        Uses the shared async HTTP client, so concurrent crews overlap their
+        network waits instead of blocking one thread per call.
+        """
+        if locations or end_date:
+            return await self._arun_batch(self._batch_names(location, locations), date, end_date)
+        if not location:
+            return ToolError("エラー: locationを指定してください。")
+        
+        try:
+            result = await self._ageocode(location)
+            if result is None:
+                return ToolError(f"エラー: '{location}'の位置情報が見つかりませんでした。別の地名をお試しください。")
             
-            # Get daily summary
-            max_temp = daily_data.get("temperature_2m_max", [])[day_index]
-            min_temp = daily_data.get("temperature_2m_min", [])[day_index]
-            rain_prob = daily_data.get("precipitation_probability_max", [])[day_index]
-            daily_weather_code = daily_data.get("weather_code", [])[day_index]
-            main_weather = self._get_weather_description(daily_weather_code)
+            forecast_data = await self._afetch_forecast(result["latitude"], result["longitude"])
             
-            # Format the output
-            result_text = f"# 天気予報: {display_location}\n"
-            result_text += f"**日付:** {target_date.strftime('%Y年%m月%d日')}\n\n"
+            return self._format_report(location, result, date, forecast_data)
             
-            result_text += f"## 概要\n"
-            result_text += f"- **天気:** {main_weather}\n"
-            result_text += f"- **最高気温:** {max_temp:.1f}°C\n"
-            result_text += f"- **最低気温:** {min_temp:.1f}°C\n"
-            result_text += f"- **降水確率:** {rain_prob}%\n\n"
+        except httpx.HTTPError as e:
+            return ToolError(f"エラー: 天気情報の取得に失敗しました。{str(e)}")
+        except Exception as e:
+            return ToolError(f"エラー: {str(e)}")
+
+    def _format_report(self, location: str, result: dict, date: Optional[str], forecast_data: dict) -> str:
+        """
+        Format the single-location forecast report.
+        
+        Args:
+            location: Location name as requested
+            result: Geocoding result for the location
+            date: Target date in YYYY-MM-DD format (optional)
+            forecast_data: Open-Meteo forecast payload
             
-            # Get hourly details for target date
+        Returns:
+            Formatted weather forecast information
+        """
+        location_name = result.get("name", location)
+        country = result.get("country", "")
+        admin1 = result.get("admin1", "")
+        
+        # Format location name with region info
+        display_location = location_name
+        if admin1 and admin1 != location_name:
+            display_location = f"{location_name}（{admin1}）"
+        if country:
+            display_location = f"{display_location}, {country}"
+        
+        # Parse target date
+        if date:
+            try:
+                target_date = datetime.strptime(date, "%Y-%m-%d").date()
+            except ValueError:
+                target_date = datetime.now().date()
+        else:
+            target_date = datetime.now().date()
+        
+        # Find data for target date
+        daily_data = forecast_data.get("daily", {})
+        daily_times = daily_data.get("time", [])
+        
+        target_date_str = target_date.strftime("%Y-%m-%d")
+        
+        if target_date_str not in daily_times:
+            return ToolError(f"エラー: {target_date}の予報データが見つかりませんでした（予報は7日先までです）。")
+        
+        day_index = daily_times.index(target_date_str)
+        
+        # Get daily summary
+        max_temp = daily_data.get("temperature_2m_max", [])[day_index]
+        min_temp = daily_data.get("temperature_2m_min", [])[day_index]
+        rain_prob = daily_data.get("precipitation_probability_max", [])[day_index]
+        daily_weather_code = daily_data.get("weather_code", [])[day_index]
+        main_weather = self._get_weather_description(daily_weather_code)
+        advice = self._advice(rain_prob, max_temp, min_temp)
+        
+        if self.output_format != "markdown" or self.verbosity != "full":
+            # Structured or summary output: build the model, skip the full Markdown
             hourly_data = forecast_data.get("hourly", {})
-            hourly_times = hourly_data.get("time", [])
-            
-            result_text += f"## 時間帯別予報\n"
-            
-            for i, time_str in enumerate(hourly_times):
-                forecast_datetime = datetime.fromisoformat(time_str)
-                if forecast_datetime.date() == target_date:
-                    time_display = forecast_datetime.strftime("%H:%M")
-                    temp = hourly_data.get("temperature_2m", [])[i]
-                    humidity = hourly_data.get("relative_humidity_2m", [])[i]
-                    wind_speed = hourly_data.get("wind_speed_10m", [])[i]
-                    weather_code = hourly_data.get("weather_code", [])[i]
-                    weather_desc = self._get_weather_description(weather_code)
-                    precip_prob = hourly_data.get("precipitation_probability", [])[i]
-                    
-                    result_text += f"\n### {time_display}\n"
-                    result_text += f"- 天気: {weather_desc}\n"
-                    result_text += f"- 気温: {temp:.1f}°C\n"
-                    result_text += f"- 湿度: {humidity}%\n"
-                    result_text += f"- 風速: {wind_speed:.1f} m/s\n"
-                    result_text += f"- 降水確率: {precip_prob}%\n"
-            
-            # Recommendations
-            result_text += f"\n## お出かけアドバイス\n"
-            
-            if rain_prob > 50:
-                result_text += "- ⚠️ 降水確率が高いです。傘や雨具を必ず持参してください。\n"
-                result_text += "- 屋内施設を中心としたプランをおすすめします。\n"
-            elif rain_prob > 20:
-                result_text += "- 折りたたみ傘を持参することをおすすめします。\n"
-            
-            if max_temp > 30:
-                result_text += "- 🌡️ 暑い日です。水分補給と熱中症対策をしっかりと。\n"
-                result_text += "- 日焼け止め、帽子、サングラスの持参をおすすめします。\n"
-            elif max_temp < 10:
-                result_text += "- 🧥 寒い日です。暖かい服装で出かけてください。\n"
-                result_text += "- カイロやマフラーなどの防寒具があると良いでしょう。\n"
-            elif min_temp < 15 and max_temp > 20:
-                result_text += "- 👕 寒暖差があります。調整しやすい服装（上着など）がおすすめです。\n"
-            
-            return result_text
+            summary = self.verbosity == "summary"
+            return self._render_report(WeatherReport(
+                location=display_location,
+                date=target_date_str,
+                weather=main_weather,
+                temperature_max=max_temp,
+                temperature_min=min_temp,
+                precipitation_probability=rain_prob,
+                advice=advice,
+                hourly=None if summary else self._hourly_models(hourly_data, target_date_str),
+                blocks=self._hour_blocks(hourly_data, target_date_str) if summary else None,
+            ))
+        
+        # Format the output (collected as parts and joined once)
+        parts = [
+            f"# 天気予報: {display_location}\n",
+            f"**日付:** {target_date.strftime('%Y年%m月%d日')}\n\n",
+            "## 概要\n",
+            f"- **天気:** {main_weather}\n",
+            f"- **最高気温:** {max_temp:.1f}°C\n",
+            f"- **最低気温:** {min_temp:.1f}°C\n",
+            f"- **降水確率:** {rain_prob}%\n\n",
+            "## 時間帯別予報\n",
+        ]
+        
+        # Get hourly details for target date
+        parts.extend(self._format_hourly(forecast_data.get("hourly", {}), target_date_str))
+        
+        # Recommendations
+        parts.append("\n## お出かけアドバイス\n")
+        parts.extend(f"- {line}\n" for line in advice)
+        
+        return "".join(parts)
+
+    def _batch_names(self, location: Optional[str], locations: Optional[List[str]]) -> List[str]:
+        """Merge location and locations, dropping blanks and duplicates."""
+        names = []
+        for name in ([location] if location else []) + list(locations or []):
+            name = name.strip()
+            if name and name not in names:
+                names.append(name)
+        return names
+
+    def _batch_dates(self, names: List[str], date: Optional[str], end_date: Optional[str]):
+        """
+        Validate batch arguments.
+        
+        Returns:
+            (start, end, target date strings), or an error message string
+        """
+        if not names:
+            return ToolError("エラー: locationsを1件以上指定してください。")
+        if len(names) > MAX_BATCH_LOCATIONS:
+            return ToolError(f"エラー: 一度に比較できる場所は{MAX_BATCH_LOCATIONS}件までです。")
+        
+        try:
+            start = datetime.strptime(date, "%Y-%m-%d").date() if date else datetime.now().date()
+            end = datetime.strptime(end_date, "%Y-%m-%d").date() if end_date else start
+        except ValueError:
+            return ToolError("エラー: 日付はYYYY-MM-DD形式で指定してください。")
+        if end < start:
+            return ToolError("エラー: end_dateはdate以降の日付を指定してください。")
+        target_dates = [(start + timedelta(days=d)).strftime("%Y-%m-%d") for d in range((end - start).days + 1)]
+        return start, end, target_dates
+
+    def _run_batch(self, names: List[str], date: Optional[str], end_date: Optional[str]) -> str:
+        """
+        Compare daily forecasts for several locations over a date range.
+        
+        Geocodes all locations concurrently and fetches every forecast with
+        one multi-coordinate request.
+        
+        Args:
+            names: Location names
+            date: First date of the range in YYYY-MM-DD format (defaults to today)
+            end_date: Last date of the range in YYYY-MM-DD format (defaults to date)
+            
+        Returns:
+            Markdown comparison table
+        """
+        dates = self._batch_dates(names, date, end_date)
+        if isinstance(dates, str):
+            return dates
+        
+        try:
+            with ThreadPoolExecutor(max_workers=min(len(names), MAX_PARALLEL_GEOCODING)) as executor:
+                geocoded = list(executor.map(self._geocode, names))
             
+            found = [(name, result) for name, result in zip(names, geocoded) if result is not None]
+            if not found:
+                return ToolError("エラー: 指定された場所の位置情報が見つかりませんでした。別の地名をお試しください。")
+            
+            forecasts = self._fetch_forecasts([(r["latitude"], r["longitude"]) for _, r in found])
         except requests.exceptions.RequestException as e:
-            return f"エラー: 天気情報の取得に失敗しました。{str(e)}"
+            return ToolError(f"エラー: 天気情報の取得に失敗しました。{str(e)}")
         except Exception as e:
-            return f"エラー: {str(e)}"
+            return ToolError(f"エラー: {str(e)}")
+        
+        return self._format_batch(names, geocoded, forecasts, *dates)
+
+    async def _arun_batch(self, names: List[str], date: Optional[str], end_date: Optional[str]) -> str:
+        """Async version of _run_batch."""
+        dates = self._batch_dates(names, date, end_date)
+        if isinstance(dates, str):
+            return dates
+        
+        try:
+            geocoded = await asyncio.gather(*(self._ageocode(name) for name in names))
+            
+            found = [(name, result) for name, result in zip(names, geocoded) if result is not None]
+            if not found:
+                return ToolError("エラー: 指定された場所の位置情報が見つかりませんでした。別の地名をお試しください。")
+            
+            forecasts = await self._afetch_forecasts([(r["latitude"], r["longitude"]) for _, r in found])
+        except httpx.HTTPError as e:
+            return ToolError(f"エラー: 天気情報の取得に失敗しました。{str(e)}")
+        except Exception as e:
+            return ToolError(f"エラー: {str(e)}")
+        
+        return self._format_batch(names, geocoded, forecasts, *dates)
+
+    def _format_batch(self, names: List[str], geocoded: List[Optional[dict]], forecasts: List[dict], start, end, target_dates: List[str]) -> str:
+        """Format the location × date comparison as a Markdown table or JSON."""
+        found = [name for name, result in zip(names, geocoded) if result is not None]
+        rows = []
+        for name, forecast_data in zip(found, forecasts):
+            daily_data = forecast_data.get("daily", {})
+            index_by_date = {d: i for i, d in enumerate(daily_data.get("time", []))}
+            for target in target_dates:
+                i = index_by_date.get(target)
+                if i is None:
+                    rows.append(WeatherComparisonRow(location=name, date=target))
+                    continue
+                rain_prob = daily_data["precipitation_probability_max"][i]
+                # Open-Meteo returns null for some dates and grid cells
+                if rain_prob is None:
+                    outdoor = None
+                elif rain_prob > 50:
+                    outdoor = "屋内推奨"
+                elif rain_prob > 20:
+                    outdoor = "傘あれば可"
+                else:
+                    outdoor = "屋外OK"
+                rows.append(WeatherComparisonRow(
+                    location=name,
+                    date=target,
+                    weather=self._get_weather_description(daily_data["weather_code"][i]),
+                    temperature_max=daily_data["temperature_2m_max"][i],
+                    temperature_min=daily_data["temperature_2m_min"][i],
+                    precipitation_probability=rain_prob,
+                    outdoor=outdoor,
+                ))
+        comparison = WeatherComparison(
+            start_date=start.strftime("%Y-%m-%d"),
+            end_date=end.strftime("%Y-%m-%d"),
+            rows=rows,
+            not_found=[name for name, result in zip(names, geocoded) if result is None],
+        )
+        if self.output_format == "json":
+            return to_json(comparison)
+        
+        lines = [
+            f"# 天気比較: {start.strftime('%Y年%m月%d日')}〜{end.strftime('%Y年%m月%d日')}",
+            "",
+            "| 場所 | 日付 | 天気 | 最高/最低 | 降水確率 | 屋外 |",
+            "|------|------|------|-----------|----------|------|",
+        ]
+        for row in comparison.rows:
+            if row.weather is None:
+                lines.append(f"| {row.location} | {row.date[5:]} | 予報範囲外 | - | - | - |")
+                continue
+            rain = "-" if row.precipitation_probability is None else f"{row.precipitation_probability}%"
+            lines.append(
+                f"| {row.location} | {row.date[5:]} | {row.weather} | "
+                f"{row.temperature_max:.1f}/{row.temperature_min:.1f}°C | {rain} | {row.outdoor or '-'} |"
+            )
+        
+        if comparison.not_found:
+            lines.append("")
+            lines.append(f"位置情報が見つからなかった場所: {', '.join(comparison.not_found)}")
+        return "\n".join(lines) + "\n"
+
+
+def prefetch_weather(handle: "prefetch.Prefetch", location: Optional[str], home: Optional[str] = None) -> None:
+    """
+    Start geocoding location and home and fetching location's forecast.
+
+    The forecast payload covers the next 7 days, so it answers the weather
+    tool for any date the planner asks about. Names already in the
+    geocoding cache are not requested again.
+    """
+    tool = OpenMeteoTool()
+    cache = get_geocode_cache()
+
+    def fetch_forecast(lat: float, lon: float, key: str) -> dict:
+        payload = _request_json(FORECAST_URL, tool._forecast_params([grid_cell(lat, lon)]))
+        get_forecast_cache().set(key, payload)
+        return payload
+
+    def start_forecast(result: Optional[dict]) -> None:
+        if result is None:
+            return
+        key = forecast_cache_key(result["latitude"], result["longitude"])
+        if get_forecast_cache().get(key) is None:
+            handle.submit("forecast", key, fetch_forecast, result["latitude"], result["longitude"], key)
+
+    def geocode(name: str, with_forecast: bool) -> Optional[dict]:
+        geo_data = _request_json(GEOCODING_URL, tool._geocode_params(name))
+        result = tool._store_geocode(cache, normalize_key(name), name, geo_data)
+        if with_forecast:
+            start_forecast(result)
+        return result
+
+    for name, with_forecast in ((location, True), (home, False)):
+        if not name:
+            continue
+        cached = cache.get(normalize_key(name)) if cache is not None else None
+        if cached is None:
+            handle.submit("geocode", normalize_key(name), geocode, name, with_forecast)
+        elif with_forecast:
+            start_forecast(cached)
 
 
 # For testing
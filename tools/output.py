@@ -0,0 +1,35 @@
+"""
+Output format settings shared by the custom tools.
+Tools render Markdown by default; "json" returns their pydantic result
+models as compact JSON, and the "summary" verbosity drops per-hour and
+per-step detail in favour of aggregates. Error messages are returned as
+ToolError so that callers can tell them from results.
+"""
+
+import os
+
+from pydantic import BaseModel
+
+OUTPUT_FORMATS = ("markdown", "json")
+VERBOSITY_LEVELS = ("full", "summary")
+
+
+class ToolError(str):
+    """An error message a tool returns to the agent in place of a result; never cached."""
+
+
+def default_output_format() -> str:
+    """Output format from TOOLS_OUTPUT_FORMAT (default: markdown)."""
+    value = os.getenv("TOOLS_OUTPUT_FORMAT", "markdown").lower()
+    return value if value in OUTPUT_FORMATS else "markdown"
+
+
+def default_verbosity() -> str:
+    """Verbosity from TOOLS_OUTPUT_VERBOSITY (default: full)."""
+    value = os.getenv("TOOLS_OUTPUT_VERBOSITY", "full").lower()
+    return value if value in VERBOSITY_LEVELS else "full"
+
+
+def to_json(model: BaseModel) -> str:
+    """Compact JSON for a result model; unset optional fields are left out."""
+    return model.model_dump_json(exclude_none=True)
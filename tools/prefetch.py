@@ -0,0 +1,156 @@
+"""
+Speculative prefetch of the external data every plan needs.
+The weather for {location} and the coordinates of {home} and {location}
+are known at kickoff, several LLM turns before an agent calls the weather
+tool. start_prefetch() fires those requests in the background; the tools
+look up the pending future for the same request before going to the
+network and use its result once it resolves, so the API latency is hidden
+behind crew construction and the first LLM calls.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PREFETCH = os.getenv("PREFETCH", "1") != "0"
+PREFETCH_WORKERS = int(os.getenv("PREFETCH_WORKERS", "4"))
+# How long a tool waits for an in-flight prefetch before requesting the data itself
+PREFETCH_WAIT = float(os.getenv("PREFETCH_WAIT", "10"))
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+# (kind, key) -> future of every prefetch still owned by a kickoff
+_pending: Dict[Tuple[str, str], Future] = {}
+_pending_lock = threading.Lock()
+_stats = {"started": 0, "used": 0, "failed": 0}
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="prefetch")
+    return _executor
+
+
+def _count_failure(future: Future) -> None:
+    if not future.cancelled() and future.exception() is not None:
+        logger.info("Prefetch failed: %s", future.exception())
+        with _pending_lock:
+            _stats["failed"] += 1
+
+
+class Prefetch:
+    """
+    The background requests started for one kickoff.
+
+    Concurrent kickoffs that need the same request share one future; each
+    kickoff calls close() when its crew has finished.
+    """
+
+    def __init__(self):
+        self._futures: Dict[Tuple[str, str], Future] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, key: str, fn: Callable[..., Any], *args: Any) -> Future:
+        """Run fn(*args) in the background as the prefetch of (kind, key)."""
+        with _pending_lock:
+            future = _pending.get((kind, key))
+            if future is None:
+                future = _get_executor().submit(fn, *args)
+                future.add_done_callback(_count_failure)
+                _pending[(kind, key)] = future
+                _stats["started"] += 1
+        with self._lock:
+            self._futures[(kind, key)] = future
+        return future
+
+    def close(self, timeout: float = PREFETCH_WAIT) -> None:
+        """Wait for the requests still in flight, then forget this kickoff's futures."""
+        # A finished job may have submitted a follow-up (the forecast after geocoding)
+        while True:
+            with self._lock:
+                running = [future for future in self._futures.values() if not future.done()]
+            if not running or wait(running, timeout=timeout).not_done:
+                break
+        with self._lock:
+            futures, self._futures = self._futures, {}
+        with _pending_lock:
+            for name, future in futures.items():
+                if _pending.get(name) is future:
+                    del _pending[name]
+
+
+def start_prefetch(inputs: dict) -> Optional[Prefetch]:
+    """
+    Start the requests the crew is certain to make for inputs.
+
+    Returns None when prefetching is disabled (PREFETCH=0).
+    """
+    if not PREFETCH:
+        return None
+    from .openweather_tool import prefetch_weather
+
+    prefetch = Prefetch()
+    prefetch_weather(prefetch, inputs.get("location"), inputs.get("home"))
+    return prefetch
+
+
+def _find(kind: str, key: str) -> Optional[Future]:
+    with _pending_lock:
+        return _pending.get((kind, key))
+
+
+def _used(future: Future) -> Optional[Future]:
+    if future.cancelled() or future.exception() is not None:
+        return None
+    with _pending_lock:
+        _stats["used"] += 1
+    return future
+
+
+def resolved(kind: str, key: str) -> Optional[Future]:
+    """
+    The prefetch of (kind, key) once it has resolved.
+
+    Waits up to PREFETCH_WAIT seconds for a prefetch in flight. Returns None
+    when there is none, it failed or it timed out; the caller then makes
+    the request itself.
+    """
+    future = _find(kind, key)
+    if future is None:
+        return None
+    wait([future], timeout=PREFETCH_WAIT)
+    return _used(future) if future.done() else None
+
+
+async def aresolved(kind: str, key: str) -> Optional[Future]:
+    """Async version of resolved() that does not block the event loop."""
+    future = _find(kind, key)
+    if future is None:
+        return None
+    try:
+        await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), PREFETCH_WAIT)
+    except Exception:
+        pass
+    return _used(future) if future.done() else None
+
+
+def prefetch_stats() -> dict:
+    """Prefetches started, answered a tool call, and failed."""
+    with _pending_lock:
+        return {**_stats, "pending": len(_pending)}
+
+
+def reset_prefetch() -> None:
+    """Forget pending prefetches and statistics (mainly for tests)."""
+    with _pending_lock:
+        _pending.clear()
+        for name in _stats:
+            _stats[name] = 0
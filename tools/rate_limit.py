@@ -0,0 +1,241 @@
+"""
+Process-wide rate limiting for the upstream APIs called by the tools.
+Every API (Google Maps, Open-Meteo, Serper) has one RateLimiter shared by all
+threads, crews and event loops of the process. It combines a token bucket
+with the API's requests-per-second budget, a cap on the requests in flight,
+and retries with jittered exponential backoff on 429 and 5xx answers.
+Callers wait for their turn instead of receiving an error, so concurrent
+crews stay within the quota instead of spending agent retries and LLM turns
+on error messages.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+RATE_LIMIT = os.getenv("RATE_LIMIT", "1") != "0"
+
+# Statuses worth retrying; anything else is returned to the tool unchanged
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Default budget per API: (requests per second, requests in flight).
+# Overridable with RATE_LIMIT_<API>_QPS and RATE_LIMIT_<API>_CONCURRENCY.
+DEFAULT_BUDGETS: Dict[str, Tuple[float, int]] = {
+    "google_maps": (50.0, 16),
+    "open_meteo": (10.0, 4),
+    "serper": (5.0, 4),
+}
+
+# How often an async caller checks for a free slot while all are taken
+_SLOT_POLL_SECONDS = 0.005
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, default))
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled at `rate` tokens per second.
+
+    Tokens are reserved rather than polled: a caller that finds the bucket
+    empty takes a token in advance and is told how long to wait, so waiting
+    callers are served in arrival order without spinning.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = max(1.0, burst if burst is not None else rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take one token; returns the seconds to wait before using it."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+def _unwrap(error: BaseException) -> BaseException:
+    """The underlying error of a googlemaps TransportError (e.g. a 5xx raised by the session)."""
+    return getattr(error, "base_exception", None) or error
+
+
+def _status(error: BaseException) -> Optional[int]:
+    """HTTP status of a failed request (requests, httpx or googlemaps error)."""
+    error = _unwrap(error)
+    # Google reports an exhausted quota as OVER_QUERY_LIMIT in a 200 response
+    if getattr(error, "status", None) == "OVER_QUERY_LIMIT":
+        return 429
+    return getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """
+    How long to wait before retrying a failed request.
+
+    Returns None when retrying will not help, 0.0 for a retryable error
+    without a hint, or the seconds of the response's Retry-After header.
+    """
+    if _status(error) not in RETRY_STATUSES:
+        return None
+    response = getattr(_unwrap(error), "response", None)
+    header = response.headers.get("Retry-After") if response is not None else None
+    try:
+        return max(0.0, float(header)) if header else 0.0
+    except ValueError:
+        # An HTTP date: fall back to the exponential backoff
+        return 0.0
+
+
+class RateLimiter:
+    """Token bucket, concurrency cap and retry policy of one upstream API."""
+
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        concurrency: int,
+        max_retries: Optional[int] = None,
+        backoff_base: Optional[float] = None,
+        backoff_max: Optional[float] = None,
+    ):
+        self.name = name
+        self.bucket = TokenBucket(rate)
+        self.concurrency = max(1, concurrency)
+        self.max_retries = int(_env_float("RATE_LIMIT_MAX_RETRIES", 4)) if max_retries is None else max_retries
+        self.backoff_base = _env_float("RATE_LIMIT_BACKOFF_BASE", 0.5) if backoff_base is None else backoff_base
+        self.backoff_max = _env_float("RATE_LIMIT_BACKOFF_MAX", 8) if backoff_max is None else backoff_max
+        self._slots = threading.BoundedSemaphore(self.concurrency)
+        self._lock = threading.Lock()
+        # After a 429 every caller holds off until then, not only the one that got it
+        self._paused_until = 0.0
+        self._stats = {"calls": 0, "throttled": 0, "wait_seconds": 0.0, "retries": 0, "failures": 0}
+
+    def _count(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._stats[name] += value
+
+    def _delay(self) -> float:
+        """Reserve a token; seconds to wait before sending the request."""
+        wait = max(self.bucket.reserve(), self._paused_until - time.monotonic())
+        self._count("calls")
+        if wait > 0:
+            self._count("throttled")
+            self._count("wait_seconds", wait)
+        return wait
+
+    def _backoff(self, error: Exception, attempt: int) -> Optional[float]:
+        """Seconds to sleep before the next attempt, or None to give up."""
+        hint = retry_after(error)
+        if hint is None:
+            return None
+        if attempt >= self.max_retries:
+            self._count("failures")
+            return None
+        # Full jitter: spreads the retries of concurrent callers over the window
+        delay = max(hint, random.uniform(0, self.backoff_base * 2 ** attempt))
+        delay = min(delay, self.backoff_max)
+        if _status(error) == 429:
+            with self._lock:
+                self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        self._count("retries")
+        logger.info("%s: retrying in %.2fs after %s (attempt %d)", self.name, delay, error, attempt + 1)
+        return delay
+
+    def call(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Call fn within the budget, retrying 429 and 5xx errors."""
+        if not RATE_LIMIT:
+            return fn(*args, **kwargs)
+        attempt = 0
+        while True:
+            wait = self._delay()
+            if wait > 0:
+                time.sleep(wait)
+            with self._slots:
+                try:
+                    return fn(*args, **kwargs)
+                except Exception as e:
+                    delay = self._backoff(e, attempt)
+                    if delay is None:
+                        raise
+            attempt += 1
+            time.sleep(delay)
+
+    async def acall(self, fn: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any) -> T:
+        """Async version of call for coroutine functions; never blocks the event loop."""
+        if not RATE_LIMIT:
+            return await fn(*args, **kwargs)
+        attempt = 0
+        while True:
+            wait = self._delay()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            while not self._slots.acquire(blocking=False):
+                await asyncio.sleep(_SLOT_POLL_SECONDS)
+            try:
+                return await fn(*args, **kwargs)
+            except Exception as e:
+                delay = self._backoff(e, attempt)
+                if delay is None:
+                    raise
+            finally:
+                self._slots.release()
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    def stats(self) -> dict:
+        """Calls, throttled calls, seconds spent waiting for a token, retries and give-ups."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["wait_seconds"] = round(stats["wait_seconds"], 3)
+        return {"qps": self.bucket.rate, "concurrency": self.concurrency, **stats}
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(api: str) -> RateLimiter:
+    """The process-wide limiter of an API ("google_maps", "open_meteo" or "serper")."""
+    limiter = _limiters.get(api)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(api)
+            if limiter is None:
+                rate, concurrency = DEFAULT_BUDGETS.get(api, (0.0, 8))
+                prefix = f"RATE_LIMIT_{api.upper()}"
+                limiter = RateLimiter(
+                    api,
+                    rate=_env_float(f"{prefix}_QPS", rate),
+                    concurrency=int(_env_float(f"{prefix}_CONCURRENCY", concurrency)),
+                )
+                _limiters[api] = limiter
+    return limiter
+
+
+def limiter_stats() -> Dict[str, dict]:
+    """Statistics of every limiter created so far, by API."""
+    with _limiters_lock:
+        limiters = dict(_limiters)
+    return {api: limiter.stats() for api, limiter in limiters.items()}
+
+
+def reset_limiters() -> None:
+    """Drop the limiters so the next call reads the budgets again (mainly for tests)."""
+    with _limiters_lock:
+        _limiters.clear()
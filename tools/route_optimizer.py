@@ -0,0 +1,474 @@
+"""複数の候補地を回る順番を最適化するツール。
+
+自宅を departure_time に出発して候補地を回り、return_time までに帰宅する
+訪問順序を、滞在時間と営業時間（時間枠）付きの巡回問題（オリエンテーリング問題）として解きます。
+移動時間は Distance Matrix API で一度にまとめて取得し、候補が少なければ動的計画法で厳密解を、
+多ければ挿入法と局所探索（2-opt・移動）で近似解を求めます。
+全候補を回れない場合は、優先度の合計が最大になる候補の組を選びます。
+"""
+
+import os
+import re
+import time
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional, Sequence, Tuple, Type
+
+import googlemaps
+from crewai.tools import BaseTool
+from pydantic import BaseModel, Field
+
+from .google_maps_tool import fetch_duration_matrix
+from .output import ToolError, default_output_format, to_json
+
+# この件数までは動的計画法（O(2^n・n^2)）で厳密解を求め、超える場合は近似解
+EXACT_MAX_STOPS = int(os.getenv("ROUTE_OPTIMIZER_EXACT_MAX_STOPS", "10"))
+# 一度に指定できる候補地の上限（自宅を含めて Distance Matrix API の1リクエスト25地点に収まる数）
+MAX_VENUES = 24
+DEFAULT_STAY_MINUTES = 60
+
+INF = float("inf")
+
+# 時間枠: 出発からの分単位の (開始, 終了)。滞在は終了時刻までに終える
+Window = Tuple[float, float]
+Schedule = Tuple[List[Tuple[float, float, float]], float]
+
+MODE_NAMES = {
+    "driving": "自動車",
+    "transit": "公共交通機関",
+    "walking": "徒歩",
+    "bicycling": "自転車",
+}
+
+
+def schedule(
+    order: Sequence[int],
+    travel: Sequence[Sequence[float]],
+    stays: Sequence[float],
+    windows: Sequence[Window],
+    horizon: float,
+) -> Optional[Schedule]:
+    """
+    訪問順 order（地点番号、0 は自宅）の時刻表を作成します。
+
+    各候補の (到着, 滞在開始, 出発) と帰宅時刻を分単位で返します。
+    開店前に着いた場合は開店まで待ちます。閉店までに滞在を終えられない、
+    または horizon までに帰宅できない場合は None を返します。
+    """
+    now = 0.0
+    previous = 0
+    rows = []
+    for place in order:
+        arrival = now + travel[previous][place]
+        opens, closes = windows[place]
+        start = max(arrival, opens)
+        now = start + stays[place]
+        if now > closes:
+            return None
+        rows.append((arrival, start, now))
+        previous = place
+    back = now + travel[previous][0]
+    if back > horizon:
+        return None
+    return rows, back
+
+
+def _solve_exact(
+    travel: Sequence[Sequence[float]],
+    stays: Sequence[float],
+    windows: Sequence[Window],
+    horizon: float,
+    scores: Sequence[float],
+) -> List[int]:
+    """訪問済み集合 × 最後の地点ごとに最も早い出発時刻を持つ動的計画法"""
+    n = len(travel) - 1
+    # (集合, 最後の地点) -> (その地点を出る時刻, 直前の地点)
+    states = {}
+    for place in range(1, n + 1):
+        opens, closes = windows[place]
+        leave = max(travel[0][place], opens) + stays[place]
+        if leave <= closes and leave <= horizon:
+            states[(1 << (place - 1), place)] = (leave, 0)
+
+    best_key, best_value = None, (0.0, -0.0)
+    for mask in range(1, 1 << n):
+        score = sum(scores[place] for place in range(1, n + 1) if mask >> (place - 1) & 1)
+        for last in range(1, n + 1):
+            state = states.get((mask, last))
+            if state is None:
+                continue
+            leave = state[0]
+            back = leave + travel[last][0]
+            if back <= horizon and (score, -back) > best_value:
+                best_key, best_value = (mask, last), (score, -back)
+            for place in range(1, n + 1):
+                if mask >> (place - 1) & 1:
+                    continue
+                opens, closes = windows[place]
+                next_leave = max(leave + travel[last][place], opens) + stays[place]
+                if next_leave > closes or next_leave > horizon:
+                    continue
+                key = (mask | 1 << (place - 1), place)
+                known = states.get(key)
+                if known is None or next_leave < known[0]:
+                    states[key] = (next_leave, last)
+
+    order: List[int] = []
+    key = best_key
+    while key is not None and key[1] != 0:
+        mask, last = key
+        order.append(last)
+        previous = states[key][1]
+        key = (mask & ~(1 << (last - 1)), previous) if previous else None
+    return order[::-1]
+
+
+def _best_insertion(
+    order: List[int],
+    back: float,
+    candidates: Sequence[int],
+    travel, stays, windows, horizon, scores,
+) -> Optional[Tuple[List[int], float]]:
+    """優先度あたりの追加時間が最も小さい (候補, 挿入位置) を挿入した順序"""
+    best = None
+    for place in candidates:
+        for position in range(len(order) + 1):
+            trial = order[:position] + [place] + order[position:]
+            result = schedule(trial, travel, stays, windows, horizon)
+            if result is None:
+                continue
+            cost = (result[1] - back) / max(scores[place], 1e-9)
+            if best is None or cost < best[0]:
+                best = (cost, trial, result[1])
+    return None if best is None else (best[1], best[2])
+
+
+def _improve(order: List[int], back: float, travel, stays, windows, horizon) -> Tuple[List[int], float]:
+    """2-opt（区間の反転）と1地点の移動で、帰宅時刻が早くなる限り順序を改善"""
+    improved = True
+    while improved:
+        improved = False
+        for trial in _neighbours(order):
+            result = schedule(trial, travel, stays, windows, horizon)
+            if result is not None and result[1] < back - 1e-9:
+                order, back = trial, result[1]
+                improved = True
+                break
+    return order, back
+
+
+def _neighbours(order: List[int]) -> Iterator[List[int]]:
+    """区間を反転した順序と、1地点を別の位置に移した順序"""
+    size = len(order)
+    for i in range(size):
+        for j in range(i + 1, size):
+            yield order[:i] + order[i:j + 1][::-1] + order[j + 1:]
+    for i in range(size):
+        rest = order[:i] + order[i + 1:]
+        for k in range(size):
+            if k != i:
+                yield rest[:k] + [order[i]] + rest[k:]
+
+
+def _fill(order: List[int], back: float, candidates: Sequence[int], travel, stays, windows, horizon, scores) -> Tuple[List[int], float]:
+    """入る候補がなくなるまで挿入と順序の改善を繰り返す"""
+    remaining = set(candidates) - set(order)
+    while remaining:
+        inserted = _best_insertion(order, back, sorted(remaining), travel, stays, windows, horizon, scores)
+        if inserted is None:
+            break
+        order, back = inserted
+        remaining -= set(order)
+        # 順序を詰め直すと、入らなかった候補が入ることがある
+        order, back = _improve(order, back, travel, stays, windows, horizon)
+    return order, back
+
+
+def _solve_heuristic(
+    travel: Sequence[Sequence[float]],
+    stays: Sequence[float],
+    windows: Sequence[Window],
+    horizon: float,
+    scores: Sequence[float],
+) -> List[int]:
+    """
+    挿入法で候補を追加し局所探索で順序を改善する近似解法。
+
+    さらに訪問中の候補を1つ外して詰め直し、優先度の合計が増えるか
+    帰宅が早くなる限り入れ替えを続けます。
+    """
+    places = range(1, len(travel))
+    order, back = _fill([], 0.0, places, travel, stays, windows, horizon, scores)
+
+    def value(order: List[int], back: float) -> Tuple[float, float]:
+        return sum(scores[place] for place in order), -back
+
+    improved = True
+    while improved:
+        improved = False
+        for removed in order:
+            rest = [place for place in order if place != removed]
+            result = schedule(rest, travel, stays, windows, horizon)
+            if result is None:
+                continue
+            candidates = [place for place in places if place != removed]
+            trial, trial_back = _fill(rest, result[1], candidates, travel, stays, windows, horizon, scores)
+            if value(trial, trial_back) > value(order, back - 1e-9):
+                order, back = trial, trial_back
+                improved = True
+                break
+    return order
+
+
+def solve_route(
+    travel: Sequence[Sequence[float]],
+    stays: Sequence[float],
+    windows: Sequence[Window],
+    horizon: float,
+    scores: Optional[Sequence[float]] = None,
+) -> Tuple[List[int], str]:
+    """
+    訪問順序を求めます。
+
+    Args:
+        travel: 地点間の移動時間（分）。0 は自宅、1..n は候補地。経路がない組は INF
+        stays: 各地点の滞在時間（分、自宅の値は使わない）
+        windows: 各地点の時間枠（出発からの分）
+        horizon: 帰宅期限（出発からの分）
+        scores: 各地点の優先度（省略時はすべて1）
+
+    Returns:
+        (訪問順の地点番号のリスト, "exact" または "heuristic")。
+        優先度の合計が最大で、その中で帰宅が最も早い順序です（近似解法では目安）
+    """
+    n = len(travel) - 1
+    scores = scores or [1.0] * (n + 1)
+    if n <= EXACT_MAX_STOPS:
+        return _solve_exact(travel, stays, windows, horizon, scores), "exact"
+    return _solve_heuristic(travel, stays, windows, horizon, scores), "heuristic"
+
+
+class RouteOptimizerInput(BaseModel):
+    """Input schema for RouteOptimizerTool."""
+
+    home: str = Field(..., description="自宅または出発地点（帰着地点も同じ）")
+    venues: List[str] = Field(..., description=f"訪問候補の住所または地名のリスト（最大{MAX_VENUES}件）")
+    departure_time: str = Field(..., description="自宅を出る時刻（'09:00' または ISO形式 '2025-11-23T09:00:00'）")
+    return_time: str = Field(..., description="帰宅希望時刻（'18:00' または ISO形式）")
+    date: Optional[str] = Field(
+        default=None,
+        description="日付（'2025-11-23'）。departure_time が時刻のみの場合に使用（省略時は今日）"
+    )
+    stay_minutes: Optional[List[int]] = Field(
+        default=None,
+        description=f"各候補の滞在時間（分、venues と同じ順）。省略時は{DEFAULT_STAY_MINUTES}分"
+    )
+    opening_hours: Optional[List[str]] = Field(
+        default=None,
+        description="各候補の営業時間（'10:00-17:00'、venues と同じ順）。不明な候補は空文字"
+    )
+    priorities: Optional[List[int]] = Field(
+        default=None,
+        description="各候補の優先度（大きいほど優先、venues と同じ順）。全候補を回れない場合に使用。省略時はすべて1"
+    )
+    mode: str = Field(
+        default="transit",
+        description="移動手段: 'driving'(自動車), 'transit'(公共交通機関), 'walking'(徒歩), 'bicycling'(自転車)"
+    )
+
+
+class RouteStop(BaseModel):
+    """訪問する1地点の予定"""
+
+    place: str
+    arrival: str
+    start: str
+    departure: str
+    travel_minutes: int
+    wait_minutes: int = 0
+    stay_minutes: int
+
+
+class RoutePlan(BaseModel):
+    """訪問順序最適化ツールの構造化出力"""
+
+    home: str
+    mode: str
+    departure_time: str
+    return_time: str
+    deadline: str
+    method: str = "exact"
+    solve_ms: float = 0.0
+    stops: List[RouteStop]
+    return_travel_minutes: int
+    total_travel_minutes: int
+    skipped: List[str] = []
+
+
+def _parse_clock(value: str, day: datetime) -> datetime:
+    """'HH:MM' または ISO形式の時刻を datetime に変換（時刻のみの場合は day の日付）"""
+    value = value.strip()
+    if "T" in value or len(value) > 5:
+        return datetime.fromisoformat(value)
+    hours, minutes = value.split(":")
+    return day.replace(hour=int(hours), minute=int(minutes), second=0, microsecond=0)
+
+
+def _parse_window(value: Optional[str], departure: datetime) -> Window:
+    """'10:00-17:00' 形式の営業時間を出発からの分単位の時間枠に変換"""
+    if not value or not value.strip():
+        return 0.0, INF
+    parts = [part for part in re.split(r"\s*[-~〜～]\s*", value.strip()) if part]
+    if len(parts) != 2:
+        raise ValueError(f"営業時間 '{value}' は 'HH:MM-HH:MM' の形式で指定してください。")
+    opens, closes = (_parse_clock(part, departure) for part in parts)
+    return (opens - departure).total_seconds() / 60, (closes - departure).total_seconds() / 60
+
+
+def _per_venue(values: Optional[list], count: int, default, name: str) -> list:
+    if values is None:
+        return [default] * count
+    if len(values) != count:
+        raise ValueError(f"{name}は venues と同じ数（{count}件）を指定してください。")
+    return list(values)
+
+
+class RouteOptimizerTool(BaseTool):
+    """
+    自宅から複数の候補地を回って帰宅するまでの訪問順序と時刻表を求めるツール。
+
+    移動時間は Distance Matrix API でまとめて取得し、
+    滞在時間・営業時間・帰宅時刻の制約を満たす最短の順序を計算します。
+    """
+
+    name: str = "訪問順序の最適化"
+    description: str = (
+        "自宅から複数の候補地を回り、帰宅希望時刻までに戻る訪問順序と時刻表を計算します。"
+        "各候補の滞在時間・営業時間・優先度を考慮し、移動時間が最短になる順番を返します。"
+        "回りきれない候補は優先度の低いものから外します。"
+        "候補が2件以上ある場合は、訪問順を推測せずにこのツールを使ってください。"
+    )
+    args_schema: Type[BaseModel] = RouteOptimizerInput
+    # 出力形式: "markdown" または "json"
+    output_format: str = Field(default_factory=default_output_format)
+
+    def _run(
+        self,
+        home: str,
+        venues: List[str],
+        departure_time: str,
+        return_time: str,
+        date: Optional[str] = None,
+        stay_minutes: Optional[List[int]] = None,
+        opening_hours: Optional[List[str]] = None,
+        priorities: Optional[List[int]] = None,
+        mode: str = "transit",
+    ) -> str:
+        """
+        訪問順序を最適化して整形された時刻表を返します。
+
+        Returns:
+            整形された訪問順と時刻表の文字列
+        """
+        venues = [venue.strip() for venue in venues if venue and venue.strip()]
+        if not venues:
+            return ToolError("エラー: venues に訪問候補を1件以上指定してください。")
+        if len(venues) > MAX_VENUES:
+            return ToolError(f"エラー: 一度に指定できる候補は{MAX_VENUES}件までです。")
+
+        try:
+            day = datetime.fromisoformat(date) if date else datetime.now()
+            departure = _parse_clock(departure_time, day)
+            deadline = _parse_clock(return_time, departure)
+            if deadline <= departure:
+                return ToolError("エラー: return_time は departure_time より後の時刻を指定してください。")
+            stays = [0.0] + [float(m) for m in _per_venue(stay_minutes, len(venues), DEFAULT_STAY_MINUTES, "stay_minutes")]
+            hours = _per_venue(opening_hours, len(venues), None, "opening_hours")
+            windows = [(0.0, INF)] + [_parse_window(value, departure) for value in hours]
+            scores = [0.0] + [float(p) for p in _per_venue(priorities, len(venues), 1, "priorities")]
+        except ValueError as e:
+            return ToolError(f"エラー: {str(e)}")
+
+        try:
+            seconds = fetch_duration_matrix([home] + venues, mode, departure)
+        except googlemaps.exceptions.ApiError as e:
+            return ToolError(f"Google Maps APIエラー: {str(e)}")
+        except Exception as e:
+            return ToolError(f"エラーが発生しました: {str(e)}")
+
+        travel = [[INF if value is None else value / 60 for value in row] for row in seconds]
+        horizon = (deadline - departure).total_seconds() / 60
+        start = time.perf_counter()
+        order, method = solve_route(travel, stays, windows, horizon, scores)
+        solve_ms = (time.perf_counter() - start) * 1000
+
+        plan = self._build_plan(home, venues, mode, departure, deadline, order, travel, stays, windows, horizon)
+        plan.method, plan.solve_ms = method, round(solve_ms, 2)
+        if self.output_format == "json":
+            return to_json(plan)
+        return self._render_plan(plan)
+
+    def _build_plan(self, home, venues, mode, departure, deadline, order, travel, stays, windows, horizon) -> RoutePlan:
+        """訪問順から構造化された時刻表を作成"""
+        rows, back = schedule(order, travel, stays, windows, horizon) if order else ([], 0.0)
+
+        def clock(minutes: float) -> str:
+            return (departure + timedelta(minutes=minutes)).strftime("%H:%M")
+
+        stops = []
+        previous = 0
+        for place, (arrival, start, leave) in zip(order, rows):
+            stops.append(RouteStop(
+                place=venues[place - 1],
+                arrival=clock(arrival),
+                start=clock(start),
+                departure=clock(leave),
+                travel_minutes=round(travel[previous][place]),
+                wait_minutes=round(start - arrival),
+                stay_minutes=round(stays[place]),
+            ))
+            previous = place
+        return_travel = round(travel[previous][0]) if order else 0
+        return RoutePlan(
+            home=home,
+            mode=mode,
+            departure_time=departure.strftime("%Y-%m-%dT%H:%M"),
+            return_time=clock(back),
+            deadline=deadline.strftime("%H:%M"),
+            stops=stops,
+            return_travel_minutes=return_travel,
+            total_travel_minutes=sum(stop.travel_minutes for stop in stops) + return_travel,
+            skipped=[venue for place, venue in enumerate(venues, start=1) if place not in order],
+        )
+
+    def _render_plan(self, plan: RoutePlan) -> str:
+        """時刻表をマークダウンに整形"""
+        method = "厳密解（動的計画法）" if plan.method == "exact" else "近似解（挿入法＋局所探索）"
+        lines = [
+            f"# 訪問順序の最適化（候補{len(plan.stops) + len(plan.skipped)}件中 {len(plan.stops)}件を訪問）",
+            "",
+            f"**移動手段**: {MODE_NAMES.get(plan.mode, plan.mode)}",
+            f"**計算方法**: {method}（{plan.solve_ms:.1f}ms）",
+            "",
+        ]
+        if not plan.stops:
+            lines.append(f"{plan.deadline}までに帰宅できる訪問順序が見つかりませんでした。滞在時間・営業時間・帰宅時刻を見直してください。")
+            return "\n".join(lines) + "\n"
+
+        lines += [
+            "| # | 場所 | 到着 | 滞在 | 出発 | 移動 |",
+            "|---|------|------|------|------|------|",
+            f"| 0 | {plan.home}（出発） |  |  | {plan.departure_time[-5:]} |  |",
+        ]
+        for number, stop in enumerate(plan.stops, start=1):
+            wait = f"（開店待ち{stop.wait_minutes}分）" if stop.wait_minutes else ""
+            lines.append(
+                f"| {number} | {stop.place} | {stop.arrival}{wait} | {stop.stay_minutes}分 | {stop.departure} | {stop.travel_minutes}分 |"
+            )
+        lines.append(f"| - | {plan.home}（帰宅） | {plan.return_time} |  |  | {plan.return_travel_minutes}分 |")
+        lines += [
+            "",
+            f"- 移動時間の合計: {plan.total_travel_minutes}分（帰宅希望 {plan.deadline}、帰宅予定 {plan.return_time}）",
+        ]
+        if plan.skipped:
+            lines.append(f"- 時間内に回れない候補: {', '.join(plan.skipped)}")
+        return "\n".join(lines) + "\n"
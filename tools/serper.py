@@ -0,0 +1,77 @@
+"""
+SerperDevTool without the crewai_tools catalog.
+
+`from crewai_tools import SerperDevTool` executes the package __init__, which
+imports every tool crewai_tools ships (see tools_list.txt) and adds seconds
+to the startup of each CLI call and worker. The Serper module itself only
+needs requests, crewai and pydantic, so it is loaded on its own under its
+regular module name; a later full `import crewai_tools` reuses it.
+Search requests go through the process-wide "serper" rate limiter.
+"""
+
+import importlib.util
+import logging
+import sys
+import threading
+from pathlib import Path
+from typing import Optional
+
+from .rate_limit import get_limiter
+
+SERPER_MODULE = "crewai_tools.tools.serper_dev_tool.serper_dev_tool"
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_limited_class: Optional[type] = None
+
+
+def _load_module():
+    package = importlib.util.find_spec("crewai_tools")
+    if package is None or package.origin is None:
+        raise ImportError("crewai_tools is not installed")
+    path = Path(package.origin).parent / "tools" / "serper_dev_tool" / "serper_dev_tool.py"
+    spec = importlib.util.spec_from_file_location(SERPER_MODULE, path)
+    if spec is None or not path.exists():
+        raise ImportError(f"SerperDevTool module not found at {path}")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[SERPER_MODULE] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[SERPER_MODULE]
+        raise
+    return module
+
+
+def _base_class() -> type:
+    module = sys.modules.get(SERPER_MODULE)
+    if module is None:
+        try:
+            module = _load_module()
+        except Exception as e:
+            # Layout of crewai_tools changed: fall back to the regular (slow) import
+            logger.debug("Loading SerperDevTool directly failed (%s); importing crewai_tools", e)
+            from crewai_tools import SerperDevTool
+            return SerperDevTool
+    return module.SerperDevTool
+
+
+def serper_tool_class() -> type:
+    """The rate-limited SerperDevTool class, importing as little of crewai_tools as possible."""
+    global _limited_class
+    with _lock:
+        if _limited_class is None:
+            base = _base_class()
+
+            class SerperDevTool(base):
+                def _make_api_request(self, search_query: str, search_type: str) -> dict:
+                    return get_limiter("serper").call(super()._make_api_request, search_query, search_type)
+
+            _limited_class = SerperDevTool
+        return _limited_class
+
+
+def SerperDevTool(**kwargs):
+    """Create a SerperDevTool; accepts the same arguments as crewai_tools.SerperDevTool."""
+    return serper_tool_class()(**kwargs)
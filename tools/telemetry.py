@@ -0,0 +1,38 @@
+"""
+Per-thread counters for tool instrumentation.
+Tools report the time spent waiting on the network and every answer served
+from a cache; a collector reads the counters before and after a tool call
+(which runs on the calling agent's thread) to attribute them to that call.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Tuple
+
+_local = threading.local()
+
+
+def record_network(seconds: float) -> None:
+    """Add time spent on a network request to the current thread."""
+    _local.network = getattr(_local, "network", 0.0) + seconds
+
+
+def record_cache_hit() -> None:
+    """Count a result served from a cache on the current thread."""
+    _local.cache_hits = getattr(_local, "cache_hits", 0) + 1
+
+
+@contextmanager
+def network_timer() -> Iterator[None]:
+    """Record the duration of the with block as network time."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_network(time.perf_counter() - start)
+
+
+def snapshot() -> Tuple[float, int]:
+    """(network seconds, cache hits) recorded on this thread so far."""
+    return getattr(_local, "network", 0.0), getattr(_local, "cache_hits", 0)
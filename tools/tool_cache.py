@@ -0,0 +1,164 @@
+"""
+Tool-call result cache shared by the agents of a crew.
+Wraps any CrewAI tool so that calls with the same validated arguments are
+answered from memory, and keeps per-tool hit/miss counts for reporting.
+"""
+
+import asyncio
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from crewai.tools import BaseTool
+from pydantic import ConfigDict
+
+from . import telemetry
+from .async_support import AsyncToolMixin
+from .output import ToolError
+
+TOOL_CACHE_ENABLED = os.getenv("TOOL_CACHE", "1") != "0"
+# "run": one cache per crew run; "process": one cache shared by every run in the process
+TOOL_CACHE_SCOPE = os.getenv("TOOL_CACHE_SCOPE", "run")
+TOOL_CACHE_SIZE = int(os.getenv("TOOL_CACHE_SIZE", "1000"))
+
+_process_cache: Optional["ToolCallCache"] = None
+_process_cache_lock = threading.Lock()
+
+
+class ToolCallCache:
+    """
+    A thread-safe memo of tool results keyed by tool name and validated arguments.
+    """
+
+    def __init__(self, max_entries: int = TOOL_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._results: Dict[str, Any] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def get(self, tool_name: str, key: str) -> Optional[Any]:
+        with self._lock:
+            stats = self._stats.setdefault(tool_name, {"hits": 0, "misses": 0})
+            if key not in self._results:
+                stats["misses"] += 1
+                return None
+            stats["hits"] += 1
+            value = self._results[key]
+        telemetry.record_cache_hit()
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._results[key] = value
+            while len(self._results) > self.max_entries:
+                self._results.pop(next(iter(self._results)))
+
+    def clear(self) -> None:
+        """Drop cached results and reset the statistics."""
+        with self._lock:
+            self._results.clear()
+            self._stats.clear()
+
+    def stats(self) -> Dict[str, dict]:
+        """Per-tool calls, hits, misses and hit rate."""
+        with self._lock:
+            snapshot = {name: dict(stats) for name, stats in self._stats.items()}
+        for stats in snapshot.values():
+            calls = stats["hits"] + stats["misses"]
+            stats["calls"] = calls
+            stats["hit_rate"] = stats["hits"] / calls if calls else 0.0
+        return snapshot
+
+    def summary(self) -> str:
+        """One line per tool with its hit rate, for the end-of-run report."""
+        lines = ["ツール呼び出しキャッシュ:"]
+        for name, stats in sorted(self.stats().items()):
+            lines.append(
+                f"- {name}: {stats['calls']}回中 {stats['hits']}回ヒット（ヒット率 {stats['hit_rate']:.0%}）"
+            )
+        return "\n".join(lines)
+
+
+def get_process_tool_cache() -> ToolCallCache:
+    """Return the tool cache shared by every crew run in this process."""
+    global _process_cache
+    if _process_cache is None:
+        with _process_cache_lock:
+            if _process_cache is None:
+                _process_cache = ToolCallCache()
+    return _process_cache
+
+
+class CachedTool(AsyncToolMixin, BaseTool):
+    """
+    A tool that answers repeated calls from a ToolCallCache.
+
+    The cache key is the wrapped tool's name plus its arguments after
+    validation against its args_schema, so calls that only differ in
+    omitted defaults or argument order share one entry. Error messages
+    (ToolError) and results rejected by the tool's cache_function are not
+    cached.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    tool: BaseTool
+    cache: ToolCallCache
+
+    @classmethod
+    def wrap(cls, tool: BaseTool, cache: ToolCallCache) -> "CachedTool":
+        return cls(
+            name=tool.name,
+            description=tool.description,
+            args_schema=tool.args_schema,
+            tool=tool,
+            cache=cache,
+            result_as_answer=tool.result_as_answer,
+            max_usage_count=tool.max_usage_count,
+        )
+
+    def model_post_init(self, __context: Any) -> None:
+        super().model_post_init(__context)
+        # The wrapped tool's description is already in its final form
+        self.description = self.tool.description
+
+    def _key(self, kwargs: dict) -> str:
+        try:
+            args = self.args_schema(**kwargs).model_dump_json()
+        except Exception:
+            args = repr(sorted(kwargs.items()))
+        return f"{self.name}:{args}"
+
+    def _store(self, key: str, kwargs: dict, result: Any) -> None:
+        if isinstance(result, ToolError):
+            return
+        if self.tool.cache_function(kwargs, result):
+            self.cache.set(key, result)
+
+    def _run(self, **kwargs: Any) -> Any:
+        key = self._key(kwargs)
+        cached = self.cache.get(self.name, key)
+        if cached is not None:
+            return cached
+        result = self.tool._run(**kwargs)
+        self._store(key, kwargs, result)
+        return result
+
+    async def _arun(self, **kwargs: Any) -> Any:
+        key = self._key(kwargs)
+        cached = self.cache.get(self.name, key)
+        if cached is not None:
+            return cached
+        if isinstance(self.tool, AsyncToolMixin):
+            result = await self.tool._arun(**kwargs)
+        else:
+            result = await asyncio.to_thread(self.tool._run, **kwargs)
+        self._store(key, kwargs, result)
+        return result
+
+
+def cached_tools(tools: List[BaseTool], cache: Optional[ToolCallCache]) -> List[BaseTool]:
+    """Wrap every tool with the given cache; returns the tools unchanged when cache is None."""
+    if cache is None:
+        return tools
+    return [CachedTool.wrap(tool, cache) for tool in tools]
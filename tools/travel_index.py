@@ -0,0 +1,268 @@
+"""
+Precomputed travel times for frequent origin/destination pairs.
+An offline job (build_travel_index.py) asks the Distance Matrix API once for
+every popular pair, travel mode and time-of-day bucket of one day, and
+stores the durations and distances in a NumPy array file next to a JSON id
+map. The index only answers departures on the same kind of day (weekday or
+weekend) as the day it was built for.
+The tools memory-map the array and answer from it first; only the pairs
+missing from the index are sent to the API.
+"""
+
+import json
+import logging
+import math
+import os
+import threading
+import time
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from . import telemetry
+from .cache import cache_dir, env_seconds, normalize_key
+
+try:
+    import numpy as np
+except ImportError:  # the index is optional: without NumPy every lookup misses
+    np = None
+
+logger = logging.getLogger(__name__)
+
+TRAVEL_INDEX = os.getenv("TRAVEL_INDEX", "1") != "0"
+# Width of the time-of-day buckets; a departure at 10:40 uses the 9:00-12:00 bucket
+BUCKET_HOURS = int(os.getenv("TRAVEL_INDEX_BUCKET_HOURS", "3"))
+# Timetables and traffic patterns change: an older index is ignored (default 30 days)
+MAX_AGE = env_seconds("TRAVEL_INDEX_MAX_AGE", 30 * 24 * 3600)
+
+# Version 2 added the traffic-aware driving duration as a third field,
+# version 3 the kind of day the index was built for
+INDEX_VERSION = 3
+# duration (s), distance (m), duration in traffic (s; driving only)
+FIELDS = 3
+META_FILE = "index.json"
+DATA_FILE = "travel_times.npy"
+
+
+def index_dir() -> Path:
+    """
+    Return the directory holding the index.
+
+    Configurable with TRAVEL_INDEX_DIR (default: travel_index/ under the
+    cache directory).
+    """
+    return Path(os.getenv("TRAVEL_INDEX_DIR", cache_dir() / "travel_index")).expanduser()
+
+
+def bucket_count(bucket_hours: int) -> int:
+    """Number of time-of-day buckets in a day."""
+    return -(-24 // bucket_hours)
+
+
+def time_bucket(dep_time: datetime, bucket_hours: int) -> int:
+    """Time-of-day bucket of a departure time."""
+    return dep_time.hour // bucket_hours
+
+
+def day_kind(day: date) -> str:
+    """"weekend" for Saturdays and Sundays, "weekday" otherwise."""
+    return "weekend" if day.weekday() >= 5 else "weekday"
+
+
+def format_duration(seconds: float) -> str:
+    """Duration text in the style of the Maps API ('25分', '1時間5分')."""
+    hours, minutes = divmod(max(1, round(seconds / 60)), 60)
+    return f"{hours}時間{minutes}分" if hours else f"{minutes}分"
+
+
+def format_distance(meters: float) -> str:
+    """Distance text in the style of the Maps API ('850 m', '12.3 km')."""
+    return f"{meters / 1000:.1f} km" if meters >= 1000 else f"{round(meters)} m"
+
+
+class TravelIndex:
+    """
+    A loaded index: travel times by mode, time bucket, origin and destination.
+
+    data has the shape (modes, buckets, origins, destinations, 3) and holds
+    the duration in seconds, the distance in meters and, for driving, the
+    duration in traffic in seconds; NaN marks a pair the API had no route
+    for or that was not built (and a missing traffic duration).
+    """
+
+    def __init__(self, meta: dict, data):
+        self.meta = meta
+        self.data = data
+        self.bucket_hours = meta["bucket_hours"]
+        # Weekday timetables and traffic differ from the weekend's
+        self.day_kind = meta["day_kind"]
+        self.modes = {mode: m for m, mode in enumerate(meta["modes"])}
+        self.origins = {normalize_key(place): i for i, place in enumerate(meta["origins"])}
+        self.destinations = {normalize_key(place): j for j, place in enumerate(meta["destinations"])}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+    @classmethod
+    def load(cls, directory: Path) -> Optional["TravelIndex"]:
+        """Memory-map the index in directory; None when it is missing, stale or unreadable."""
+        if np is None:
+            logger.warning("Travel index disabled: NumPy is not installed")
+            return None
+        try:
+            meta = json.loads((Path(directory) / META_FILE).read_text(encoding="utf-8"))
+            if meta.get("version") != INDEX_VERSION:
+                logger.warning("Travel index ignored: unsupported version %s", meta.get("version"))
+                return None
+            if MAX_AGE is not None and time.time() - meta["built_at"] > MAX_AGE:
+                logger.warning("Travel index ignored: built more than %.0f days ago", MAX_AGE / 86400)
+                return None
+            data = np.load(Path(directory) / DATA_FILE, mmap_mode="r")
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Travel index disabled: %s", e)
+            return None
+        expected = (len(meta["modes"]), bucket_count(meta["bucket_hours"]), len(meta["origins"]), len(meta["destinations"]), FIELDS)
+        if data.shape != expected:
+            logger.warning("Travel index ignored: array shape %s does not match %s", data.shape, expected)
+            return None
+        return cls(meta, data)
+
+    def lookup(
+        self, origin: str, destination: str, mode: str, dep_time: datetime
+    ) -> Optional[Tuple[float, float, Optional[float]]]:
+        """
+        (duration in seconds, distance in meters, duration in traffic in
+        seconds or None) of a pair, or None on a miss. Departures on a
+        different kind of day than the index was built for always miss.
+        """
+        m = self.modes.get(mode)
+        i = self.origins.get(normalize_key(origin))
+        j = self.destinations.get(normalize_key(destination))
+        entry = None
+        if m is not None and i is not None and j is not None and day_kind(dep_time.date()) == self.day_kind:
+            duration, distance, traffic = self.data[m, time_bucket(dep_time, self.bucket_hours), i, j]
+            if not math.isnan(duration):
+                entry = (float(duration), float(distance), None if math.isnan(traffic) else float(traffic))
+        with self._lock:
+            self._stats["hits" if entry else "misses"] += 1
+        if entry:
+            telemetry.record_cache_hit()
+        return entry
+
+    def elements(
+        self,
+        origins: Sequence[str],
+        destinations: Sequence[str],
+        modes: Iterable[str],
+        dep_time: datetime,
+    ) -> Dict[Tuple[str, int, int], dict]:
+        """
+        Distance Matrix elements of the indexed pairs, keyed by
+        (mode, origin number, destination number); misses are left out.
+        """
+        cells = {}
+        for mode in modes:
+            for i, origin in enumerate(origins):
+                for j, destination in enumerate(destinations):
+                    entry = self.lookup(origin, destination, mode, dep_time)
+                    if entry is not None:
+                        duration, distance, traffic = entry
+                        cells[(mode, i, j)] = {
+                            "status": "OK",
+                            "duration": {"value": duration, "text": format_duration(duration)},
+                            "distance": {"value": distance, "text": format_distance(distance)},
+                        }
+                        # Same shape as a live driving element, so both render alike
+                        if traffic is not None:
+                            cells[(mode, i, j)]["duration_in_traffic"] = {"value": traffic, "text": format_duration(traffic)}
+        return cells
+
+    def stats(self) -> dict:
+        """Size of the index, when it was built, and lookups served and missed."""
+        with self._lock:
+            stats = dict(self._stats)
+        return {
+            "origins": len(self.meta["origins"]),
+            "destinations": len(self.meta["destinations"]),
+            "modes": self.meta["modes"],
+            "day_kind": self.day_kind,
+            "built_at": datetime.fromtimestamp(self.meta["built_at"]).isoformat(timespec="seconds"),
+            **stats,
+        }
+
+
+def save_index(
+    directory: Path,
+    data,
+    modes: List[str],
+    origins: List[str],
+    destinations: List[str],
+    bucket_hours: int,
+    built_for: str,
+) -> Path:
+    """
+    Write the array and its id map to directory.
+
+    Both files are written next to their final name and renamed into place,
+    so running tools never read a half-written index.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    meta = {
+        "version": INDEX_VERSION,
+        "modes": modes,
+        "bucket_hours": bucket_hours,
+        "origins": origins,
+        "destinations": destinations,
+        "built_for": built_for,
+        "day_kind": day_kind(date.fromisoformat(built_for)),
+        "built_at": time.time(),
+    }
+    # np.save appends .npy to names without it
+    tmp_data = directory / f"{DATA_FILE}.tmp.npy"
+    np.save(tmp_data, np.asarray(data, dtype=np.float32))
+    os.replace(tmp_data, directory / DATA_FILE)
+    tmp_meta = directory / f"{META_FILE}.tmp"
+    tmp_meta.write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp_meta, directory / META_FILE)
+    return directory
+
+
+_index: Optional[TravelIndex] = None
+_index_mtime: Optional[int] = None
+_index_lock = threading.Lock()
+
+
+def get_travel_index() -> Optional[TravelIndex]:
+    """
+    The process-wide index, or None when disabled or not built.
+
+    The id map's modification time is checked on every call, so a
+    long-running server picks up a rebuilt index without a restart.
+    """
+    global _index, _index_mtime
+    if not TRAVEL_INDEX:
+        return None
+    try:
+        mtime = (index_dir() / META_FILE).stat().st_mtime_ns
+    except OSError:
+        mtime = None
+    if mtime != _index_mtime:
+        with _index_lock:
+            if mtime != _index_mtime:
+                _index = TravelIndex.load(index_dir()) if mtime is not None else None
+                _index_mtime = mtime
+    return _index
+
+
+def travel_index_stats() -> Optional[dict]:
+    """Statistics of the loaded index, or None when there is none."""
+    index = get_travel_index()
+    return index.stats() if index is not None else None
+
+
+def reset_travel_index() -> None:
+    """Forget the loaded index so the next call reads it again (mainly for tests)."""
+    global _index, _index_mtime
+    with _index_lock:
+        _index = None
+        _index_mtime = None